@@ -1,26 +1,106 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Request, g, jsonify, request, send_file
 from flask_cors import CORS
 from dotenv import load_dotenv
+import hmac
+import math
 import os
 import tempfile
+import time
+import uuid
 import warnings
 
 # Suppress specific warnings
 warnings.filterwarnings("ignore", message="Core Pydantic V1 functionality isn't compatible")
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError, as_completed
 
 # Import Services
 from services.transcription_service import TranscriptionService
 from services.nlp_service import MedicalNLPService
-from services.safety_service import SafetyService
+from services.safety_service import PAIR_FROM_MATRIX, PAIR_FROM_OPENFDA, SafetyService
+from services.resilience import (
+    COMPREHEND_MEDICAL, OPENFDA, CircuitOpenError, UpstreamError,
+    breaker_states, degraded_upstreams, env_float
+)
+from services.deadline import Deadline, DeadlineExceeded, reset_deadline, set_deadline
+from services import scheduling
+from services.scheduling import PRIORITY_NAMES, gate_stats, get_gate, prioritized, reset_priority, set_priority
+from services.upload_budget import UploadBudget
+from services.admission import AdmissionController, AdmissionRejected
+from services.audio_preprocessing import preprocess_audio
+from services.analysis_store import AnalysisStore
+from services.analysis_export import ExportUnavailable, stream_export
+from services.drug_profiles import DrugProfileCache
+from services.request_profiler import RequestProfiler, reset_profile, set_profile
+from services import tracing
+from services.tracing import tracer
+from services.traffic_capture import TrafficRecorder, record_upstream, reset_capture, set_capture
+from services.response_encoding import FastJSONProvider, json_response, parse_field_list, select_fields
 from logic.risk_engine import RiskEngine
+from logic.entity_processing import filter_active_entities, deduplicate_entities, plan_faers_pairs
+from logic.speaker_attribution import identify_patient_speaker, build_speaker_segments
+from logic.local_entities import LocalEntityExtractor
+from logic.reanalysis import (
+    build_unit_segments, changed_units, correct_entities, entity_changes, known_pair_counts, reuse_entities,
+    split_units
+)
 from ml_service import MLPredictionService
 
 load_dotenv()
 
+# Upload limits: reject oversized bodies early, keep small uploads in memory,
+# spool larger ones to disk, and cap in-flight upload bytes per process
+MAX_UPLOAD_BYTES = int(env_float('MAX_UPLOAD_MB', 100) * 1024 * 1024)
+UPLOAD_SPOOL_THRESHOLD = int(env_float('UPLOAD_SPOOL_THRESHOLD_KB', 1024) * 1024)
+upload_budget = UploadBudget(
+    int(env_float('UPLOAD_MEMORY_BUDGET_MB', 512) * 1024 * 1024),
+    retry_after=int(env_float('UPLOAD_RETRY_AFTER', 5))
+)
+
+# Per-client admission control and fair queuing for the analysis endpoints
+# (services/admission.py); off unless ADMISSION_CONCURRENCY is set
+admission = AdmissionController.from_env()
+ADMITTED_ENDPOINTS = ('analyze_audio', 'reanalyze')
+
+# Optional: downmix/resample/trim WAV uploads before sending them to Deepgram
+AUDIO_PREPROCESS = os.getenv('AUDIO_PREPROCESS', '0') == '1'
+
+# NLP input: 'all' sends the whole transcript, 'patient' only the diarized
+# patient speaker's utterances (falls back to 'all' if none is identified)
+NLP_SPEAKER_MODE = os.getenv('NLP_SPEAKER_MODE', 'all')
+NLP_SEGMENT_CHARS = int(env_float('NLP_SEGMENT_CHARS', 5000))
+# In-process lexicon extractor (logic/local_entities.py): 'fallback' runs it
+# while Comprehend Medical is unavailable, 'gate' also skips Comprehend for
+# text without any medical term, 'only' never calls Comprehend, 'off'
+# disables it. Unless 'off', it also drives the critical-symptom pre-scan.
+NLP_LOCAL_MODE = os.getenv('NLP_LOCAL_MODE', 'fallback')
+
+# End-to-end budget for /analyze; callers may ask for less (X-Deadline-Ms or
+# deadline_ms), never more than the max. The reserve is kept back from
+# optional stages so the response itself still goes out in time.
+ANALYZE_DEADLINE_SECONDS = env_float('ANALYZE_DEADLINE_SECONDS', 120)
+ANALYZE_MAX_DEADLINE_SECONDS = env_float('ANALYZE_MAX_DEADLINE_SECONDS', 300)
+DEADLINE_RESERVE_SECONDS = env_float('ANALYZE_DEADLINE_RESERVE_MS', 500) / 1000
+# Below this much time left, the deadline picks the ML tier even when no
+# latency budget was requested
+ML_DEADLINE_CAP_MS = 1000
+
+# Most openFDA calls one /analyze request may make (0 = no cap); pairs past
+# it, least informative first, are skipped and listed in the response
+FAERS_PAIR_BUDGET = int(env_float('FAERS_PAIR_BUDGET', 40))
+
+# /drug-profile: drugs per call, and how long it waits on uncached profiles
+DRUG_PROFILE_MAX_BATCH = int(env_float('DRUG_PROFILE_MAX_BATCH', 20))
+DRUG_PROFILE_WAIT_SECONDS = env_float('DRUG_PROFILE_WAIT_SECONDS', env_float('FAERS_TIMEOUT', 10))
+
+class SpooledUploadRequest(Request):
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_THRESHOLD, mode='rb+')
+
 app = Flask(__name__)
+app.request_class = SpooledUploadRequest
+app.json = FastJSONProvider(app)
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES
 CORS(app)
 
 # Initialize Services
@@ -38,8 +118,17 @@ except Exception as e:
     nlp_service = None
 
 safety_service = SafetyService()
+drug_profiles = DrugProfileCache(safety_service)
 risk_engine = RiskEngine()
 
+request_profiler = RequestProfiler()
+
+try:
+    analysis_store = AnalysisStore()
+except Exception as e:
+    print(f"Warning: AnalysisStore failed to initialize: {e}")
+    analysis_store = None
+
 # Initialize ML Service (optional)
 try:
     ml_service = MLPredictionService()
@@ -47,9 +136,292 @@ except Exception as e:
     print(f"Warning: MLPredictionService failed to initialize: {e}")
     ml_service = None
 
+local_extractor = None
+if NLP_LOCAL_MODE != 'off':
+    # The model's drugs and symptoms extend the built-in lexicon
+    if ml_service and ml_service.available:
+        local_extractor = LocalEntityExtractor(drugs=ml_service.drug_encoder.classes_,
+                                               conditions=ml_service.symptom_encoder.classes_)
+    else:
+        local_extractor = LocalEntityExtractor()
+
+# Optional: record anonymized upstream responses for benchmarks/replay_traffic.py
+traffic_recorder = None
+if os.getenv('TRAFFIC_CAPTURE', '0') == '1':
+    try:
+        # Clinical terms the anonymizer may keep verbatim
+        vocabulary = risk_engine.CRITICAL_SYMPTOMS + risk_engine.MODERATE_SYMPTOMS
+        if ml_service and ml_service.available:
+            vocabulary += list(ml_service.drug_encoder.classes_) + list(ml_service.symptom_encoder.classes_)
+        traffic_recorder = TrafficRecorder(vocabulary=vocabulary)
+    except Exception as e:
+        print(f"Warning: TrafficRecorder failed to initialize: {e}")
+
+def after_fork():
+    """Restarts background threads in a server worker forked from a preloaded app."""
+    tracer.start_exporter()
+    drug_profiles.start_workers()
+    if analysis_store:
+        analysis_store.start_writer()
+    if ml_service and ml_service.available:
+        ml_service.start_watcher()
+
+def before_exit():
+    """Writes queued analyses before a worker is recycled or shut down."""
+    if analysis_store:
+        analysis_store.flush()
+    if traffic_recorder:
+        traffic_recorder.flush()
+
 @app.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({"status": "healthy", "service": "DeepCare AI Backend"})
+    return jsonify({
+        "status": "healthy",
+        "service": "DeepCare AI Backend",
+        "upstreams": breaker_states(),
+        "uploads": upload_budget.stats(),
+        "ml_tiers": ml_service.tier_stats() if ml_service and ml_service.available else {},
+        "scheduler": gate_stats(),
+        "drug_profiles": drug_profiles.stats(),
+        "admission": admission.stats() if admission else None,
+        "analysis_store": analysis_store.stats() if analysis_store else None,
+        "faers_matrix": safety_service.pair_matrix.stats() if safety_service.pair_matrix else None
+    })
+
+@app.before_request
+def admit_client():
+    # Runs before the upload reservation: queued requests hold no budget
+    if not admission or request.endpoint not in ADMITTED_ENDPOINTS:
+        return None
+    try:
+        g.admission_ticket = admission.admit(request.headers.get(admission.client_header))
+    except AdmissionRejected as e:
+        response = jsonify({"error": str(e), "client": e.client, "reason": e.reason})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(max(1, math.ceil(e.retry_after)))
+        return response
+    return None
+
+@app.before_request
+def reserve_upload_budget():
+    if request.endpoint != 'analyze_audio':
+        return None
+    # Reserve the declared body size before it is parsed; unknown lengths
+    # (chunked uploads) are charged the maximum allowed size
+    reserved = min(request.content_length or MAX_UPLOAD_BYTES, MAX_UPLOAD_BYTES)
+    if not upload_budget.try_acquire(reserved):
+        response = jsonify({"error": "Server is busy processing uploads, please retry later"})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(upload_budget.retry_after)
+        return response
+    g.upload_reservation = reserved
+    return None
+
+@app.teardown_request
+def release_admission(exc):
+    ticket = g.pop('admission_ticket', None)
+    if ticket:
+        admission.release(ticket)
+
+@app.teardown_request
+def release_upload_budget(exc):
+    reserved = g.pop('upload_reservation', 0)
+    if reserved:
+        upload_budget.release(reserved)
+
+def selected_json(payload, status=200):
+    """JSON response honoring ?fields= / ?exclude= and Accept-Encoding."""
+    payload = select_fields(payload,
+                            fields=parse_field_list(request.args.get('fields')),
+                            exclude=parse_field_list(request.args.get('exclude')))
+    return json_response(payload, status, accept_encoding=request.headers.get('Accept-Encoding'))
+
+@app.errorhandler(413)
+def upload_too_large(error):
+    return jsonify({
+        "error": f"Upload exceeds the maximum size of {MAX_UPLOAD_BYTES // (1024 * 1024)} MB"
+    }), 413
+
+def critical_prescan(transcript):
+    """
+    Critical symptoms mentioned in a raw transcript, to prioritize the
+    encounter before NLP has run. With the local extractor, negated and
+    family-history mentions do not count.
+    """
+    if not local_extractor:
+        return risk_engine.critical_mentions(transcript)
+    active = filter_active_entities(local_extractor.analyze_text(transcript))
+    return risk_engine.critical_mentions(' '.join(entity['Text'] for entity in active))
+
+def run_nlp(text, segments, degraded, degraded_stages):
+    """
+    NLP stage over segments (see MedicalNLPService.analyze_segments), or the
+    whole text when segments is None. Comprehend Medical unless
+    NLP_LOCAL_MODE routes around it; the local extractor stands in when it
+    is unavailable, fails or runs out of time.
+
+    Returns:
+        tuple: (raw entities, source: 'comprehend' | 'local' | 'none')
+    """
+    texts = [segment['text'] for segment in segments] if segments is not None else [text]
+    if NLP_LOCAL_MODE == 'gate' and not any(local_extractor.has_medical_content(t) for t in texts):
+        # Nothing in the lexicon: not worth a Comprehend call
+        return [], 'local'
+    if NLP_LOCAL_MODE != 'only' and nlp_service:
+        try:
+            if segments is not None:
+                return nlp_service.analyze_segments(segments), 'comprehend'
+            return nlp_service.analyze_text(text), 'comprehend'
+        except (CircuitOpenError, UpstreamError):
+            degraded.add(COMPREHEND_MEDICAL)
+        except DeadlineExceeded:
+            degraded_stages.append('nlp')
+    if not local_extractor:
+        return [], 'none'
+    if segments is not None:
+        return local_extractor.analyze_segments(segments), 'local'
+    return local_extractor.analyze_text(text), 'local'
+
+def check_faers(unique_entities, deadline, encounter_priority, trace, profile, degraded, degraded_stages,
+                known_counts=None):
+    """
+    FAERS stage: cross-checks drug x symptom pairs, most informative first,
+    within the per-request openFDA call budget. Cached pairs are free, and so
+    are pairs in known_counts ({(drug, symptom) lowercased: reports}), which
+    are taken as-is. Pairs still outstanding when the deadline (less the
+    reserve) runs out are dropped and 'faers' is added to degraded_stages.
+
+    Returns:
+        tuple: (faers_data for the response, number of pairs from known_counts)
+    """
+    known_counts = known_counts or {}
+
+    def is_known(drug, symptom):
+        return (drug.lower(), symptom.lower()) in known_counts
+
+    def is_free(drug, symptom):
+        return is_known(drug, symptom) or safety_service.is_pair_cached(drug, symptom)
+
+    planned, skipped = plan_faers_pairs(unique_entities, FAERS_PAIR_BUDGET,
+                                        symptom_tier=risk_engine.symptom_tier, is_cached=is_free)
+    pairs = [(pair['drug'], pair['symptom']) for pair in planned]
+    trace.root.set_attribute('faers.pairs_skipped', len(skipped))
+
+    def pair_priority(symptom):
+        # Critical-symptom pairs first; the rest of a critical encounter next
+        if risk_engine.critical_mentions(symptom):
+            return scheduling.CRITICAL
+        return scheduling.URGENT if encounter_priority == scheduling.CRITICAL else scheduling.ROUTINE
+
+    total_reports = 0
+    risk_details = []
+
+    def add_result(count, drug, symptom):
+        nonlocal total_reports
+        if count > 0:
+            total_reports += count
+            risk_details.append({
+                "drug": drug,
+                "symptom": symptom,
+                "reports": count
+            })
+
+    # Helper function for parallel execution
+    def check_pair(drug, symptom):
+        with tracer.span('faers.pair', drug=drug, symptom=symptom) as span:
+            with prioritized(pair_priority(symptom)):
+                count, source = safety_service.fetch_pair_count(drug, symptom)
+            span.set_attribute('faers.reports', count)
+            span.set_attribute('faers.source', source)
+            if source != PAIR_FROM_OPENFDA:
+                # No upstream call; still recorded so replay can serve it on a miss
+                record_upstream(OPENFDA, (drug, symptom), count, None)
+            return count, source, drug, symptom
+
+    reused = 0
+    pairs_checked = 0
+    # Pairs answered by the precomputed matrix, whose counts are as old as it is
+    matrix_hits = 0
+    to_query = []
+    for drug, symptom in pairs:
+        if is_known(drug, symptom):
+            reused += 1
+            pairs_checked += 1
+            add_result(known_counts[(drug.lower(), symptom.lower())], drug, symptom)
+        else:
+            to_query.append((drug, symptom))
+
+    # Use ThreadPoolExecutor for parallel API calls; propagate() carries
+    # the trace and deadline context into the worker threads
+    if to_query:
+        executor = ThreadPoolExecutor(max_workers=10)
+        try:
+            futures = [executor.submit(profile.wrap(tracing.propagate(check_pair)), drug, symptom)
+                       for drug, symptom in to_query]
+
+            for future in as_completed(futures, timeout=max(0.0, deadline.remaining() - DEADLINE_RESERVE_SECONDS)):
+                try:
+                    count, source, drug, symptom = future.result()
+                    add_result(count, drug, symptom)
+                    if source == PAIR_FROM_MATRIX:
+                        matrix_hits += 1
+                    pairs_checked += 1
+                except (CircuitOpenError, UpstreamError):
+                    degraded.add(OPENFDA)
+                except DeadlineExceeded:
+                    pass
+                except Exception as exc:
+                    print(f"[trace {trace.trace_id}] FAERS check generated an exception: {exc}")
+        except FuturesTimeoutError:
+            pass
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+    # Pairs openFDA could not answer leave the check incomplete; the outage
+    # itself is reported in degraded_upstreams, not as a deadline cut
+    faers_complete = pairs_checked == len(pairs)
+    if not faers_complete and OPENFDA not in degraded and 'faers' not in degraded_stages:
+        degraded_stages.append('faers')
+
+    return {
+        "total_reports": total_reports,
+        "details": risk_details,
+        "complete": faers_complete,
+        "pairs_checked": pairs_checked,
+        "pairs_total": len(pairs),
+        "call_budget": FAERS_PAIR_BUDGET,
+        "matrix_pairs": matrix_hits,
+        "matrix_as_of": safety_service.pair_matrix.as_of if matrix_hits else None,
+        "skipped_pairs": [{"drug": pair['drug'], "symptom": pair['symptom']} for pair in skipped]
+    }, reused
+
+def predict_ml(unique_entities, total_reports, deadline, budget_ms, degraded_stages):
+    """
+    ML stage, if available. An optional latency budget picks the model tier;
+    the time left before the deadline caps it. Returns None when skipped.
+    """
+    if not ml_service or not ml_service.available:
+        return None
+    # Tier latencies are profiled, so ML may run into the reserve: a tier
+    # whose p99 fits the time left is picked
+    ml_remaining_ms = deadline.remaining() * 1000
+    if ml_remaining_ms <= 0:
+        degraded_stages.append('ml')
+        return None
+    if budget_ms is None:
+        budget_ms = ml_service.default_budget_ms
+    if budget_ms is not None:
+        budget_ms = min(budget_ms, ml_remaining_ms)
+    elif ml_remaining_ms < ML_DEADLINE_CAP_MS:
+        budget_ms = ml_remaining_ms
+    try:
+        with get_gate(scheduling.ML).slot():
+            return ml_service.predict_risk(unique_entities, {'total_reports': total_reports},
+                                           budget_ms=budget_ms)
+    except DeadlineExceeded:
+        # Only the gate wait raises this: predict_risk reports its own
+        # failures as None and is held to budget_ms by the tier pick
+        degraded_stages.append('ml')
+        return None
 
 @app.route('/analyze', methods=['POST'])
 def analyze_audio():
@@ -60,128 +432,552 @@ def analyze_audio():
     if audio_file.filename == '':
         return jsonify({"error": "No selected file"}), 400
 
-    # Save temporarily
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp:
-        audio_file.save(temp.name)
-        temp_path = temp.name
+    analysis_id = uuid.uuid4().hex
+    # Opt-in profiling of this request; a no-op unless the token matches
+    profile = request_profiler.start(analysis_id, request.headers.get('X-Profile-Token'))
+    # Worker threads (NLP segments, upstream hedges) pick the profile up from context
+    profile_token = set_profile(profile)
+    # The analysis ID doubles as the trace ID unless the caller sent a traceparent
+    trace = tracer.start_request('POST /analyze', trace_id=analysis_id,
+                                 traceparent=request.headers.get('traceparent'),
+                                 **{'analysis.id': analysis_id})
+    status_code = 200
+    override_ms = request.headers.get('X-Deadline-Ms', type=float) or request.form.get('deadline_ms', type=float)
+    deadline = Deadline.from_request(ANALYZE_DEADLINE_SECONDS, ANALYZE_MAX_DEADLINE_SECONDS, override_ms)
+    deadline_token = set_deadline(deadline)
+    priority_token = None
+    capture = traffic_recorder.start() if traffic_recorder else None
+    capture_token = set_capture(capture)
+    if capture:
+        capture.audio_bytes = request.content_length or 0
+        capture.form = {key: value for key, value in (
+            ('speaker_mode', request.form.get('speaker_mode')),
+            ('ml_budget_ms', request.form.get('ml_budget_ms', type=float)),
+            ('deadline_ms', override_ms),
+            ('fields', request.args.get('fields')),
+            ('exclude', request.args.get('exclude'))
+        ) if value is not None}
+    # Optional stages skipped or cut short to answer within the deadline
+    degraded_stages = []
+
+    def mark(stage):
+        profile.mark(stage)
+        trace.mark(stage)
 
     try:
         # 1. Transcribe
+        mark('transcription')
         if not transcription_service:
             raise Exception("Transcription service is not available")
             
-        transcript_response = transcription_service.transcribe_audio(temp_path)
-        
-        # Extract text from Deepgram response
-        transcript_text = ""
-        utterances = []
-        if transcript_response and transcript_response.results:
-             transcript_text = transcript_response.results.channels[0].alternatives[0].transcript
-             if transcript_response.results.utterances:
-                 for utt in transcript_response.results.utterances:
-                     utterances.append({
-                         "speaker": utt.speaker,
-                         "text": utt.transcript,
-                         "start": utt.start,
-                         "end": utt.end,
-                         "confidence": utt.confidence
-                     })
+        # The upload is already spooled (memory or disk) by the request class;
+        # stream it straight to Deepgram instead of copying it again
+        audio_stream = audio_file.stream
+        preprocessing = None
+        if AUDIO_PREPROCESS:
+            mark('preprocessing')
+            try:
+                audio_stream, preprocessing = preprocess_audio(audio_file.stream)
+            except Exception as e:
+                print(f"Audio preprocessing failed, uploading original: {e}")
+                audio_file.stream.seek(0)
+            mark('transcription')
+        transcription_start = time.monotonic()
+        # Only the transcript and utterance fields; word timings are not used
+        transcription = transcription_service.transcribe(audio_stream)
+        if audio_stream is not audio_file.stream:
+            audio_stream.close()
+        transcript_text = transcription['transcript']
+        utterances = transcription['utterances']
+
+        if capture:
+            capture.record_transcription(time.monotonic() - transcription_start, transcript_text, utterances)
+
+        # Pre-scan the transcript so this encounter's NLP, FAERS and ML work
+        # is served ahead of routine work while those stages are saturated
+        critical_mentions = critical_prescan(transcript_text)
+        encounter_priority = scheduling.CRITICAL if critical_mentions else scheduling.ROUTINE
+        priority_token = set_priority(encounter_priority)
+        trace.root.set_attribute('analysis.priority', PRIORITY_NAMES[encounter_priority])
+
+        # Upstreams that failed fast or errored during this request
+        degraded = set()
 
         # 2. NLP Analysis
-        raw_entities = []
-        if nlp_service:
-            raw_entities = nlp_service.analyze_text(transcript_text)
+        mark('nlp')
+        speaker_analysis = None
+        segments = None
+        speaker_mode = request.form.get('speaker_mode', NLP_SPEAKER_MODE)
+        if speaker_mode == 'patient':
+            patient_speaker = request.form.get('patient_speaker', type=int)
+            if patient_speaker is None:
+                patient_speaker = identify_patient_speaker(utterances)
+
+            if patient_speaker is not None:
+                if capture:
+                    # Replay cannot re-identify the speaker from masked text
+                    capture.form['patient_speaker'] = patient_speaker
+                # Only the patient's own words: halves NLP payload and keeps
+                # drugs the clinician merely mentions out of the FAERS pairs
+                segments = build_speaker_segments(utterances, patient_speaker, NLP_SEGMENT_CHARS)
+                if segments:
+                    speaker_analysis = {
+                        "mode": "patient",
+                        "patient_speaker": patient_speaker,
+                        "segments": len(segments),
+                        "nlp_chars": sum(len(segment['text']) for segment in segments),
+                        "transcript_chars": len(transcript_text)
+                    }
+                else:
+                    # No utterances from that speaker (or none at all):
+                    # analyze the whole transcript rather than nothing
+                    segments = None
+        raw_entities, nlp_source = run_nlp(transcript_text, segments, degraded, degraded_stages)
 
         # Filter Entities: Remove Negated and Family History items
-        # We only want to analyze active symptoms/medications for the patient
-        active_entities = []
-        for entity in raw_entities:
-            traits = [t.get('Name') for t in entity.get('Traits', [])]
-            if 'NEGATION' in traits:
-                continue
-            if 'PERTAINS_TO_FAMILY' in traits:
-                continue
-            active_entities.append(entity)
+        mark('entity_processing')
+        active_entities = filter_active_entities(raw_entities)
 
         # Process Entities: Count frequencies and deduplicate
-        # We normalize by text lowercased to count, but keep original casing for display
-        entity_counts = Counter([e['Text'].lower() for e in active_entities])
-        
-        unique_entities_map = {}
-        for entity in active_entities:
-            text_lower = entity['Text'].lower()
-            if text_lower not in unique_entities_map:
-                entity['Frequency'] = entity_counts[text_lower]
-                unique_entities_map[text_lower] = entity
-        
-        unique_entities = list(unique_entities_map.values())
+        unique_entities = deduplicate_entities(active_entities)
+
+        # Warm the FAERS chart's drug profiles off the request path
+        drug_profiles.prefetch(e['Text'] for e in unique_entities if e.get('Category') == 'MEDICATION')
 
         # 3. Safety Check (FAERS)
-        # Extract drugs and symptoms for cross-check
-        drugs = [e['Text'] for e in unique_entities if e.get('Category') == 'MEDICATION']
-        symptoms = [e['Text'] for e in unique_entities if e.get('Category') == 'MEDICAL_CONDITION']
-        
-        total_reports = 0
-        risk_details = []
-
-        # Helper function for parallel execution
-        def check_pair(drug, symptom):
-            return safety_service.check_drug_risks(drug, symptom), drug, symptom
-
-        # Use ThreadPoolExecutor for parallel API calls
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            futures = []
-            for drug in drugs:
-                for symptom in symptoms:
-                    futures.append(executor.submit(check_pair, drug, symptom))
-            
-            for future in as_completed(futures):
-                try:
-                    count, drug, symptom = future.result()
-                    if count > 0:
-                        total_reports += count
-                        risk_details.append({
-                            "drug": drug,
-                            "symptom": symptom,
-                            "reports": count
-                        })
-                except Exception as exc:
-                    print(f"FAERS check generated an exception: {exc}")
+        mark('faers')
+        faers_data, _ = check_faers(unique_entities, deadline, encounter_priority, trace, profile,
+                                    degraded, degraded_stages)
+        total_reports = faers_data['total_reports']
 
         # 4. Risk Calculation
+        mark('risk_engine')
         # Pass unique entities (with Frequency) to Risk Engine
         risk_result = risk_engine.calculate_risk(unique_entities, {'total_reports': total_reports})
 
         # 5. ML Prediction (if available)
-        ml_result = None
-        if ml_service and ml_service.available:
-            ml_result = ml_service.predict_risk(unique_entities, {'total_reports': total_reports})
+        mark('ml')
+        ml_result = predict_ml(unique_entities, total_reports, deadline,
+                               request.form.get('ml_budget_ms', type=float), degraded_stages)
 
         # 6. Response
+        mark('response')
+        degraded.update(degraded_upstreams())
         response = {
+            "analysis_id": analysis_id,
+            "trace_id": trace.trace_id,
             "transcript": transcript_text,
             "utterances": utterances,
             "entities": unique_entities,
+            "nlp_source": nlp_source,
             "risk_analysis": risk_result,
-            "faers_data": {
-                "total_reports": total_reports,
-                "details": risk_details
-            }
+            "faers_data": faers_data,
+            "deadline": {**deadline.summary(), "degraded_stages": degraded_stages},
+            "priority": {
+                "level": PRIORITY_NAMES[encounter_priority],
+                "critical_mentions": critical_mentions
+            },
+            "degraded": bool(degraded or degraded_stages),
+            "degraded_upstreams": sorted(degraded)
         }
         
+        if preprocessing:
+            response['preprocessing'] = preprocessing
+
+        if speaker_analysis:
+            response['speaker_analysis'] = speaker_analysis
+
         # Add ML prediction if available
         if ml_result:
             response['ml_analysis'] = ml_result
-        
-        return jsonify(response)
 
+        if profile.enabled:
+            response['profile_id'] = analysis_id
+
+        # 7. Persist (queued; written in batches off the request path)
+        if analysis_store:
+            analysis_store.save(response['analysis_id'], response, file_name=audio_file.filename)
+
+        # 8. Serialize (and compress) only the fields the client renders
+        mark('serialization')
+        return selected_json(response)
+
+    except CircuitOpenError as e:
+        print(f"[trace {trace.trace_id}] Analysis Error: {e}")
+        status_code = 503
+        return jsonify({
+            "error": str(e),
+            "degraded": True,
+            "degraded_upstreams": [e.upstream]
+        }), 503
+    except DeadlineExceeded as e:
+        # Nothing useful can be returned without a transcript
+        print(f"[trace {trace.trace_id}] Analysis Error: {e}")
+        status_code = 504
+        return jsonify({
+            "error": str(e),
+            "degraded": True,
+            "deadline": deadline.summary()
+        }), 504
     except Exception as e:
-        print(f"Analysis Error: {e}")
+        print(f"[trace {trace.trace_id}] Analysis Error: {e}")
+        trace.root.record_exception(e)
+        status_code = 500
         return jsonify({"error": str(e)}), 500
     finally:
         # Cleanup
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+        audio_file.close()
+        if traffic_recorder:
+            traffic_recorder.finish(capture, status_code)
+        reset_capture(capture_token)
+        if priority_token is not None:
+            reset_priority(priority_token)
+        reset_deadline(deadline_token)
+        reset_profile(profile_token)
+        profile.finish()
+        trace.finish(status_code)
+
+@app.route('/reanalyze', methods=['POST'])
+def reanalyze():
+    """
+    Re-scores a prior analysis after clinician corrections, without the audio.
+
+    JSON body: the prior result as "prior" (or its "analysis_id" in history)
+    plus an edited "transcript" and/or "utterances", or a corrected
+    "entities" list (which replaces NLP entirely). Only changed utterances
+    (or sentences) go to NLP and only pairs the prior result never checked
+    go to openFDA; risk and ML scores are recomputed from the merged state.
+    The result is returned, not stored.
+    """
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+    prior = body.get('prior')
+    if prior is None and body.get('analysis_id'):
+        if not analysis_store:
+            return jsonify({"error": "History store is not available"}), 503
+        record = analysis_store.get(body['analysis_id'])
+        if record is None:
+            return jsonify({"error": "Analysis not found"}), 404
+        prior = record['result']
+    if not isinstance(prior, dict):
+        return jsonify({"error": "No prior analysis provided"}), 400
+
+    prior_entities = prior.get('entities') or []
+    prior_utterances = prior.get('utterances') or []
+    edited_utterances = body.get('utterances')
+    edited_transcript = body.get('transcript')
+    if edited_utterances is not None and (
+            not isinstance(edited_utterances, list)
+            or not all(isinstance(u, dict) and isinstance(u.get('text') or '', str) for u in edited_utterances)):
+        return jsonify({"error": "utterances must be a list of objects with a text string"}), 400
+    if edited_transcript is not None and not isinstance(edited_transcript, str):
+        return jsonify({"error": "transcript must be a string"}), 400
+    if edited_utterances is not None:
+        utterances = edited_utterances
+        transcript_text = edited_transcript or ' '.join(u.get('text') or '' for u in utterances)
+    elif edited_transcript is not None:
+        # An edited transcript no longer lines up with the prior utterances
+        utterances = []
+        transcript_text = edited_transcript
+    else:
+        utterances = prior_utterances
+        transcript_text = prior.get('transcript') or ''
+
+    corrected_entities = None
+    if body.get('entities') is not None:
+        if not isinstance(body['entities'], list):
+            return jsonify({"error": "entities must be a list"}), 400
+        try:
+            corrected_entities = correct_entities(body['entities'], prior_entities)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+    try:
+        override_ms = request.headers.get('X-Deadline-Ms', type=float) or body.get('deadline_ms')
+        override_ms = float(override_ms) if override_ms is not None else None
+        ml_budget_ms = float(body['ml_budget_ms']) if body.get('ml_budget_ms') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "deadline_ms and ml_budget_ms must be numbers"}), 400
+
+    analysis_id = uuid.uuid4().hex
+    profile = request_profiler.start(analysis_id, request.headers.get('X-Profile-Token'))
+    profile_token = set_profile(profile)
+    trace = tracer.start_request('POST /reanalyze', trace_id=analysis_id,
+                                 traceparent=request.headers.get('traceparent'),
+                                 **{'analysis.id': analysis_id,
+                                    'analysis.revision_of': prior.get('analysis_id') or ''})
+    status_code = 200
+    deadline = Deadline.from_request(ANALYZE_DEADLINE_SECONDS, ANALYZE_MAX_DEADLINE_SECONDS, override_ms)
+    deadline_token = set_deadline(deadline)
+    priority_token = None
+    degraded_stages = []
+    degraded = set()
+
+    def mark(stage):
+        profile.mark(stage)
+        trace.mark(stage)
+
+    try:
+        critical_mentions = critical_prescan(transcript_text)
+        encounter_priority = scheduling.CRITICAL if critical_mentions else scheduling.ROUTINE
+        priority_token = set_priority(encounter_priority)
+        trace.root.set_attribute('analysis.priority', PRIORITY_NAMES[encounter_priority])
+
+        # 1. Entities: the clinician's list, or prior entities for
+        # unchanged units merged with NLP on the changed ones
+        mark('nlp')
+        speaker_analysis = prior.get('speaker_analysis')
+        units_total = units_analyzed = 0
+        # Nothing was sent to NLP unless some unit changed
+        nlp_source = None
+        if corrected_entities is not None:
+            # A correction may still carry a NEGATION or family-history trait
+            unique_entities = filter_active_entities(corrected_entities)
+        else:
+            # Utterance units only if both sides have utterances to compare
+            by_utterance = bool(utterances and prior_utterances)
+            patient_speaker = speaker_analysis.get('patient_speaker') if speaker_analysis and by_utterance else None
+            if not by_utterance:
+                speaker_analysis = None
+            prior_units = split_units(prior.get('transcript'), prior_utterances if by_utterance else None,
+                                      patient_speaker)
+            units = split_units(transcript_text, utterances if by_utterance else None, patient_speaker)
+            changed = set(changed_units(prior_units, units))
+            units_total, units_analyzed = len(units), len(changed)
+            occurrences = reuse_entities([u for i, u in enumerate(units) if i not in changed], prior_entities)
+            if changed:
+                segments = build_unit_segments([units[i] for i in sorted(changed)], NLP_SEGMENT_CHARS)
+                raw_entities, nlp_source = run_nlp(None, segments, degraded, degraded_stages)
+                occurrences += filter_active_entities(raw_entities)
+            mark('entity_processing')
+            unique_entities = deduplicate_entities(occurrences)
+
+        drug_profiles.prefetch(e['Text'] for e in unique_entities if e.get('Category') == 'MEDICATION')
+
+        # 2. FAERS: only pairs the prior result did not settle
+        mark('faers')
+        faers_data, faers_reused = check_faers(unique_entities, deadline, encounter_priority, trace, profile,
+                                               degraded, degraded_stages, known_counts=known_pair_counts(prior))
+
+        # 3. Scores from the merged state
+        mark('risk_engine')
+        risk_result = risk_engine.calculate_risk(unique_entities, {'total_reports': faers_data['total_reports']})
+        mark('ml')
+        ml_result = predict_ml(unique_entities, faers_data['total_reports'], deadline, ml_budget_ms,
+                               degraded_stages)
+
+        mark('response')
+        degraded.update(degraded_upstreams())
+        response = {
+            "analysis_id": analysis_id,
+            "trace_id": trace.trace_id,
+            "transcript": transcript_text,
+            "utterances": utterances,
+            "entities": unique_entities,
+            "nlp_source": nlp_source,
+            "risk_analysis": risk_result,
+            "faers_data": faers_data,
+            "deadline": {**deadline.summary(), "degraded_stages": degraded_stages},
+            "priority": {
+                "level": PRIORITY_NAMES[encounter_priority],
+                "critical_mentions": critical_mentions
+            },
+            "degraded": bool(degraded or degraded_stages),
+            "degraded_upstreams": sorted(degraded),
+            "reanalysis": {
+                "revision_of": prior.get('analysis_id'),
+                "units_total": units_total,
+                "units_analyzed": units_analyzed,
+                "faers_pairs_reused": faers_reused,
+                "entities": entity_changes(prior_entities, unique_entities)
+            }
+        }
+        if speaker_analysis:
+            response['speaker_analysis'] = speaker_analysis
+        if ml_result:
+            response['ml_analysis'] = ml_result
+        if profile.enabled:
+            response['profile_id'] = analysis_id
+
+        mark('serialization')
+        return selected_json(response)
+
+    except DeadlineExceeded as e:
+        print(f"[trace {trace.trace_id}] Reanalysis Error: {e}")
+        status_code = 504
+        return jsonify({
+            "error": str(e),
+            "degraded": True,
+            "deadline": deadline.summary()
+        }), 504
+    except Exception as e:
+        print(f"[trace {trace.trace_id}] Reanalysis Error: {e}")
+        trace.root.record_exception(e)
+        status_code = 500
+        return jsonify({"error": str(e)}), 500
+    finally:
+        if priority_token is not None:
+            reset_priority(priority_token)
+        reset_deadline(deadline_token)
+        reset_profile(profile_token)
+        profile.finish()
+        trace.finish(status_code)
+
+@app.route('/profiles/<request_id>', methods=['GET'])
+def get_profile(request_id):
+    """Stored profile for a request: JSON timeline + call tree, or ?format=pstats."""
+    if not request_profiler.authorized(request.headers.get('X-Profile-Token')):
+        return jsonify({"error": "Not authorized"}), 403
+
+    binary = request.args.get('format') == 'pstats'
+    profile = request_profiler.load(request_id, binary=binary)
+    if profile is None:
+        return jsonify({"error": "Profile not found"}), 404
+    if binary:
+        return send_file(os.path.abspath(profile), mimetype='application/octet-stream',
+                         as_attachment=True, download_name=f"{request_id}.prof")
+    return jsonify(profile)
+
+def admin_authorized():
+    """Admin endpoints are off unless ADMIN_TOKEN is configured and matches X-Admin-Token."""
+    token = os.getenv('ADMIN_TOKEN')
+    supplied = request.headers.get('X-Admin-Token')
+    if not token or not supplied:
+        return False
+    return hmac.compare_digest(token.encode(), supplied.encode())
+
+@app.route('/admin/models', methods=['GET'])
+def model_status():
+    if not admin_authorized():
+        return jsonify({"error": "Not authorized"}), 403
+    if not ml_service or not ml_service.available:
+        return jsonify({"error": "ML service is not available"}), 503
+    return jsonify(ml_service.status())
+
+@app.route('/admin/models/reload', methods=['POST'])
+def reload_model():
+    """
+    Loads, validates and swaps in a model version without a restart.
+    With a version, it is also pinned so every worker converges on it;
+    without one, the newest (or pinned) release is loaded.
+    """
+    if not admin_authorized():
+        return jsonify({"error": "Not authorized"}), 403
+    if not ml_service or not ml_service.available:
+        return jsonify({"error": "ML service is not available"}), 503
+    version = (request.get_json(silent=True) or {}).get('version') or request.args.get('version')
+    try:
+        status = ml_service.activate(version) if version else ml_service.reload()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 422
+    return jsonify(status)
+
+@app.route('/admin/models/rollback', methods=['POST'])
+def rollback_model():
+    if not admin_authorized():
+        return jsonify({"error": "Not authorized"}), 403
+    if not ml_service or not ml_service.available:
+        return jsonify({"error": "ML service is not available"}), 503
+    try:
+        return jsonify(ml_service.rollback())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 409
+
+@app.route('/drug-profile', methods=['GET'])
+def drug_profile():
+    """Top FAERS reactions for ?drug=name or ?drugs=a,b,c, served from the profile cache."""
+    drugs = [d.strip() for d in request.args.get('drugs', '').split(',') if d.strip()]
+    if request.args.get('drug'):
+        drugs.insert(0, request.args['drug'])
+    if not drugs:
+        return jsonify({"error": "No drug provided"}), 400
+    if len(drugs) > DRUG_PROFILE_MAX_BATCH:
+        return jsonify({"error": f"At most {DRUG_PROFILE_MAX_BATCH} drugs per request"}), 400
+
+    profiles = drug_profiles.get_many(drugs, timeout=DRUG_PROFILE_WAIT_SECONDS)
+    return selected_json({
+        "profiles": profiles,
+        "unavailable": [drug for drug, profile in profiles.items() if profile is None]
+    })
+
+@app.route('/history', methods=['GET'])
+def list_history():
+    """Newest-first analysis summaries with keyset pagination and filters."""
+    if not analysis_store:
+        return jsonify({"error": "History store is not available"}), 503
+
+    args = request.args
+    try:
+        page = analysis_store.list_analyses(
+            limit=max(1, min(args.get('limit', 20, type=int), 100)),
+            cursor=args.get('cursor'),
+            risk_level=args.get('risk_level'),
+            min_score=args.get('min_score', type=float),
+            max_score=args.get('max_score', type=float),
+            since=args.get('since', type=float),
+            until=args.get('until', type=float),
+            drug=args.get('drug'),
+            symptom=args.get('symptom')
+        )
+    except ValueError:
+        return jsonify({"error": "Invalid cursor"}), 400
+    return selected_json(page)
+
+@app.route('/history/<analysis_id>', methods=['GET'])
+def get_history_item(analysis_id):
+    if not analysis_store:
+        return jsonify({"error": "History store is not available"}), 503
+
+    record = analysis_store.get(analysis_id)
+    if record is None:
+        return jsonify({"error": "Analysis not found"}), 404
+    return selected_json(record)
+
+@app.route('/stats', methods=['GET'])
+def population_stats():
+    """Dashboard/FAERS chart aggregates, maintained incrementally per analysis."""
+    if not analysis_store:
+        return jsonify({"error": "History store is not available"}), 503
+
+    top = max(1, min(request.args.get('top', 10, type=int), 100))
+    days = max(1, min(request.args.get('days', 30, type=int), 366))
+    return selected_json(analysis_store.aggregates(top=top, days=days))
+
+@app.route('/admin/export/<table>', methods=['GET'])
+def export_analyses(table):
+    """
+    Streams the analyses, entities or pairs table as Parquet (or ?format=arrow
+    for an Arrow IPC stream), filtered by ?since= / ?until= (Unix
+    timestamps) and ?risk_level=a,b. See services/analysis_export.py.
+    """
+    if not admin_authorized():
+        return jsonify({"error": "Not authorized"}), 403
+    if not analysis_store:
+        return jsonify({"error": "History store is not available"}), 503
+
+    args = request.args
+    fmt = args.get('format', 'parquet')
+    risk_levels = [level.strip() for level in args.get('risk_level', '').split(',') if level.strip()]
+    try:
+        chunks = stream_export(
+            analysis_store, table, fmt,
+            row_group_size=max(100, min(args.get('row_group_size', 10000, type=int), 100000)),
+            since=args.get('since', type=float),
+            until=args.get('until', type=float),
+            risk_levels=risk_levels or None
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except ExportUnavailable as e:
+        return jsonify({"error": str(e)}), 503
+    extension = 'parquet' if fmt == 'parquet' else 'arrows'
+    response = app.response_class(chunks, mimetype='application/vnd.apache.parquet' if fmt == 'parquet'
+                                  else 'application/vnd.apache.arrow.stream')
+    response.headers['Content-Disposition'] = f'attachment; filename="{table}.{extension}"'
+    return response
 
 if __name__ == '__main__':
+    # Development server only; production runs under gunicorn:
+    #   cd backend && gunicorn -c gunicorn.conf.py app:app
     app.run(debug=True, port=5000)
@@ -0,0 +1,95 @@
+"""
+Admission Control Benchmark
+Interactive (clinician) queue wait while a batch partner floods the
+server, with and without per-client admission control. Requests hold a
+slot for a fixed service time instead of running the pipeline.
+
+Usage:
+    python backend/benchmarks/bench_admission.py [--seconds 5] [--capacity 8] [--service-ms 40]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from backend.services.admission import AdmissionController, AdmissionRejected
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))] if samples else float('nan')
+
+
+def run(controller, seconds, service, batch_threads, interactive_interval, batch_name):
+    """Returns (interactive waits, interactive shed, batch completed, batch shed)."""
+    stop = time.monotonic() + seconds
+    waits, shed, batch = [], [], {'done': 0, 'shed': 0}
+
+    def batch_worker():
+        while time.monotonic() < stop:
+            try:
+                ticket = controller.admit(batch_name)
+            except AdmissionRejected as e:
+                batch['shed'] += 1
+                time.sleep(min(e.retry_after, 0.05))
+                continue
+            time.sleep(service)
+            controller.release(ticket)
+            batch['done'] += 1
+
+    def interactive_worker():
+        while time.monotonic() < stop:
+            start = time.monotonic()
+            try:
+                ticket = controller.admit('clinic')
+            except AdmissionRejected as e:
+                shed.append(e.reason)
+                time.sleep(min(e.retry_after, 0.05))
+                continue
+            waits.append(time.monotonic() - start)
+            time.sleep(service)
+            controller.release(ticket)
+            time.sleep(interactive_interval)
+
+    threads = [threading.Thread(target=batch_worker) for _ in range(batch_threads)]
+    threads += [threading.Thread(target=interactive_worker) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return waits, len(shed), batch['done'], batch['shed']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--capacity', type=int, default=8)
+    parser.add_argument('--service-ms', type=float, default=40)
+    parser.add_argument('--batch-threads', type=int, default=64)
+    args = parser.parse_args()
+    service = args.service_ms / 1000
+
+    print(f"🚦 Admission benchmark: capacity {args.capacity}, {args.batch_threads} batch threads, "
+          f"{args.service_ms:.0f} ms per request")
+    scenarios = (
+        # Everyone in one FIFO queue, as without client identity
+        ('shared queue', AdmissionController(args.capacity, latency_target=60), 'clinic'),
+        ('weighted', AdmissionController(args.capacity, latency_target=1.0, service_estimate=service,
+                                         clients={'clinic': {'weight': 4}}), 'partner'),
+        ('weighted+cap', AdmissionController(args.capacity, latency_target=1.0, service_estimate=service,
+                                             clients={'clinic': {'weight': 4},
+                                                      'partner': {'concurrency': max(1, args.capacity // 2)}}),
+         'partner'),
+    )
+    for label, controller, batch_name in scenarios:
+        waits, shed, done, batch_shed = run(controller, args.seconds, service, args.batch_threads, 0.05,
+                                            batch_name)
+        print(f"   {label:<13} interactive wait p50 {percentile(waits, 50) * 1000:8.1f} ms "
+              f"p99 {percentile(waits, 99) * 1000:8.1f} ms, {shed} shed | batch {done} done, {batch_shed} shed")
+
+
+if __name__ == '__main__':
+    main()
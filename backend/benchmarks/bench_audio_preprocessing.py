@@ -0,0 +1,79 @@
+"""
+Audio Preprocessing Benchmark
+Measures bytes on the wire and processing time for the WAV preprocessing stage.
+
+Usage:
+    python backend/benchmarks/bench_audio_preprocessing.py [recording.wav ...]
+
+Without arguments a synthetic call-center style recording is generated
+(stereo 44.1 kHz, speech-like bursts between long silent stretches).
+The MP3 samples in tests/conversations can be benchmarked after converting
+them, e.g. `ffmpeg -i CAR0001.mp3 -ac 2 -ar 44100 CAR0001.wav`.
+"""
+import io
+import os
+import sys
+import time
+import wave
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from backend.services.audio_preprocessing import preprocess_audio
+
+
+def synthetic_call(seconds=300, rate=44100, lead_silence=20, tail_silence=30):
+    """Builds a stereo WAV with amplitude-modulated tones as stand-in speech."""
+    rng = np.random.default_rng(42)
+    t = np.arange(int(seconds * rate)) / rate
+    speech = np.zeros_like(t)
+    cursor = lead_silence
+    while cursor < seconds - tail_silence:
+        burst = rng.uniform(1.5, 6.0)
+        mask = (t >= cursor) & (t < min(cursor + burst, seconds - tail_silence))
+        pitch = rng.uniform(110, 240)
+        speech[mask] = 0.25 * np.sin(2 * np.pi * pitch * t[mask]) * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t[mask]))
+        cursor += burst + rng.uniform(0.3, 1.5)
+    noise = rng.normal(0, 0.001, size=(len(t), 2))
+    stereo = np.stack([speech, 0.8 * speech], axis=1) + noise
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as writer:
+        writer.setnchannels(2)
+        writer.setsampwidth(2)
+        writer.setframerate(rate)
+        writer.writeframes((np.clip(stereo, -1, 1) * 32767).astype('<i2').tobytes())
+    buffer.seek(0)
+    return buffer
+
+
+def run(name, stream):
+    start = time.perf_counter()
+    output, report = preprocess_audio(stream)
+    elapsed = time.perf_counter() - start
+    output.close()
+
+    if report is None:
+        print(f"   {name}: not a PCM/WAV file, skipped")
+        return
+    print(f"   {name}")
+    print(f"      Size:     {report['original_bytes'] / 1e6:8.2f} MB -> {report['processed_bytes'] / 1e6:8.2f} MB "
+          f"({report['size_reduction']}x smaller)")
+    print(f"      Duration: {report['original_duration']:8.1f} s  -> {report['processed_duration']:8.1f} s")
+    print(f"      Time:     {elapsed * 1000:8.1f} ms "
+          f"({report['original_duration'] / elapsed:.0f}x real time)")
+
+
+def main(paths):
+    print("🎧 Audio preprocessing benchmark")
+    if not paths:
+        run("synthetic 5 min stereo 44.1 kHz call", synthetic_call())
+        return
+    for path in paths:
+        with open(path, 'rb') as f:
+            run(os.path.basename(path), f)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,190 @@
+"""
+Hot Path Microbenchmarks
+Times the CPU-bound parts of the /analyze request path on synthetic
+entity lists and compares them against stored baselines.
+
+Paths:
+    filter       - filter_active_entities (negation / family history)
+    dedup        - deduplicate_entities (Counter + first-occurrence map)
+    faers_plan   - plan_faers_pairs (drug x symptom ranking within the call budget)
+    risk_engine  - RiskEngine.calculate_risk
+    ml_predict   - MLPredictionService.predict_risk (skipped if model missing)
+
+Usage:
+    python backend/benchmarks/bench_hot_paths.py                   # run and print
+    python backend/benchmarks/bench_hot_paths.py --save-baseline   # record baselines
+    python backend/benchmarks/bench_hot_paths.py --check           # exit 1 on regression
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+import warnings
+
+# The model was fitted on a DataFrame; predicting on arrays warns every call
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from backend.logic.entity_processing import filter_active_entities, deduplicate_entities, plan_faers_pairs
+from backend.logic.risk_engine import RiskEngine
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baselines.json')
+# The /analyze default (FAERS_PAIR_BUDGET)
+FAERS_PAIR_BUDGET = 40
+
+ENTITY_SCALES = [10, 100, 1000, 10000]
+DRUG_SCALES = [1, 10, 100]
+QUICK_SCALES = [(10, 1), (100, 10), (1000, 10)]
+
+DRUG_NAMES = ["aspirin", "lisinopril", "metformin", "atorvastatin", "amlodipine",
+              "omeprazole", "warfarin", "ibuprofen", "sertraline", "insulin"]
+SYMPTOM_NAMES = ["chest pain", "shortness of breath", "rash", "dizziness", "nausea",
+                 "headache", "fatigue", "back pain", "cough", "swelling", "insomnia"]
+
+
+def make_entities(n_entities, n_drugs, seed=42):
+    """
+    Synthetic Comprehend Medical output: n_drugs distinct medications plus
+    conditions, with repeats (~3 mentions per distinct text) and ~10% negated
+    / ~5% family-history traits, roughly matching long transcripts.
+    """
+    rng = random.Random(seed)
+    drugs = [f"{DRUG_NAMES[i % len(DRUG_NAMES)]}{'' if i < len(DRUG_NAMES) else i}" for i in range(n_drugs)]
+    n_conditions = max(1, n_entities // 3 - n_drugs)
+    conditions = [f"{SYMPTOM_NAMES[i % len(SYMPTOM_NAMES)]}{'' if i < len(SYMPTOM_NAMES) else i}"
+                  for i in range(n_conditions)]
+
+    entities = []
+    for i in range(n_entities):
+        if i < n_drugs or rng.random() < 0.3:
+            text, category = rng.choice(drugs), 'MEDICATION'
+        else:
+            text, category = rng.choice(conditions), 'MEDICAL_CONDITION'
+        traits = []
+        roll = rng.random()
+        if roll < 0.10:
+            traits.append({'Name': 'NEGATION', 'Score': 0.9})
+        elif roll < 0.15:
+            traits.append({'Name': 'PERTAINS_TO_FAMILY', 'Score': 0.85})
+        entities.append({
+            'Text': text.title() if rng.random() < 0.5 else text,
+            'Category': category,
+            'Type': 'GENERIC_NAME' if category == 'MEDICATION' else 'DX_NAME',
+            'Score': rng.uniform(0.7, 1.0),
+            'Traits': traits
+        })
+    return entities
+
+
+def measure(fn):
+    """Returns (seconds per call, peak bytes allocated by one call)."""
+    timer = timeit.Timer(fn)
+    # autorange picks a loop count that takes >= 0.2s; best of 3 damps noise
+    number, _ = timer.autorange()
+    per_call = min(timer.repeat(repeat=3, number=number)) / number
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return per_call, peak
+
+
+def load_ml_service():
+    try:
+        from backend.ml_service import MLPredictionService
+        service = MLPredictionService()
+        return service if service.available else None
+    except Exception as e:
+        print(f"⚠️  ML service unavailable, skipping ml_predict: {e}")
+        return None
+
+
+def run(scales):
+    engine = RiskEngine()
+    ml_service = load_ml_service()
+    faers = {'total_reports': 750}
+    results = {}
+
+    for n_entities, n_drugs in scales:
+        raw = make_entities(n_entities, n_drugs)
+        active = filter_active_entities(raw)
+        unique = deduplicate_entities(active)
+
+        paths = {
+            'filter': lambda: filter_active_entities(raw),
+            'dedup': lambda: deduplicate_entities(active),
+            'faers_plan': lambda: plan_faers_pairs(unique, FAERS_PAIR_BUDGET, symptom_tier=engine.symptom_tier),
+            'risk_engine': lambda: engine.calculate_risk(unique, faers),
+        }
+        if ml_service:
+            paths['ml_predict'] = lambda: ml_service.predict_risk(unique, faers)
+
+        for name, fn in paths.items():
+            key = f"{name}[entities={n_entities},drugs={n_drugs}]"
+            seconds, peak = measure(fn)
+            results[key] = {"time_us": round(seconds * 1e6, 2), "alloc_bytes": peak}
+            print(f"   {key:<45} {seconds * 1e6:12.2f} µs {peak / 1024:10.1f} KiB")
+    return results
+
+
+def check(results, baselines, threshold):
+    """Returns the keys whose time or allocation regressed beyond threshold."""
+    regressions = []
+    for key, current in results.items():
+        base = baselines.get(key)
+        if not base:
+            continue
+        for metric in ('time_us', 'alloc_bytes'):
+            if base[metric] and current[metric] > base[metric] * (1 + threshold):
+                change = current[metric] / base[metric] - 1
+                regressions.append(f"{key} {metric}: {base[metric]} -> {current[metric]} (+{change:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hot path microbenchmarks")
+    parser.add_argument('--quick', action='store_true', help='Run a small subset of scales')
+    parser.add_argument('--save-baseline', action='store_true', help=f'Write results to {BASELINE_PATH}')
+    parser.add_argument('--check', action='store_true', help='Fail if results regress past the baseline')
+    parser.add_argument('--threshold', type=float, default=0.5,
+                        help='Allowed regression as a fraction (default 0.5 = 50%%, timings are noisy on shared CI)')
+    args = parser.parse_args()
+
+    scales = QUICK_SCALES if args.quick else [
+        (n, d) for n in ENTITY_SCALES for d in DRUG_SCALES if d <= n
+    ]
+    print("⏱️  Hot path microbenchmarks (time per call, peak allocation)")
+    results = run(scales)
+
+    if args.save_baseline:
+        baselines = {}
+        if os.path.exists(BASELINE_PATH):
+            with open(BASELINE_PATH) as f:
+                baselines = json.load(f)
+        baselines.update(results)
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"\n💾 Saved {len(results)} baselines to {BASELINE_PATH}")
+
+    if args.check:
+        if not os.path.exists(BASELINE_PATH):
+            print("\n⚠️  No baselines found; run with --save-baseline first")
+            return 1
+        with open(BASELINE_PATH) as f:
+            regressions = check(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) above {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"   {line}")
+            return 1
+        print(f"\n✅ No regressions above {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
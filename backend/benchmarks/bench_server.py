@@ -0,0 +1,146 @@
+"""
+Server Worker Model Benchmark
+Starts gunicorn (backend/gunicorn.conf.py) on the stub-upstream app
+(benchmarks/stub_app.py) with each worker model and drives /analyze at
+several client concurrencies, reporting throughput and latency percentiles.
+
+Worker models:
+    sync     - one request per process (the pre-gunicorn.conf.py default)
+    gthread  - GUNICORN_THREADS threads per process
+    gevent   - cooperative greenlets (skipped if gevent is not installed)
+
+Usage:
+    python backend/benchmarks/bench_server.py
+    python backend/benchmarks/bench_server.py --workers 2 --concurrency 8,32,64 --requests 200
+"""
+import argparse
+import importlib.util
+import io
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def make_wav(seconds=1, rate=16000):
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(b'\x00\x00' * rate * seconds)
+    return buffer.getvalue()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(worker_class, workers, threads, port, db_path, app='benchmarks.stub_app:app', env=None):
+    env = dict(os.environ, **(env or {}),
+               GUNICORN_BIND=f'127.0.0.1:{port}',
+               GUNICORN_WORKER_CLASS=worker_class,
+               GUNICORN_WORKERS=str(workers),
+               GUNICORN_THREADS=str(threads),
+               ANALYSIS_DB_PATH=db_path)
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', app],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn ({worker_class}) exited with {process.returncode}")
+        try:
+            if requests.get(f'http://127.0.0.1:{port}/health', timeout=1).ok:
+                return process
+        except requests.RequestException:
+            pass
+        time.sleep(0.25)
+    process.kill()
+    raise RuntimeError(f"gunicorn ({worker_class}) did not become healthy")
+
+
+def stop_server(process):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def drive(url, audio, concurrency, total):
+    """Sends `total` requests from `concurrency` clients; returns (seconds, latencies, errors)."""
+    def one(_):
+        start = time.perf_counter()
+        try:
+            response = requests.post(url, files={'audio': ('call.wav', audio, 'audio/wav')}, timeout=300)
+            ok = response.status_code == 200
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(one, range(total)))
+    elapsed = time.perf_counter() - start
+    latencies = sorted(latency for latency, ok in results if ok)
+    return elapsed, latencies, sum(1 for _, ok in results if not ok)
+
+
+def percentile(values, pct):
+    if not values:
+        return float('nan')
+    return values[min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare gunicorn worker models on stub upstreams")
+    parser.add_argument('--workers', type=int, default=2, help='Worker processes per model')
+    parser.add_argument('--threads', type=int, default=32, help='Threads per gthread worker')
+    parser.add_argument('--concurrency', default='8,32,64', help='Comma-separated client concurrencies')
+    parser.add_argument('--requests', type=int, default=100, help='Requests per concurrency level')
+    parser.add_argument('--models', default='sync,gthread,gevent', help='Worker models to compare')
+    args = parser.parse_args()
+
+    models = [m for m in args.models.split(',') if m]
+    if 'gevent' in models and importlib.util.find_spec('gevent') is None:
+        print("⚠️  gevent is not installed, skipping the gevent worker model")
+        models.remove('gevent')
+
+    audio = make_wav()
+    concurrencies = [int(c) for c in args.concurrency.split(',')]
+    print(f"🚀 /analyze on stub upstreams, {args.workers} workers, {args.requests} requests per level")
+    print(f"   {'model':<10} {'clients':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for model in models:
+            port = free_port()
+            process = start_server(model, args.workers, args.threads, port,
+                                   os.path.join(tmpdir, f'{model}.db'))
+            try:
+                url = f'http://127.0.0.1:{port}/analyze'
+                drive(url, audio, concurrency=args.workers, total=args.workers * 2)  # warm-up
+                for concurrency in concurrencies:
+                    elapsed, latencies, errors = drive(url, audio, concurrency, args.requests)
+                    print(f"   {model:<10} {concurrency:>7} {len(latencies) / elapsed:>8.1f} "
+                          f"{percentile(latencies, 50) * 1000:>8.0f} {percentile(latencies, 95) * 1000:>8.0f} "
+                          f"{percentile(latencies, 99) * 1000:>8.0f} {errors:>6}")
+            finally:
+                stop_server(process)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
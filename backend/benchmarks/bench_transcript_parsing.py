@@ -0,0 +1,112 @@
+"""
+Transcript Parsing Benchmark
+Compares the two ways of getting the transcript and utterances out of a
+Deepgram /v1/listen response: the SDK's typed response (DEEPGRAM_RAW_JSON=0)
+and the selective raw-JSON parser (DEEPGRAM_RAW_JSON=1), by parse time and
+peak memory.
+
+Usage:
+    python backend/benchmarks/bench_transcript_parsing.py [response.json ...]
+
+Without arguments a synthetic one-hour, two-speaker response is generated
+(word timings, utterances and paragraphs, as requested by the service).
+"""
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from deepgram.core.pydantic_utilities import parse_obj_as
+from deepgram.types.listen_v1response import ListenV1Response
+
+from backend.services.transcript_parsing import listen_response_fields, parse_listen_response
+
+VOCABULARY = ("i have had chest pain since starting lisinopril and some nausea in the mornings "
+              "how long has that been going on do you take anything else for it").split()
+
+
+def synthetic_response(minutes=60, seed=42):
+    """A /v1/listen response body for a diarized call of the given length, ~170 words a minute."""
+    rng = random.Random(seed)
+    words, utterances = [], []
+    now = 0.0
+    while now < minutes * 60:
+        speaker = len(utterances) % 2
+        spoken = []
+        for _ in range(rng.randint(4, 30)):
+            duration = rng.uniform(0.15, 0.55)
+            word = rng.choice(VOCABULARY)
+            spoken.append({"word": word, "start": round(now, 3), "end": round(now + duration, 3),
+                           "confidence": round(rng.uniform(0.6, 1.0), 4), "speaker": speaker,
+                           "speaker_confidence": round(rng.uniform(0.5, 1.0), 4), "punctuated_word": word})
+            now += duration
+        spoken[-1]['punctuated_word'] += '.'
+        words.extend(spoken)
+        utterances.append({"start": spoken[0]['start'], "end": spoken[-1]['end'], "confidence": 0.95,
+                           "channel": 0, "transcript": ' '.join(w['punctuated_word'] for w in spoken),
+                           "words": spoken, "speaker": speaker, "id": f"utt-{len(utterances)}"})
+        now += rng.uniform(0.2, 1.0)
+    paragraphs = [{"sentences": [{"text": u['transcript'], "start": u['start'], "end": u['end']}],
+                   "speaker": u['speaker'], "num_words": len(u['words']), "start": u['start'], "end": u['end']}
+                  for u in utterances]
+    transcript = ' '.join(u['transcript'] for u in utterances)
+    return json.dumps({
+        "metadata": {"transaction_key": "deprecated", "request_id": "bench", "sha256": "0" * 64,
+                     "created": "2024-01-01T00:00:00.000Z", "duration": now, "channels": 1,
+                     "models": ["nova-2"], "model_info": {"nova-2": {"name": "general-nova", "version": "2",
+                                                                     "arch": "nova-2"}}},
+        "results": {
+            "channels": [{"alternatives": [{"transcript": transcript, "confidence": 0.99, "words": words,
+                                            "paragraphs": {"transcript": transcript, "paragraphs": paragraphs}}]}],
+            "utterances": utterances
+        }
+    }).encode('utf-8'), len(words)
+
+
+def sdk_fields(raw):
+    # What the SDK does with a 2xx body: stdlib JSON, then the typed model
+    return listen_response_fields(parse_obj_as(type_=ListenV1Response, object_=json.loads(raw)))
+
+
+def measure(fn, raw, repeat=3):
+    """Returns (best seconds per call, peak bytes allocated by one call)."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(raw)
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn(raw)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(times), peak
+
+
+def run(name, raw, words=None):
+    if sdk_fields(raw) != parse_listen_response(raw):
+        print(f"   {name}: ❌ parsers disagree")
+        return
+    print(f"   {name}: {len(raw) / 1e6:.1f} MB" + (f", {words} words" if words else ""))
+    for label, fn in (('sdk typed', sdk_fields), ('raw + words', lambda r: parse_listen_response(r, True)),
+                      ('raw selective', parse_listen_response)):
+        seconds, peak = measure(fn, raw)
+        print(f"      {label:<14} {seconds * 1000:9.1f} ms {peak / 1e6:9.1f} MB peak")
+
+
+def main(paths):
+    print("📝 Deepgram response parsing benchmark")
+    if not paths:
+        raw, words = synthetic_response()
+        run("synthetic 60 min two-speaker call", raw, words)
+        return
+    for path in paths:
+        with open(path, 'rb') as f:
+            run(os.path.basename(path), f.read())
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,98 @@
+"""
+The real Flask app with its upstreams replaced by stubs serving a captured
+trace (services/traffic_capture.py): each request's recorded transcript,
+Comprehend Medical entities and openFDA counts, after their recorded
+latencies. Caching, circuit breakers, scheduling, deadlines, entity
+processing, the risk engine, ML, persistence and serialization run for real.
+
+Requests name their trace record in the X-Replay-Id header (its index in
+load_trace order); benchmarks/replay_traffic.py sends it.
+
+    cd backend && REPLAY_TRACE=data/traffic gunicorn -c gunicorn.conf.py benchmarks.replay_app:app
+
+Configuration:
+    REPLAY_TRACE           Trace files or directories, os.pathsep-separated (required)
+    REPLAY_LATENCY_SCALE   Multiplies recorded upstream latencies (default 1.0)
+"""
+import copy
+import os
+import statistics
+import time
+
+from flask import request
+
+import app as backend_app
+from services.safety_service import SafetyService
+from services.traffic_capture import load_trace, text_key
+
+LATENCY_SCALE = float(os.getenv('REPLAY_LATENCY_SCALE', 1.0))
+
+RECORDS = load_trace([path for path in os.environ['REPLAY_TRACE'].split(os.pathsep) if path])
+
+# Comprehend responses by masked input text; openFDA counts and latencies by query
+COMPREHEND = {}
+OPENFDA = {}
+for record in RECORDS:
+    for call in record.get('comprehend', []):
+        COMPREHEND[call['key']] = call
+    for call in record.get('openfda', []):
+        query = SafetyService.pair_query(call['drug'], call['symptom'])
+        entry = OPENFDA.setdefault(query, {'count': call['count'], 'error': call['error'], 'ms': []})
+        if call['ms'] is not None:
+            entry['ms'].append(call['ms'])
+
+
+def _median(values, default):
+    return statistics.median(values) if values else default
+
+
+# Latency for calls the capture never timed (e.g. pairs served from its cache)
+COMPREHEND_MS = _median([call['ms'] for call in COMPREHEND.values()], 0.0)
+OPENFDA_MS = _median([ms for entry in OPENFDA.values() for ms in entry['ms']], 0.0)
+
+
+def _sleep(ms):
+    time.sleep(ms * LATENCY_SCALE / 1000)
+
+
+class ReplayTranscriptionService:
+    def transcribe(self, audio):
+        audio.read()
+        record = RECORDS[int(request.headers['X-Replay-Id'])]
+        deepgram = record.get('deepgram')
+        if deepgram is None:
+            raise Exception("Transcription failed in the captured request")
+        _sleep(deepgram['ms'])
+        return {'transcript': deepgram['transcript'], 'utterances': copy.deepcopy(deepgram['utterances'])}
+
+
+class ReplayComprehendClient:
+    def detect_entities_v2(self, Text):
+        call = COMPREHEND.get(text_key(Text))
+        if call is None:
+            _sleep(COMPREHEND_MS)
+            return {'Entities': []}
+        _sleep(call['ms'])
+        if call['error']:
+            raise RuntimeError(f"replayed Comprehend Medical error: {call['error']}")
+        return {'Entities': copy.deepcopy(call['entities'])}
+
+
+def replay_openfda_get(params):
+    entry = OPENFDA.get(params['search'])
+    if entry is None:
+        _sleep(OPENFDA_MS)
+        return {}
+    _sleep(entry['ms'][0] if entry['ms'] else OPENFDA_MS)
+    if entry['error']:
+        raise RuntimeError(f"replayed openFDA error: {entry['error']}")
+    return {"meta": {"results": {"total": entry['count']}}}
+
+
+backend_app.transcription_service = ReplayTranscriptionService()
+if backend_app.nlp_service is None:
+    raise RuntimeError("MedicalNLPService failed to initialize; its client cannot be replaced")
+backend_app.nlp_service.client = ReplayComprehendClient()
+backend_app.safety_service._get = replay_openfda_get
+
+app = backend_app.app
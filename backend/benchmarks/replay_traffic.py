@@ -0,0 +1,144 @@
+"""
+Traffic Replay
+Re-drives /analyze with a captured production trace (TRAFFIC_CAPTURE=1,
+see services/traffic_capture.py): requests are sent on the recorded
+arrival schedule, compressed by --speedup, with the recorded upload sizes
+and form fields. Upstreams are stubbed by benchmarks/replay_app.py, which
+serves each request's recorded responses with the recorded latencies, so
+runs are repeatable and compare cache, concurrency and scheduling changes
+against real workload shapes.
+
+Usage:
+    python backend/benchmarks/replay_traffic.py backend/data/traffic
+    python backend/benchmarks/replay_traffic.py trace.jsonl.gz --speedup 20 --workers 2 --threads 32
+    python backend/benchmarks/replay_traffic.py trace.jsonl.gz --url http://127.0.0.1:5000
+        (a server already running benchmarks.replay_app:app on the same trace)
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from bench_server import BACKEND_DIR, free_port, percentile, start_server, stop_server
+
+sys.path.insert(0, BACKEND_DIR)
+from services.traffic_capture import load_trace  # noqa: E402
+
+# Uploads are zero bytes of the recorded size, capped to keep replay cheap
+MAX_REPLAY_UPLOAD = 8 * 1024 * 1024
+
+
+def send(base_url, index, record):
+    """Replays one request; returns (latency seconds, status, priority level, degraded)."""
+    form = record.get('form', {})
+    params = {key: form[key] for key in ('fields', 'exclude') if key in form}
+    data = {key: str(value) for key, value in form.items() if key not in params}
+    audio = bytes(min(record.get('audio_bytes') or 1, MAX_REPLAY_UPLOAD))
+    start = time.perf_counter()
+    try:
+        response = requests.post(f'{base_url}/analyze', params=params, data=data,
+                                 files={'audio': ('call.wav', audio, 'audio/wav')},
+                                 headers={'X-Replay-Id': str(index)}, timeout=600)
+        status = response.status_code
+        body = response.json() if status == 200 else {}
+    except (requests.RequestException, ValueError):
+        status, body = 'error', {}
+    latency = time.perf_counter() - start
+    return latency, status, (body.get('priority') or {}).get('level', 'unknown'), bool(body.get('degraded'))
+
+
+def replay(base_url, records, speedup, max_inflight):
+    """Sends records on their recorded schedule / speedup; returns (seconds, results, max lag)."""
+    first = records[0]['ts']
+    results = [None] * len(records)
+    max_lag = 0.0
+
+    def run(index):
+        results[index] = send(base_url, index, records[index])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_inflight) as executor:
+        for index, record in enumerate(records):
+            due = start + (record['ts'] - first) / speedup
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                max_lag = max(max_lag, -delay)
+            executor.submit(run, index)
+    return time.perf_counter() - start, results, max_lag
+
+
+def latency_row(label, latencies):
+    latencies = sorted(latencies)
+    return (f"   {label:<12} {len(latencies):>6} {percentile(latencies, 50) * 1000:>8.0f} "
+            f"{percentile(latencies, 95) * 1000:>8.0f} {percentile(latencies, 99) * 1000:>8.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured /analyze traffic against stubbed upstreams")
+    parser.add_argument('trace', nargs='+', help='Trace files or directories')
+    parser.add_argument('--speedup', type=float, default=1.0, help='Compress inter-arrival times by this factor')
+    parser.add_argument('--latency-scale', type=float, default=1.0, help='Multiply recorded upstream latencies')
+    parser.add_argument('--limit', type=int, default=None, help='Replay only the first N requests')
+    parser.add_argument('--max-inflight', type=int, default=256, help='Client-side cap on open requests')
+    parser.add_argument('--url', default=None, help='Use a running replay server instead of starting one')
+    parser.add_argument('--worker-class', default='gthread', help='Gunicorn worker class')
+    parser.add_argument('--workers', type=int, default=2, help='Gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=32, help='Threads per gthread worker')
+    args = parser.parse_args()
+
+    paths = [os.path.abspath(path) for path in args.trace]
+    records = load_trace(paths)
+    if args.limit:
+        records = records[:args.limit]
+    if not records:
+        print("❌ No captured requests found")
+        return 1
+
+    span = records[-1]['ts'] - records[0]['ts']
+    print(f"🚀 Replaying {len(records)} requests captured over {span:.0f}s at {args.speedup:g}x "
+          f"(upstream latency x{args.latency_scale:g})")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        process = None
+        base_url = args.url
+        if base_url is None:
+            port = free_port()
+            process = start_server(args.worker_class, args.workers, args.threads, port,
+                                   os.path.join(tmpdir, 'replay.db'), app='benchmarks.replay_app:app',
+                                   env={'REPLAY_TRACE': os.pathsep.join(paths),
+                                        'REPLAY_LATENCY_SCALE': str(args.latency_scale)})
+            base_url = f'http://127.0.0.1:{port}'
+        try:
+            elapsed, results, max_lag = replay(base_url.rstrip('/'), records, args.speedup, args.max_inflight)
+        finally:
+            if process:
+                stop_server(process)
+
+    statuses = Counter(status for _, status, _, _ in results)
+    by_priority = defaultdict(list)
+    for latency, status, level, _ in results:
+        if status == 200:
+            by_priority[level].append(latency)
+    replayed = [latency for latency, status, _, _ in results if status == 200]
+    recorded = [record['latency_ms'] / 1000 for record in records if record.get('status') == 200]
+
+    print(f"✅ {len(results)} requests in {elapsed:.1f}s ({len(results) / elapsed:.1f} req/s), "
+          f"max send lag {max_lag * 1000:.0f} ms")
+    print(f"   status: {dict(statuses)}, degraded: {sum(1 for *_, degraded in results if degraded)}")
+    print(f"   {'':<12} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    print(latency_row('recorded', recorded))
+    print(latency_row('replayed', replayed))
+    for level in sorted(by_priority):
+        print(latency_row(level, by_priority[level]))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
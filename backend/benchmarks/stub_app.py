@@ -0,0 +1,74 @@
+"""
+The real Flask app with its upstreams replaced by local stubs, for
+benchmarking server/worker configurations without network access.
+
+Deepgram, Comprehend Medical and openFDA become sleeps of a fixed
+latency; entity processing, the risk engine, ML prediction, persistence
+and serialization run for real.
+
+    cd backend && gunicorn -c gunicorn.conf.py benchmarks.stub_app:app
+
+Configuration:
+    STUB_DEEPGRAM_MS      Transcription latency (default 300)
+    STUB_COMPREHEND_MS    NLP latency (default 150)
+    STUB_OPENFDA_MS       Latency per FAERS pair query (default 80)
+"""
+import copy
+import os
+import time
+import zlib
+
+import app as backend_app
+from services.safety_service import PAIR_FROM_OPENFDA
+
+DEEPGRAM_SECONDS = float(os.getenv('STUB_DEEPGRAM_MS', 300)) / 1000
+COMPREHEND_SECONDS = float(os.getenv('STUB_COMPREHEND_MS', 150)) / 1000
+OPENFDA_SECONDS = float(os.getenv('STUB_OPENFDA_MS', 80)) / 1000
+
+TRANSCRIPT = (
+    "Doctor: What brings you in today? Patient: I've had chest pain and shortness of breath "
+    "since starting lisinopril. I also take metformin, atorvastatin and aspirin, and sometimes "
+    "ibuprofen for back pain. I get dizziness in the mornings and some nausea."
+)
+
+DRUGS = ['lisinopril', 'metformin', 'atorvastatin', 'aspirin', 'ibuprofen']
+CONDITIONS = ['chest pain', 'shortness of breath', 'back pain', 'dizziness', 'nausea']
+
+ENTITIES = (
+    [{'Text': drug, 'Category': 'MEDICATION', 'Type': 'GENERIC_NAME', 'Score': 0.95, 'Traits': []}
+     for drug in DRUGS] +
+    [{'Text': condition, 'Category': 'MEDICAL_CONDITION', 'Type': 'DX_NAME', 'Score': 0.9,
+      'Traits': [{'Name': 'SYMPTOM', 'Score': 0.85}]}
+     for condition in CONDITIONS]
+)
+
+
+class StubTranscriptionService:
+    def transcribe(self, audio):
+        audio.read()
+        time.sleep(DEEPGRAM_SECONDS)
+        return {'transcript': TRANSCRIPT, 'utterances': []}
+
+
+class StubNLPService:
+    def analyze_text(self, text):
+        time.sleep(COMPREHEND_SECONDS)
+        return copy.deepcopy(ENTITIES)
+
+
+def stub_fetch_pair_count(drug_name, symptom_name):
+    time.sleep(OPENFDA_SECONDS)
+    return zlib.crc32(f"{drug_name}|{symptom_name}".encode()) % 500, PAIR_FROM_OPENFDA
+
+
+def stub_fetch_drug_profile(drug_name, limit=5):
+    time.sleep(OPENFDA_SECONDS)
+    return [{'term': condition.upper(), 'count': 1000 - 100 * i} for i, condition in enumerate(CONDITIONS[:limit])]
+
+
+backend_app.transcription_service = StubTranscriptionService()
+backend_app.nlp_service = StubNLPService()
+backend_app.safety_service.fetch_pair_count = stub_fetch_pair_count
+backend_app.safety_service.fetch_drug_profile = stub_fetch_drug_profile
+
+app = backend_app.app
@@ -0,0 +1,80 @@
+"""
+Gunicorn configuration for production.
+
+    cd backend && gunicorn -c gunicorn.conf.py app:app
+
+An /analyze request spends nearly all of its time waiting on Deepgram,
+Comprehend Medical and openFDA, so workers are threaded (gthread) or
+cooperative (gevent) and sized for I/O wait rather than CPU count. The app
+(ML models included) is loaded once in the master and shared copy-on-write
+by the forked workers, which are recycled gracefully after a bounded
+number of requests.
+
+Configuration:
+    GUNICORN_BIND                   Listen address (default 0.0.0.0:$PORT, PORT=5000)
+    GUNICORN_WORKER_CLASS           gthread (default) | gevent | sync
+    GUNICORN_WORKERS                Worker processes (default: CPU count, max 4)
+    GUNICORN_THREADS                Threads per gthread worker (default 32)
+    GUNICORN_WORKER_CONNECTIONS     Concurrent requests per gevent worker (default 200)
+    GUNICORN_TIMEOUT                Hard per-request limit (default: ANALYZE_MAX_DEADLINE_SECONDS + 30s)
+    GUNICORN_GRACEFUL_TIMEOUT       Time to finish in-flight requests on recycle/shutdown (default 60)
+    GUNICORN_MAX_REQUESTS           Recycle a worker after this many requests (default 1000, 0 = never)
+    GUNICORN_MAX_REQUESTS_JITTER    Random spread so workers do not recycle together (default 100)
+    GUNICORN_PRELOAD                1 (default) | 0
+"""
+import multiprocessing
+import os
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _env_int(name, default):
+    try:
+        return int(float(os.getenv(name, default)))
+    except (TypeError, ValueError):
+        return int(default)
+
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+
+if worker_class == 'gevent':
+    # Patch before the app (and boto3/requests/ssl) is preloaded, otherwise
+    # sockets and locks created at import time stay blocking
+    from gevent import monkey
+    monkey.patch_all()
+
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('PORT', '5000')}")
+workers = _env_int('GUNICORN_WORKERS', min(multiprocessing.cpu_count(), 4))
+threads = _env_int('GUNICORN_THREADS', 32) if worker_class == 'gthread' else 1
+worker_connections = _env_int('GUNICORN_WORKER_CONNECTIONS', 200)
+
+# /analyze answers within its deadline (degrading optional stages if it
+# must); anything running well past the longest allowed one is a stuck worker
+timeout = _env_int('GUNICORN_TIMEOUT', _env_int('ANALYZE_MAX_DEADLINE_SECONDS', 300) + 30)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 60)
+keepalive = 5
+
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', 100)
+
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') != '0'
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    # Threads started while preloading (history writer, trace exporter) do
+    # not survive fork; without preload the app is imported after this hook
+    app_module = sys.modules.get('app')
+    if app_module is not None:
+        app_module.after_fork()
+
+
+def worker_exit(server, worker):
+    app_module = sys.modules.get('app')
+    if app_module is not None:
+        app_module.before_exit()
@@ -0,0 +1,96 @@
+import heapq
+import math
+from collections import Counter
+
+def filter_active_entities(raw_entities):
+    """
+    Removes negated and family-history entities.
+    We only want to analyze active symptoms/medications for the patient.
+    """
+    active_entities = []
+    for entity in raw_entities:
+        traits = [t.get('Name') for t in entity.get('Traits', [])]
+        if 'NEGATION' in traits:
+            continue
+        if 'PERTAINS_TO_FAMILY' in traits:
+            continue
+        active_entities.append(entity)
+    return active_entities
+
+def deduplicate_entities(active_entities):
+    """
+    Counts frequencies and deduplicates entities.
+    We normalize by text lowercased to count, but keep original casing for display.
+    The first occurrence of each text is kept, with 'Frequency' set on it.
+    """
+    entity_counts = Counter([e['Text'].lower() for e in active_entities])
+
+    unique_entities_map = {}
+    for entity in active_entities:
+        text_lower = entity['Text'].lower()
+        if text_lower not in unique_entities_map:
+            entity['Frequency'] = entity_counts[text_lower]
+            unique_entities_map[text_lower] = entity
+
+    return list(unique_entities_map.values())
+
+def plan_faers_pairs(unique_entities, budget, symptom_tier=None, is_cached=None):
+    """
+    Orders drug x symptom pairs most informative first and caps the openFDA
+    calls one request may make.
+
+    Pairs rank by the symptom's tier (critical, moderate, other; see
+    RiskEngine.symptom_tier), then by the product of both entities'
+    Comprehend Score and log-scaled Frequency. Pairs are taken in that order
+    until the budget is spent; cached ones (in the FAERS cache or the pair
+    matrix) cost no call. Only those pairs are looked up in the cache, and
+    the rest are skipped, in entity order. A budget of 0 or less means no cap.
+
+    Returns:
+        tuple: (planned, skipped), each a list of
+               {"drug": str, "symptom": str, "tier": int, "value": float, "cached": bool}
+    """
+    symptom_tier = symptom_tier or (lambda text: 0)
+    is_cached = is_cached or (lambda drug, symptom: False)
+
+    def weight(entity):
+        return entity.get('Score', 1.0) * (1 + math.log(entity.get('Frequency', 1)))
+
+    symptoms = [(symptom_tier(e['Text']), weight(e), e['Text'])
+                for e in unique_entities if e.get('Category') == 'MEDICAL_CONDITION']
+    drugs = [(weight(e), e['Text']) for e in unique_entities if e.get('Category') == 'MEDICATION'] if symptoms else []
+    if not drugs:
+        return [], []
+
+    def pair(drug, symptom, tier, value):
+        return {"drug": drug, "symptom": symptom, "tier": tier, "value": value, "cached": False}
+
+    # Each symptom's pairs are already in rank order once drugs are sorted
+    # by weight, so a heap over the symptoms yields pairs lazily without
+    # building and sorting the whole cross product. Ties keep entity order.
+    ranked_drugs = sorted(range(len(drugs)), key=lambda i: -drugs[i][0])
+
+    def heap_entry(s, k):
+        tier, symptom_weight, _ = symptoms[s]
+        d = ranked_drugs[k]
+        return -tier, -round(drugs[d][0] * symptom_weight, 4), s, d, k
+
+    heap = [heap_entry(s, 0) for s in range(len(symptoms))]
+    heapq.heapify(heap)
+    planned, taken = [], set()
+    calls = 0
+    while heap and not 0 < budget <= calls:
+        neg_tier, neg_value, s, d, k = heapq.heappop(heap)
+        if k + 1 < len(ranked_drugs):
+            heapq.heappush(heap, heap_entry(s, k + 1))
+        entry = pair(drugs[d][1], symptoms[s][2], -neg_tier, -neg_value)
+        entry['cached'] = bool(is_cached(entry['drug'], entry['symptom']))
+        if not entry['cached']:
+            calls += 1
+        planned.append(entry)
+        taken.add((s, d))
+
+    skipped = [pair(drug, symptom, tier, round(drug_weight * symptom_weight, 4))
+               for s, (tier, symptom_weight, symptom) in enumerate(symptoms)
+               for d, (drug_weight, drug) in enumerate(drugs) if (s, d) not in taken]
+    return planned, skipped
@@ -0,0 +1,89 @@
+"""
+Lexicon for the local entity extractor (logic/local_entities.py): common
+outpatient medications and the conditions and symptoms patients report,
+covering every drug and symptom in the FAERS training data plus the lay
+phrasings heard on calls. Terms are lowercase; conditions also match
+their plural ('headaches', 'rashes').
+"""
+
+GENERIC_DRUGS = [
+    "acetaminophen", "albuterol", "alendronate", "allopurinol", "alprazolam", "amiodarone", "amitriptyline",
+    "amlodipine", "amoxicillin", "amoxicillin clavulanate", "apixaban", "aripiprazole", "aspirin", "atenolol",
+    "atorvastatin", "azithromycin", "baclofen", "benazepril", "bisoprolol", "budesonide", "bupropion",
+    "buspirone", "carvedilol", "cefdinir", "cephalexin", "cetirizine", "ciprofloxacin", "citalopram",
+    "clindamycin", "clonazepam", "clonidine", "clopidogrel", "cyclobenzaprine", "dabigatran", "dexamethasone",
+    "diazepam", "diclofenac", "digoxin", "diltiazem", "diphenhydramine", "doxycycline", "duloxetine",
+    "empagliflozin", "enalapril", "escitalopram", "esomeprazole", "estradiol", "ezetimibe", "famotidine",
+    "fentanyl", "fluoxetine", "fluticasone", "folic acid", "furosemide", "gabapentin", "glimepiride",
+    "glipizide", "hydralazine", "hydrochlorothiazide", "hydrocodone", "hydroxychloroquine", "hydroxyzine",
+    "ibuprofen", "insulin", "insulin glargine", "insulin lispro", "ipratropium", "isosorbide", "ketorolac",
+    "lamotrigine", "levetiracetam", "levofloxacin", "levothyroxine", "liraglutide", "lisinopril", "lithium",
+    "loratadine", "lorazepam", "losartan", "meloxicam", "metformin", "methocarbamol", "methotrexate",
+    "methylphenidate", "methylprednisolone", "metoclopramide", "metoprolol", "metronidazole", "mirtazapine",
+    "montelukast", "morphine", "naproxen", "nitrofurantoin", "nitroglycerin", "olanzapine", "omeprazole",
+    "ondansetron", "oxybutynin", "oxycodone", "pantoprazole", "paroxetine", "penicillin", "phentermine",
+    "pioglitazone", "potassium chloride", "pravastatin", "prednisone", "pregabalin", "promethazine",
+    "propranolol", "quetiapine", "ramipril", "ranitidine", "risperidone", "rivaroxaban", "rosuvastatin",
+    "semaglutide", "sertraline", "sildenafil", "simvastatin", "sitagliptin", "spironolactone",
+    "sulfamethoxazole", "tamsulosin", "topiramate", "tramadol", "trazodone", "valacyclovir", "valsartan",
+    "venlafaxine", "verapamil", "warfarin", "zolpidem"
+]
+
+# Brand name -> generic
+BRAND_DRUGS = {
+    "adderall": "amphetamine", "advil": "ibuprofen", "aleve": "naproxen", "ambien": "zolpidem",
+    "amoxil": "amoxicillin", "ativan": "lorazepam", "augmentin": "amoxicillin clavulanate",
+    "bayer": "aspirin", "benadryl": "diphenhydramine", "celebrex": "celecoxib", "cipro": "ciprofloxacin",
+    "claritin": "loratadine", "coreg": "carvedilol", "coumadin": "warfarin", "cozaar": "losartan",
+    "crestor": "rosuvastatin", "cymbalta": "duloxetine", "deltasone": "prednisone", "desyrel": "trazodone",
+    "diovan": "valsartan", "eliquis": "apixaban", "flexeril": "cyclobenzaprine", "flonase": "fluticasone",
+    "glucophage": "metformin", "humalog": "insulin lispro", "jardiance": "empagliflozin",
+    "januvia": "sitagliptin", "keflex": "cephalexin", "klonopin": "clonazepam", "lantus": "insulin glargine",
+    "lasix": "furosemide", "levaquin": "levofloxacin", "lexapro": "escitalopram", "lipitor": "atorvastatin",
+    "lopressor": "metoprolol", "lyrica": "pregabalin", "microzide": "hydrochlorothiazide",
+    "mobic": "meloxicam", "motrin": "ibuprofen", "nexium": "esomeprazole", "neurontin": "gabapentin",
+    "norco": "hydrocodone", "norvasc": "amlodipine", "ozempic": "semaglutide", "paxil": "paroxetine",
+    "pepcid": "famotidine", "percocet": "oxycodone", "plavix": "clopidogrel", "pradaxa": "dabigatran",
+    "prilosec": "omeprazole", "prinivil": "lisinopril", "proair": "albuterol", "protonix": "pantoprazole",
+    "prozac": "fluoxetine", "seroquel": "quetiapine", "singulair": "montelukast", "synthroid": "levothyroxine",
+    "tenormin": "atenolol", "toprol": "metoprolol", "tylenol": "acetaminophen", "ultram": "tramadol",
+    "valium": "diazepam", "ventolin": "albuterol", "viagra": "sildenafil", "vibramycin": "doxycycline",
+    "vicodin": "hydrocodone", "wellbutrin": "bupropion", "xanax": "alprazolam", "xarelto": "rivaroxaban",
+    "zestril": "lisinopril", "zithromax": "azithromycin", "zocor": "simvastatin", "zofran": "ondansetron",
+    "zoloft": "sertraline", "zyrtec": "cetirizine"
+}
+
+CONDITIONS = [
+    # FAERS preferred terms used by the ML model
+    "abdominal pain", "anaphylactic reaction", "anaphylaxis", "angioedema", "anxiety", "arthralgia",
+    "asthenia", "back pain", "bradycardia", "cardiac arrest", "cerebrovascular accident", "chest pain",
+    "convulsion", "cough", "deep vein thrombosis", "depression", "diarrhoea", "diarrhea", "dizziness",
+    "dyspnoea", "dyspnea", "fainting", "fatigue", "fever", "gastrointestinal haemorrhage",
+    "gastrointestinal bleeding", "headache", "heart attack", "hepatic failure", "hives", "hypertension",
+    "hypotension", "insomnia", "internal bleeding", "itching", "joint pain", "kidney failure", "liver failure",
+    "migraine", "muscle pain", "myalgia", "myocardial infarction", "nausea", "oedema", "edema",
+    "palpitations", "pancreatitis", "pruritus", "pulmonary embolism", "pyrexia", "rash", "renal failure",
+    "respiratory failure", "rhabdomyolysis", "seizure", "sepsis", "shortness of breath",
+    "stevens-johnson syndrome", "stroke", "suicidal ideation", "suicidal thoughts", "swelling", "syncope",
+    "tachycardia", "tremor", "urticaria", "vertigo", "vomiting", "weakness",
+    # Critical presentations (see RiskEngine.CRITICAL_SYMPTOMS)
+    "difficulty breathing", "trouble breathing", "severe bleeding", "loss of consciousness",
+    "passed out", "blacked out", "coughing up blood", "vomiting blood", "blood in stool", "black stool",
+    "slurred speech", "facial droop", "throat swelling", "tongue swelling", "chest tightness",
+    "chest pressure", "irregular heartbeat", "racing heart", "heart racing",
+    # Common lay complaints
+    "acid reflux", "allergic reaction", "blurred vision", "blurry vision", "bleeding", "bloating",
+    "bruising", "burning sensation", "chills", "confusion", "constipation", "cramps", "cramping",
+    "dark urine", "dehydration", "double vision", "drowsiness", "dry mouth", "ear pain", "fast heartbeat",
+    "heartburn", "high blood pressure", "high blood sugar", "indigestion", "infection", "jaundice",
+    "leg pain", "leg swelling", "light headed", "lightheaded", "lightheadedness", "loss of appetite",
+    "low blood pressure", "low blood sugar", "memory loss", "muscle cramps", "muscle weakness",
+    "neck pain", "night sweats", "nosebleed", "numbness", "pain", "panic attack", "runny nose",
+    "shaking", "short of breath", "sinus congestion", "sleepiness", "sore throat", "stomach ache",
+    "stomach pain", "stomach upset", "sweating", "swollen ankles", "swollen feet", "tingling",
+    "tinnitus", "toothache", "upset stomach", "urinary retention", "weight gain", "weight loss",
+    "wheezing", "yellow skin",
+    # Chronic conditions
+    "arthritis", "asthma", "atrial fibrillation", "cancer", "copd", "diabetes", "heart failure",
+    "high cholesterol", "hypothyroidism", "kidney disease", "osteoporosis", "sleep apnea"
+]
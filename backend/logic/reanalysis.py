@@ -0,0 +1,171 @@
+"""
+Incremental re-analysis of a corrected encounter.
+
+A prior /analyze result already holds the entities found in every part of
+the transcript and the FAERS counts of every pair it checked. When a
+clinician edits the transcript (or the entity list), only the edited parts
+need NLP and only pairs the prior result never checked need openFDA; the
+rest is carried over from the prior result.
+
+Transcripts are compared in units: diarized utterances when both sides
+have them, sentences otherwise.
+"""
+import re
+from difflib import SequenceMatcher
+
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def _normalize(text):
+    return _WHITESPACE.sub(' ', text or '').strip()
+
+
+def split_units(transcript, utterances=None, speaker=None):
+    """
+    Splits a transcript into comparison units: the text of each utterance
+    (only the given speaker's, if one is given), or else its sentences.
+
+    Returns:
+        list: [{"speaker": id or None, "start": seconds or None, "text": str}]
+    """
+    if utterances:
+        return [{'speaker': u.get('speaker'), 'start': u.get('start'), 'text': _normalize(u.get('text'))}
+                for u in utterances
+                if _normalize(u.get('text')) and (speaker is None or u.get('speaker') == speaker)]
+    return [{'speaker': None, 'start': None, 'text': sentence}
+            for sentence in (_normalize(s) for s in _SENTENCE_BOUNDARY.split(transcript or ''))
+            if sentence]
+
+
+def changed_units(prior_units, units):
+    """Indices of units that do not appear, unchanged and in order, in prior_units."""
+    matcher = SequenceMatcher(None, [u['text'] for u in prior_units], [u['text'] for u in units],
+                              autojunk=False)
+    changed = []
+    for tag, _, _, j1, j2 in matcher.get_opcodes():
+        if tag != 'equal':
+            changed.extend(range(j1, j2))
+    return changed
+
+
+def build_unit_segments(units, max_chars=5000):
+    """
+    Groups units, in order, into NLP segments of at most max_chars, in the
+    shape MedicalNLPService.analyze_segments takes (see
+    speaker_attribution.build_speaker_segments). A segment mixing speakers
+    has speaker None.
+    """
+    segments = []
+    current = None
+    for unit in units:
+        text = unit['text']
+        if current is None or len(current['text']) + 1 + len(text) > max_chars:
+            current = {'speaker': unit.get('speaker'), 'text': '', 'offsets': []}
+            segments.append(current)
+        elif current['speaker'] != unit.get('speaker'):
+            current['speaker'] = None
+        if current['text']:
+            current['text'] += ' '
+        current['offsets'].append((len(current['text']), unit.get('start')))
+        current['text'] += text
+    return segments
+
+
+def reuse_entities(units, prior_entities):
+    """
+    Carries prior entities over to unchanged units: one active occurrence
+    per whole-word mention in those units, never more than the prior
+    Frequency (mentions the prior NLP found negated are not re-counted).
+
+    Returns:
+        list: entity occurrences, ready for deduplicate_entities
+    """
+    text = '\n'.join(unit['text'] for unit in units)
+    occurrences = []
+    for entity in prior_entities:
+        if not entity.get('Text'):
+            continue
+        pattern = r'(?<!\w)' + re.escape(entity['Text']) + r'(?!\w)'
+        mentions = len(re.findall(pattern, text, re.IGNORECASE))
+        count = min(mentions, entity.get('Frequency', 1))
+        occurrence = {key: value for key, value in entity.items() if key != 'Frequency'}
+        occurrences.extend(dict(occurrence) for _ in range(count))
+    return occurrences
+
+
+def known_pair_counts(prior):
+    """
+    FAERS report counts the prior result already settled, by lowercased
+    (drug, symptom). Pairs in its details carry their count; if its FAERS
+    check ran to completion, every other pair of its entities that was not
+    skipped had no reports. Results from before FAERS completeness was
+    reported are treated as complete.
+    """
+    faers = prior.get('faers_data') or {}
+    known = {(d['drug'].lower(), d['symptom'].lower()): d['reports'] for d in faers.get('details', [])}
+    if faers.get('complete', True) and 'openfda' not in prior.get('degraded_upstreams', []):
+        skipped = {(p['drug'].lower(), p['symptom'].lower()) for p in faers.get('skipped_pairs', [])}
+        entities = prior.get('entities', [])
+        drugs = [e['Text'].lower() for e in entities if e.get('Category') == 'MEDICATION']
+        symptoms = [e['Text'].lower() for e in entities if e.get('Category') == 'MEDICAL_CONDITION']
+        for drug in drugs:
+            for symptom in symptoms:
+                if (drug, symptom) not in skipped:
+                    known.setdefault((drug, symptom), 0)
+    return known
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def correct_entities(corrections, prior_entities):
+    """
+    Builds the entity set from a clinician's corrected list. Each entry
+    needs Text and Category; fields it leaves out (Score, Type, Traits)
+    come from the prior entity with the same text, if any. Frequency
+    defaults to the prior one, or 1. Repeated texts are merged.
+
+    Raises:
+        ValueError: if an entry is malformed (Text and Category must be
+        strings, Score a number, Traits a list of objects, Frequency a
+        positive integer)
+    """
+    prior_by_text = {e['Text'].lower(): e for e in prior_entities
+                     if isinstance(e, dict) and isinstance(e.get('Text'), str)}
+    merged = {}
+    for correction in corrections:
+        if not isinstance(correction, dict):
+            raise ValueError("Each entity must be an object")
+        text = correction.get('Text')
+        category = correction.get('Category')
+        if not isinstance(text, str) or not _normalize(text) or not isinstance(category, str) or not category:
+            raise ValueError("Each entity needs a Text and a Category")
+        text = _normalize(text)
+        prior = prior_by_text.get(text.lower(), {})
+        entity = {'Score': 1.0, 'Traits': [], 'Frequency': 1, **prior, **correction, 'Text': text}
+        if not _is_number(entity['Score']):
+            raise ValueError(f"Score for {text!r} must be a number")
+        if not isinstance(entity['Traits'], list) or not all(isinstance(t, dict) for t in entity['Traits']):
+            raise ValueError(f"Traits for {text!r} must be a list of objects")
+        if not isinstance(entity['Frequency'], int) or isinstance(entity['Frequency'], bool) \
+                or entity['Frequency'] < 1:
+            raise ValueError(f"Frequency for {text!r} must be a positive integer")
+        if text.lower() in merged:
+            merged[text.lower()]['Frequency'] += entity['Frequency']
+        else:
+            merged[text.lower()] = entity
+    return list(merged.values())
+
+
+def entity_changes(prior_entities, entities):
+    """Entities (Category, Text) added and removed relative to the prior result."""
+    def keys(items):
+        return {(e.get('Category'), e['Text'].lower()): e['Text'] for e in items if e.get('Text')}
+
+    before, after = keys(prior_entities), keys(entities)
+    return {
+        "added": [{"category": key[0], "text": after[key]} for key in after if key not in before],
+        "removed": [{"category": key[0], "text": before[key]} for key in before if key not in after]
+    }
@@ -1,3 +1,5 @@
+import numpy as np
+
 class RiskEngine:
     def __init__(self):
         self.CRITICAL_SYMPTOMS = [
@@ -116,3 +118,199 @@ class RiskEngine:
         else:
             return ("Low risk detected. Continue monitoring. "
                     "Adhere to prescribed dosage and report any new symptoms.")
+
+    def critical_mentions(self, transcript):
+        """
+        Cheap pre-scan of a raw transcript for critical symptoms, used to
+        prioritize the encounter before NLP has run. Negation is not
+        handled; a false positive only costs queue position.
+        """
+        text = (transcript or '').lower()
+        return [symptom for symptom in self.CRITICAL_SYMPTOMS if symptom in text]
+
+    def symptom_tier(self, text):
+        """2 = critical, 1 = moderate, 0 = other, for a single entity's text."""
+        return self._text_tier((text or '').lower())
+
+    def _text_tier(self, text):
+        """2 = critical, 1 = moderate, 0 = neither (same precedence as calculate_risk)."""
+        if any(crit in text for crit in self.CRITICAL_SYMPTOMS):
+            return 2
+        if any(mod in text for mod in self.MODERATE_SYMPTOMS):
+            return 1
+        return 0
+
+    def calculate_risk_batch(self, encounter_ids, texts, categories, frequencies=None,
+                             encounters=None, faers_totals=None, vocabulary=None):
+        """
+        Scores many encounters at once from columnar entity data.
+        Produces the same scores and levels as calling calculate_risk on each
+        encounter; detail lists and action plans are built lazily.
+
+        Args:
+            encounter_ids (array-like): Encounter id of each entity.
+            texts (array-like): Entity text of each entity, or integer codes
+                into `vocabulary` (avoids re-factorizing strings per batch).
+            categories (array-like): Entity category of each entity.
+            frequencies (array-like, optional): Entity frequency (default 1).
+            encounters (array-like, optional): Encounters to score, in output
+                order. Defaults to the sorted unique encounter_ids; pass it to
+                include encounters without entities.
+            faers_totals (array-like, optional): total_reports per encounter,
+                aligned with `encounters`.
+            vocabulary (list, optional): Distinct entity texts that `texts`
+                indexes into.
+
+        Returns:
+            BatchRiskResult
+        """
+        encounter_ids = np.asarray(encounter_ids)
+        n_entities = len(encounter_ids)
+        encounters = np.unique(encounter_ids) if encounters is None else np.asarray(encounters)
+        n = len(encounters)
+
+        # Map each entity to its encounter's output row
+        order = np.argsort(encounters, kind='stable')
+        rows = order[np.searchsorted(encounters, encounter_ids, sorter=order)] if n_entities else \
+            np.empty(0, dtype=np.int64)
+
+        # Symptom tiers are resolved once per distinct text
+        if vocabulary is None:
+            index = {}
+            codes = np.fromiter((index.setdefault(t, len(index)) for t in texts),
+                                dtype=np.int64, count=n_entities)
+            vocabulary = list(index)
+        else:
+            codes = np.asarray(texts, dtype=np.int64)
+        lowered = [str(t).lower() for t in vocabulary]
+        tiers = np.array([self._text_tier(t) for t in lowered], dtype=np.int8)[codes] \
+            if n_entities else np.empty(0, dtype=np.int8)
+        is_condition = np.asarray(categories, dtype=object) == 'MEDICAL_CONDITION' \
+            if n_entities else np.empty(0, dtype=bool)
+        freq = np.ones(n_entities) if frequencies is None else np.asarray(frequencies, dtype=np.float64)
+
+        weights = np.select(
+            [tiers == 2, tiers == 1, is_condition],
+            [4.0 * np.minimum(freq, 2), 2.0 * np.minimum(freq, 2), 0.5 * np.minimum(freq, 3)],
+            0.0
+        )
+        raw = np.bincount(rows, weights=weights, minlength=n)
+        entity_count = np.bincount(rows, minlength=n)
+        has_critical = np.bincount(rows, weights=(tiers == 2), minlength=n) > 0
+        has_moderate = np.bincount(rows, weights=(tiers == 1), minlength=n) > 0
+
+        totals = np.zeros(n, dtype=np.int64) if faers_totals is None else np.asarray(faers_totals)
+        multiplier = np.select(
+            [totals > self.HIGH_RISK_THRESHOLD, totals > 500, totals > 100],
+            [1.5, 1.3, 1.15],
+            1.0
+        )
+        raw = raw * multiplier
+
+        uncapped = np.where(has_critical, 7 + raw / 5, np.where(has_moderate, 4 + raw / 4, raw / 2))
+        cap = np.where(has_critical, 10, np.where(has_moderate, 9, 6))
+        capped = uncapped > cap
+        scores = np.where(capped, cap, uncapped)
+        scores[entity_count == 0] = 0
+        scores = _round_like_python(scores)
+
+        levels = np.where(
+            has_critical | (scores >= 7), 'Critical',
+            np.where(has_moderate | (scores >= 4), 'Moderate', 'Low Risk')
+        )
+
+        return BatchRiskResult(
+            self, encounters, scores, levels, totals, capped, entity_count,
+            rows, codes, lowered, tiers, freq if frequencies is not None else None
+        )
+
+
+def _round_like_python(values):
+    """
+    np.round(x, 1) scales by 10 before rounding, which can disagree with
+    Python's correctly-rounded round(x, 1) right at .x5 boundaries; those
+    few values are recomputed with the builtin.
+    """
+    rounded = np.round(values, 1)
+    scaled = values * 10
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_tie):
+        rounded[i] = round(float(values[i]), 1)
+    return rounded
+
+
+class BatchRiskResult:
+    """
+    Columnar output of RiskEngine.calculate_risk_batch.
+    `scores` and `levels` are arrays aligned with `encounters`; the per
+    encounter dict (with details and action plan) is only built on request.
+    """
+
+    def __init__(self, engine, encounters, scores, levels, totals, capped, entity_count,
+                 rows, codes, vocabulary, tiers, frequencies):
+        self.encounters = encounters
+        self.scores = scores
+        self.levels = levels
+        self._engine = engine
+        self._totals = totals
+        self._capped = capped
+        self._entity_count = entity_count
+        self._rows = rows
+        self._codes = codes
+        self._vocabulary = vocabulary
+        self._tiers = tiers
+        self._frequencies = frequencies
+        self._entity_order = None
+        self._offsets = None
+
+    def __len__(self):
+        return len(self.encounters)
+
+    def _details(self, i):
+        if self._entity_order is None:
+            # Entities grouped by output row, in their original order
+            self._entity_order = np.argsort(self._rows, kind='stable')
+            self._offsets = np.concatenate(
+                ([0], np.cumsum(np.bincount(self._rows, minlength=len(self.encounters))))
+            )
+        critical, moderate = [], []
+        for j in self._entity_order[self._offsets[i]:self._offsets[i + 1]].tolist():
+            tier = self._tiers[j]
+            if not tier:
+                continue
+            frequency = 1 if self._frequencies is None else self._frequencies[j]
+            if float(frequency).is_integer():
+                frequency = int(frequency)
+            label = f"{self._vocabulary[self._codes[j]]} (x{frequency})"
+            (critical if tier == 2 else moderate).append(label)
+        return critical, moderate
+
+    def _score(self, i):
+        if not self._entity_count[i]:
+            return 0
+        if self._capped[i]:
+            return int(self.scores[i])
+        return float(self.scores[i])
+
+    def action_plan(self, i):
+        """Action plan text for the i-th encounter."""
+        critical, moderate = self._details(i)
+        return self._engine._generate_action_plan(
+            str(self.levels[i]), critical, moderate, self._totals[i].item()
+        )
+
+    def result(self, i):
+        """The i-th encounter's result in calculate_risk's dict format."""
+        critical, moderate = self._details(i)
+        level = str(self.levels[i])
+        faers_count = self._totals[i].item()
+        return {
+            "score": self._score(i),
+            "level": level,
+            "action_plan": self._engine._generate_action_plan(level, critical, moderate, faers_count),
+            "details": {
+                "critical_symptoms": critical,
+                "moderate_symptoms": moderate,
+                "faers_reports": faers_count
+            }
+        }
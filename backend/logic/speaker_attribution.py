@@ -0,0 +1,77 @@
+import re
+from collections import defaultdict
+
+# Phrases typical of the clinician side of a consultation
+CLINICIAN_CUES = [
+    "what brings you", "how long", "how often", "how much", "how many", "how are you",
+    "do you", "are you", "have you", "did you", "can you", "any other", "on a scale",
+    "let's", "let me", "i'm going to", "i'll prescribe", "i'd like you", "i recommend",
+    "we'll", "follow up", "your blood pressure", "your symptoms", "your medication"
+]
+# First-person symptom/medication statements typical of the patient
+PATIENT_CUES = [
+    "i have", "i've had", "i've been", "i feel", "i'm feeling", "i felt", "i take",
+    "i'm taking", "i took", "i get", "i got", "i had", "i started", "i can't", "i keep",
+    "it hurts", "hurts when", "my chest", "my head", "my back", "my stomach", "my doctor",
+    "bothering me", "i noticed", "i've noticed"
+]
+
+_CLINICIAN_PATTERN = re.compile('|'.join(re.escape(cue) for cue in CLINICIAN_CUES))
+_PATIENT_PATTERN = re.compile('|'.join(re.escape(cue) for cue in PATIENT_CUES))
+
+
+def speaker_scores(utterances):
+    """
+    Scores each diarized speaker on how patient-like their speech is:
+    first-person symptom/medication statements count for, questions and
+    clinician phrasing count against. Normalized per utterance.
+    """
+    totals = defaultdict(float)
+    counts = defaultdict(int)
+    for utterance in utterances:
+        text = (utterance.get('text') or '').lower()
+        speaker = utterance.get('speaker')
+        counts[speaker] += 1
+        totals[speaker] += len(_PATIENT_PATTERN.findall(text))
+        totals[speaker] -= len(_CLINICIAN_PATTERN.findall(text)) + text.count('?')
+    return {speaker: totals[speaker] / counts[speaker] for speaker in counts}
+
+
+def identify_patient_speaker(utterances):
+    """
+    Returns the speaker ID most likely to be the patient, or None when there
+    is a single speaker or the evidence does not single one out.
+    """
+    scores = speaker_scores(utterances)
+    if len(scores) < 2:
+        return None
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    (best, best_score), (_, runner_up) = ranked[0], ranked[1]
+    if best_score <= runner_up:
+        return None
+    return best
+
+
+def build_speaker_segments(utterances, speaker, max_chars=5000):
+    """
+    Groups one speaker's utterances, in order, into text segments of at most
+    max_chars (a longer single utterance gets a segment of its own) so they
+    can be sent to NLP in parallel.
+
+    Returns:
+        list: [{"speaker": id, "text": str, "offsets": [(char_offset, start_time), ...]}]
+    """
+    segments = []
+    current = None
+    for utterance in utterances:
+        if utterance.get('speaker') != speaker or not utterance.get('text'):
+            continue
+        text = utterance['text'].strip()
+        if current is None or len(current['text']) + 1 + len(text) > max_chars:
+            current = {'speaker': speaker, 'text': '', 'offsets': []}
+            segments.append(current)
+        if current['text']:
+            current['text'] += ' '
+        current['offsets'].append((len(current['text']), utterance.get('start')))
+        current['text'] += text
+    return segments
@@ -3,19 +3,74 @@ Quick ML Model Training - Minimal Version
 Train a simple Random Forest on FAERS data
 """
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import classification_report, accuracy_score
 import pandas as pd
+import numpy as np
+import argparse
 import joblib
+import json
 import os
+import time
 
-def train_quick_model():
-    """Train a minimal ML model quickly"""
+def fast_tier_features(drug_encoded, symptom_encoded, reports, n_drugs, n_symptoms):
+    """
+    Features for the fast (logistic) serving tier:
+    [one-hot drug | one-hot symptom | log1p(faers_reports)].
+    ml_service.py evaluates the model directly from this layout.
+    """
+    X = np.zeros((len(reports), n_drugs + n_symptoms + 1))
+    rows = np.arange(len(reports))
+    X[rows, drug_encoded] = 1
+    X[rows, n_drugs + np.asarray(symptom_encoded)] = 1
+    X[:, -1] = np.log1p(np.asarray(reports, dtype=float))
+    return X
+
+def train_fast_model(df, le_drug, le_symptom):
+    """Train the fast logistic tier on the same split as the forest"""
+    print("\n⚡ Training fast logistic tier...")
+    X = fast_tier_features(df['drug_encoded'], df['symptom_encoded'], df['faers_reports'],
+                           len(le_drug.classes_), len(le_symptom.classes_))
+    y = df['label']
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+    model = LogisticRegression(max_iter=2000, class_weight='balanced')
+    model.fit(X_train, y_train)
+    accuracy = accuracy_score(y_test, model.predict(X_test))
+    print(f"   Fast tier accuracy: {accuracy:.2%}")
+    return model
+
+TRAINING_DATA = '../analysis/results/training_data_robust.csv'
+
+def load_training_data(paths):
+    """
+    drug, symptom, faers_reports, label rows from CSV or Parquet files
+    (e.g. the pairs table of scripts/export_analyses.py). A pair seen in
+    several files or analyses keeps its last count.
+    """
+    frames = []
+    for path in paths:
+        if path.endswith('.parquet'):
+            frames.append(pd.read_parquet(path, columns=['drug', 'symptom', 'faers_reports', 'label']))
+        else:
+            frames.append(pd.read_csv(path)[['drug', 'symptom', 'faers_reports', 'label']])
+    df = pd.concat(frames, ignore_index=True)
+    return df.drop_duplicates(['drug', 'symptom'], keep='last').reset_index(drop=True)
+
+def train_quick_model(release=None, data=None):
+    """
+    Train a minimal ML model quickly.
+    With release=<version> the artifacts go to models/releases/<version>/
+    for running servers to hot-reload, instead of replacing the base models.
+    data lists the training files (default: the FAERS training corpus).
+    """
     
     # Load data
     print("📊 Loading training data...")
-    df = pd.read_csv('../analysis/results/training_data_robust.csv')
+    df = load_training_data(data or [TRAINING_DATA])
     print(f"   Loaded {len(df)} samples")
     
     # Encode categorical features
@@ -62,14 +117,25 @@ def train_quick_model():
     print(classification_report(y_test, y_pred, target_names=['Low', 'Moderate', 'Critical']))
     
     # Save model and encoders
+    fast_model = train_fast_model(df, le_drug, le_symptom)
+
     print("\n💾 Saving model artifacts...")
-    os.makedirs('../models', exist_ok=True)
-    
-    joblib.dump(model, '../models/risk_classifier.pkl')
-    joblib.dump(le_drug, '../models/drug_encoder.pkl')
-    joblib.dump(le_symptom, '../models/symptom_encoder.pkl')
+    out_dir = os.path.join('../models', 'releases', release) if release else '../models'
+    os.makedirs(out_dir, exist_ok=True)
+
+    joblib.dump(model, os.path.join(out_dir, 'risk_classifier.pkl'))
+    joblib.dump(fast_model, os.path.join(out_dir, 'risk_classifier_fast.pkl'))
+    joblib.dump(le_drug, os.path.join(out_dir, 'drug_encoder.pkl'))
+    joblib.dump(le_symptom, os.path.join(out_dir, 'symptom_encoder.pkl'))
+    if release:
+        # Written last: servers only consider a release once its manifest exists
+        with open(os.path.join(out_dir, 'manifest.json'), 'w') as f:
+            json.dump({"version": release, "created_at": time.time(), "accuracy": accuracy,
+                       "samples": len(df)}, f, indent=2)
+        print(f"   ✓ Release {release} written to {out_dir}")
     
     print("   ✓ Saved risk_classifier.pkl")
+    print("   ✓ Saved risk_classifier_fast.pkl")
     print("   ✓ Saved drug_encoder.pkl")
     print("   ✓ Saved symptom_encoder.pkl")
     
@@ -81,5 +147,12 @@ def train_quick_model():
     return model, accuracy
 
 if __name__ == '__main__':
-    model, acc = train_quick_model()
+    parser = argparse.ArgumentParser(description="Train the risk models")
+    parser.add_argument('--release', nargs='?', const=time.strftime('%Y%m%dT%H%M%S'),
+                        help='Write a versioned release (default version: current timestamp) '
+                             'for running servers to hot-reload')
+    parser.add_argument('--data', nargs='+',
+                        help='Training CSV/Parquet files, oldest first (default: the FAERS training corpus)')
+    args = parser.parse_args()
+    model, acc = train_quick_model(release=args.release, data=args.data)
     print(f"\n🎉 Training complete! Model accuracy: {acc:.2%}")
@@ -1,76 +1,450 @@
 """
 ML Prediction Service - Quick Version
 Integrates trained model with existing pipeline
+
+Models are served in latency tiers, cheapest first:
+    fast    - logistic regression over one-hot drug/symptom + log reports,
+              evaluated as a single numpy dot product (microseconds)
+    forest  - the full RandomForestClassifier (milliseconds)
+
+Each tier's latency is profiled at load and tracked per prediction. A
+request uses the most accurate tier whose p99 fits its latency budget,
+and falls back to the cheapest tier while too many predictions are
+already in flight.
+
+Model versions:
+    models/*.pkl                      the 'base' version shipped with the repo
+    models/releases/<version>/        versions written by ml/train_model.py --release;
+                                      manifest.json is written last and marks it complete
+    models/releases/ACTIVE            optional pin (written by rollback/activate)
+
+The active version is the pin, else the newest release, else 'base'. A
+watcher thread loads and validates a new target in the background and
+swaps it in atomically; in-flight predictions finish on the version
+they started with. Recently active versions stay loaded for rollback.
+
+Configuration:
+    ML_LATENCY_BUDGET_MS    Default per-request budget (default: none, use the best tier)
+    ML_MAX_FULL_INFLIGHT    In-flight predictions above which the cheapest tier is used (default 4)
+    ML_RELOAD_INTERVAL      Seconds between checks for a new version (default 30, 0 = off)
+    ML_MIN_ACCURACY         Validation accuracy a new version needs (default 0.8)
 """
 import joblib
 import numpy as np
 import os
+import threading
+import time
+import warnings
+from collections import deque
+
+# The forest was fitted on a DataFrame; predicting on arrays (much cheaper
+# than building a frame per request) warns on every call
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+MODELS_DIR = os.path.join(os.path.dirname(__file__), 'models')
+VALIDATION_DATA = os.path.join(os.path.dirname(__file__), 'analysis', 'results', 'training_data_robust.csv')
+RISK_LEVELS = ['Low Risk', 'Moderate', 'Critical']
+BASE_VERSION = 'base'
+MANIFEST = 'manifest.json'
+ACTIVE_PIN = 'ACTIVE'
+
+
+def _env_number(name, default):
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class ModelTier:
+    """One servable model plus a rolling window of its prediction latencies."""
+
+    def __init__(self, name, predict_proba, predict_batch, window=200):
+        self.name = name
+        self.predict_proba = predict_proba
+        # (drugs, symptoms, reports) arrays -> probability rows; used for validation
+        self.predict_batch = predict_batch
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def percentile_ms(self, pct):
+        with self._lock:
+            samples = sorted(self._latencies)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+        return samples[index] * 1000
+
+    def profile(self, samples=30):
+        """Measures latency on a representative input so selection works from the first request."""
+        for _ in range(samples):
+            start = time.perf_counter()
+            self.predict_proba(0, 0, 100)
+            self.record(time.perf_counter() - start)
+
+    def stats(self):
+        return {"p50_ms": self.percentile_ms(50), "p99_ms": self.percentile_ms(99)}
+
+
+class ModelBundle:
+    """One model version: encoders plus its tiers. Never mutated once built."""
+
+    def __init__(self, version, directory):
+        self.version = version
+        self.directory = directory
+        self.loaded_at = time.time()
+        self.model = joblib.load(os.path.join(directory, 'risk_classifier.pkl'))
+        self.drug_encoder = joblib.load(os.path.join(directory, 'drug_encoder.pkl'))
+        self.symptom_encoder = joblib.load(os.path.join(directory, 'symptom_encoder.pkl'))
+
+        self.tiers = []
+        fast_tier = self._load_fast_tier(os.path.join(directory, 'risk_classifier_fast.pkl'))
+        if fast_tier:
+            self.tiers.append(fast_tier)
+        self.tiers.append(ModelTier(
+            'forest', self._forest_proba,
+            lambda drugs, symptoms, reports: self.model.predict_proba(np.column_stack([drugs, symptoms, reports]))
+        ))
+        for tier in self.tiers:
+            tier.profile()
+
+    def _forest_proba(self, drug_encoded, symptom_encoded, reports):
+        return self.model.predict_proba(np.array([[drug_encoded, symptom_encoded, reports]]))[0]
+
+    def _load_fast_tier(self, path):
+        """
+        Loads the logistic regression tier trained by ml/train_model.py.
+        Its features are [one-hot drug | one-hot symptom | log1p(reports)],
+        so a prediction is three coefficient column lookups and a softmax.
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            model = joblib.load(path)
+            n_drugs = len(self.drug_encoder.classes_)
+            n_symptoms = len(self.symptom_encoder.classes_)
+            if model.coef_.shape != (len(RISK_LEVELS), n_drugs + n_symptoms + 1):
+                print(f"⚠️  Fast ML tier of {self.version} does not match the encoders, skipping it")
+                return None
+        except Exception as e:
+            print(f"⚠️  Fast ML tier of {self.version} not loaded: {e}")
+            return None
+
+        drug_weights = np.ascontiguousarray(model.coef_[:, :n_drugs].T)
+        symptom_weights = np.ascontiguousarray(model.coef_[:, n_drugs:n_drugs + n_symptoms].T)
+        reports_weights = model.coef_[:, -1].copy()
+        intercept = model.intercept_.copy()
+
+        def predict_proba(drug_encoded, symptom_encoded, reports):
+            logits = (drug_weights[drug_encoded] + symptom_weights[symptom_encoded]
+                      + reports_weights * np.log1p(reports) + intercept)
+            exp = np.exp(logits - logits.max())
+            return exp / exp.sum()
+
+        def predict_batch(drugs, symptoms, reports):
+            logits = (drug_weights[drugs] + symptom_weights[symptoms]
+                      + np.outer(np.log1p(np.asarray(reports, dtype=float)), reports_weights) + intercept)
+            exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+            return exp / exp.sum(axis=1, keepdims=True)
+
+        return ModelTier('fast', predict_proba, predict_batch)
+
+    def validate(self, min_accuracy=0.8, sample_size=500):
+        """
+        Raises ValueError unless every tier produces sane probabilities and
+        meets min_accuracy on a fixed sample of the training data.
+        Returns {tier: accuracy} (empty if no validation data is present).
+        """
+        if list(self.model.classes_) != list(range(len(RISK_LEVELS))):
+            raise ValueError(f"unexpected classes {list(self.model.classes_)}")
+        for tier in self.tiers:
+            probabilities = tier.predict_proba(0, 0, 100)
+            if len(probabilities) != len(RISK_LEVELS) or abs(float(np.sum(probabilities)) - 1) > 1e-6:
+                raise ValueError(f"{tier.name} tier returned invalid probabilities")
+
+        if not os.path.exists(VALIDATION_DATA):
+            return {}
+        import pandas as pd
+        df = pd.read_csv(VALIDATION_DATA)
+        df = df[df['drug'].isin(self.drug_encoder.classes_) & df['symptom'].isin(self.symptom_encoder.classes_)]
+        if df.empty:
+            raise ValueError("encoders do not cover any validation rows")
+        df = df.sample(min(sample_size, len(df)), random_state=0)
+        drugs = self.drug_encoder.transform(df['drug'])
+        symptoms = self.symptom_encoder.transform(df['symptom'])
+
+        accuracies = {}
+        for tier in self.tiers:
+            predictions = np.argmax(tier.predict_batch(drugs, symptoms, df['faers_reports'].to_numpy()), axis=1)
+            accuracies[tier.name] = float(np.mean(predictions == df['label'].to_numpy()))
+            if accuracies[tier.name] < min_accuracy:
+                raise ValueError(f"{tier.name} tier accuracy {accuracies[tier.name]:.2%} "
+                                 f"is below {min_accuracy:.0%}")
+        return accuracies
+
 
 class MLPredictionService:
-    def __init__(self):
+    def __init__(self, models_dir=None, reload_interval=None):
+        self.models_dir = models_dir or MODELS_DIR
+        self.releases_dir = os.path.join(self.models_dir, 'releases')
+        self.default_budget_ms = _env_number('ML_LATENCY_BUDGET_MS', None)
+        self.max_full_inflight = int(_env_number('ML_MAX_FULL_INFLIGHT', 4))
+        self.min_accuracy = _env_number('ML_MIN_ACCURACY', 0.8)
+        self.reload_interval = (reload_interval if reload_interval is not None
+                                else _env_number('ML_RELOAD_INTERVAL', 30))
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+        self._bundle = None
+        self._previous = deque(maxlen=3)
+        self._failed = {}
+        self._reload_lock = threading.Lock()
         try:
-            model_path = os.path.join(os.path.dirname(__file__), 'models', 'risk_classifier.pkl')
-            drug_encoder_path = os.path.join(os.path.dirname(__file__), 'models', 'drug_encoder.pkl')
-            symptom_encoder_path = os.path.join(os.path.dirname(__file__), 'models', 'symptom_encoder.pkl')
-            
-            self.model = joblib.load(model_path)
-            self.drug_encoder = joblib.load(drug_encoder_path)
-            self.symptom_encoder = joblib.load(symptom_encoder_path)
+            target = self.target_version()
+            try:
+                self._bundle = self._load(target)
+            except Exception as e:
+                if target == BASE_VERSION:
+                    raise
+                print(f"⚠️  ML model {target} failed to load, using {BASE_VERSION}: {e}")
+                self._failed[target] = str(e)
+                self._bundle = self._load(BASE_VERSION)
+
             self.available = True
-            print("✅ ML Model loaded successfully")
+            print(f"✅ ML Model loaded successfully (version: {self.version}, "
+                  f"tiers: {', '.join(t.name for t in self.tiers)})")
+            self.start_watcher()
         except Exception as e:
             self.available = False
             print(f"⚠️  ML model not loaded: {e}")
-    
-    def predict_risk(self, entities, faers_data):
+
+    # The active bundle's artifacts; each is read from one bundle reference
+    @property
+    def model(self):
+        return self._bundle.model
+
+    @property
+    def drug_encoder(self):
+        return self._bundle.drug_encoder
+
+    @property
+    def symptom_encoder(self):
+        return self._bundle.symptom_encoder
+
+    @property
+    def tiers(self):
+        return self._bundle.tiers
+
+    @property
+    def version(self):
+        return self._bundle.version
+
+    def available_versions(self):
+        """'base' plus every complete release, oldest first."""
+        versions = [BASE_VERSION]
+        if os.path.isdir(self.releases_dir):
+            versions += sorted(
+                name for name in os.listdir(self.releases_dir)
+                if os.path.isfile(os.path.join(self.releases_dir, name, MANIFEST))
+            )
+        return versions
+
+    def target_version(self):
+        """The pinned version if there is one, else the newest release."""
+        pin = os.path.join(self.releases_dir, ACTIVE_PIN)
+        if os.path.exists(pin):
+            with open(pin) as f:
+                pinned = f.read().strip()
+            if pinned in self.available_versions():
+                return pinned
+        return self.available_versions()[-1]
+
+    def _directory(self, version):
+        if version == BASE_VERSION:
+            return self.models_dir
+        if version not in self.available_versions():
+            raise ValueError(f"unknown model version {version!r}")
+        return os.path.join(self.releases_dir, version)
+
+    def _load(self, version):
+        bundle = ModelBundle(version, self._directory(version))
+        bundle.validate(self.min_accuracy)
+        return bundle
+
+    def _swap(self, bundle):
+        # A single reference assignment: predictions that already read the
+        # old bundle finish on it, new ones see the new one
+        if self._bundle is not None:
+            self._previous.appendleft(self._bundle)
+        self._bundle = bundle
+        print(f"🔄 ML model version {bundle.version} is now active")
+
+    def _pin(self, version):
+        os.makedirs(self.releases_dir, exist_ok=True)
+        pin = os.path.join(self.releases_dir, ACTIVE_PIN)
+        tmp = f"{pin}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            f.write(version)
+        os.replace(tmp, pin)
+
+    def reload(self, version=None):
+        """
+        Loads and validates `version` (default: the target version) and swaps
+        it in. Predictions keep running on the current version meanwhile.
+        Returns the model status; raises ValueError if validation fails.
+        """
+        with self._reload_lock:
+            version = version or self.target_version()
+            if version not in self.available_versions():
+                raise ValueError(f"unknown model version {version!r}")
+            if self._bundle is not None and version == self.version:
+                return self.status()
+            previous = next((b for b in self._previous if b.version == version), None)
+            if previous is not None:
+                bundle = previous
+                self._previous.remove(previous)
+            else:
+                try:
+                    bundle = self._load(version)
+                except Exception as e:
+                    self._failed[version] = str(e)
+                    raise ValueError(f"model version {version} rejected: {e}") from e
+            self._swap(bundle)
+            self.available = True
+            return self.status()
+
+    def activate(self, version):
+        """Pins `version` so every worker (via its watcher) converges on it."""
+        status = self.reload(version)
+        self._pin(version)
+        return status
+
+    def rollback(self):
+        """Reactivates the most recently replaced version."""
+        if not self._previous:
+            raise ValueError("no previous model version to roll back to")
+        return self.activate(self._previous[0].version)
+
+    def check_for_update(self):
+        target = self.target_version()
+        if target == self.version or target in self._failed:
+            return
+        try:
+            self.reload(target)
+        except ValueError as e:
+            print(f"⚠️  {e}")
+
+    def start_watcher(self):
+        """Polls for a new target version (again, in forked server workers)."""
+        if not self.reload_interval or self.reload_interval <= 0:
+            return
+
+        def watch():
+            while True:
+                time.sleep(self.reload_interval)
+                try:
+                    self.check_for_update()
+                except Exception as e:
+                    print(f"ML model watcher error: {e}")
+
+        threading.Thread(target=watch, name='ml-model-watcher', daemon=True).start()
+
+    def status(self):
+        return {
+            "version": self.version,
+            "loaded_at": self._bundle.loaded_at,
+            "tiers": self.tier_stats(),
+            "rollback_versions": [bundle.version for bundle in self._previous],
+            "available_versions": self.available_versions(),
+            "rejected_versions": dict(self._failed)
+        }
+
+    def select_tier(self, budget_ms=None, bundle=None):
+        """
+        Returns (tier, reason). The most accurate tier fitting the budget is
+        used unless the service is saturated, in which case the cheapest is.
+        """
+        tiers = (bundle or self._bundle).tiers
+        with self._in_flight_lock:
+            saturated = self._in_flight >= self.max_full_inflight
+        if saturated:
+            return tiers[0], 'load'
+        if budget_ms is None:
+            budget_ms = self.default_budget_ms
+        if budget_ms is None:
+            return tiers[-1], 'default'
+        for tier in reversed(tiers):
+            p99 = tier.percentile_ms(99)
+            if p99 is not None and p99 <= budget_ms:
+                return tier, 'budget'
+        return tiers[0], 'budget'
+
+    def tier_stats(self):
+        return {tier.name: tier.stats() for tier in self.tiers}
+
+    def predict_risk(self, entities, faers_data, budget_ms=None):
         """
         Predict risk level using ML model
-        
+
         Args:
             entities: List of medical entities from NLP
             faers_data: Dict with 'total_reports' key
-            
+            budget_ms: Optional latency budget used to pick the model tier
+
         Returns:
             Dict with ML prediction results or None if unavailable
         """
         if not self.available:
             return None
-        
+
+        # One consistent model version for the whole prediction
+        bundle = self._bundle
         try:
             # Extract drugs and symptoms
             drugs = [e['Text'].lower() for e in entities if e.get('Category') == 'MEDICATION']
             symptoms = [e['Text'].lower() for e in entities if e.get('Category') == 'MEDICAL_CONDITION']
-            
+
             if not drugs or not symptoms:
                 return None
-            
+
             # Use first drug and symptom (can be enhanced)
             drug = drugs[0]
             symptom = symptoms[0]
-            
+
             # Encode (handle unknown values)
-            drug_classes = self.drug_encoder.classes_
-            symptom_classes = self.symptom_encoder.classes_
-            
+            drug_classes = bundle.drug_encoder.classes_
+            symptom_classes = bundle.symptom_encoder.classes_
+
             # If drug/symptom not in training data, use closest match or return None
             if drug not in drug_classes or symptom not in symptom_classes:
                 # Fallback: use most common values
                 drug = drug_classes[0] if drug not in drug_classes else drug
                 symptom = symptom_classes[0] if symptom not in symptom_classes else symptom
-            
-            drug_encoded = self.drug_encoder.transform([drug])[0]
-            symptom_encoded = self.symptom_encoder.transform([symptom])[0]
+
+            drug_encoded = bundle.drug_encoder.transform([drug])[0]
+            symptom_encoded = bundle.symptom_encoder.transform([symptom])[0]
             reports = faers_data.get('total_reports', 0)
-            
-            # Predict
-            X = np.array([[drug_encoded, symptom_encoded, reports]])
-            prediction = self.model.predict(X)[0]
-            probabilities = self.model.predict_proba(X)[0]
-            
+
+            # Predict with the tier that fits the budget and current load
+            tier, reason = self.select_tier(budget_ms, bundle)
+            with self._in_flight_lock:
+                self._in_flight += 1
+            start = time.perf_counter()
+            try:
+                probabilities = tier.predict_proba(drug_encoded, symptom_encoded, reports)
+            finally:
+                elapsed = time.perf_counter() - start
+                tier.record(elapsed)
+                with self._in_flight_lock:
+                    self._in_flight -= 1
+            prediction = int(np.argmax(probabilities))
+
             # Map prediction to risk levels
-            risk_levels = ['Low Risk', 'Moderate', 'Critical']
-            risk_level = risk_levels[prediction]
-            
+            risk_level = RISK_LEVELS[prediction]
+
             return {
                 'ml_prediction': risk_level,
                 'ml_confidence': float(max(probabilities)),
@@ -79,9 +453,13 @@ class MLPredictionService:
                     'moderate': float(probabilities[1]),
                     'critical': float(probabilities[2])
                 },
-                'ml_available': True
+                'ml_available': True,
+                'ml_model_version': bundle.version,
+                'ml_tier': tier.name,
+                'ml_tier_reason': reason,
+                'ml_latency_ms': round(elapsed * 1000, 3)
             }
-            
+
         except Exception as e:
             print(f"ML prediction error: {e}")
             return None
@@ -0,0 +1,62 @@
+"""
+Build FAERS Pair Matrix
+Turns collected drug/symptom FAERS counts into the memory-mapped matrix
+SafetyService consults before openFDA. Later files win for pairs they
+share with earlier ones, so a new collection can be layered on the old.
+
+Usage:
+    python backend/scripts/build_pair_matrix.py [counts.csv ...] --as-of YYYY-MM-DD [--out path.npy]
+
+Each CSV needs drug, symptom and faers_reports columns (the format of
+ml/prepare_data.py). Without arguments the training corpus is used.
+--as-of is the date the counts were collected from openFDA; it is what
+FAERS_MATRIX_MAX_AGE_DAYS measures, and file dates cannot stand in for it
+(git does not keep them). The training corpus was collected by 2025-12-27.
+"""
+import argparse
+import csv
+import datetime
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from backend.services.pair_matrix import MATRIX_PATH, build_pair_matrix, metadata_path, save_pair_matrix
+
+TRAINING_DATA = os.path.join(os.path.dirname(__file__), '..', 'analysis', 'results', 'training_data_robust.csv')
+
+
+def read_counts(path):
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            yield row['drug'], row['symptom'], row['faers_reports']
+
+
+def collection_date(value):
+    return datetime.date.fromisoformat(value).isoformat()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('csv', nargs='*', help='Count files, oldest first (default: the training corpus)')
+    parser.add_argument('--out', default=MATRIX_PATH, help='Matrix file (default: models/faers_pair_counts.npy)')
+    parser.add_argument('--as-of', required=True, type=collection_date,
+                        help='Date the counts were collected from openFDA (YYYY-MM-DD)')
+    args = parser.parse_args()
+
+    paths = args.csv or [TRAINING_DATA]
+    as_of = args.as_of
+
+    print(f"🧮 Building FAERS pair matrix from {len(paths)} file(s)...")
+    start = time.perf_counter()
+    rows = (row for path in paths for row in read_counts(path))
+    matrix, metadata = build_pair_matrix(rows, as_of, sources=[os.path.basename(p) for p in paths])
+    save_pair_matrix(args.out, matrix, metadata)
+    print(f"✅ {metadata['pairs']} pairs ({len(metadata['drugs'])} drugs × {len(metadata['symptoms'])} symptoms, "
+          f"as of {as_of}) in {time.perf_counter() - start:.2f}s")
+    print(f"💾 Saved to {os.path.relpath(args.out)} and {os.path.relpath(metadata_path(args.out))}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Export Analyses
+Streams stored analyses into a Parquet (or Arrow IPC stream) file for
+offline analysis. The pairs table can be passed straight to
+ml/train_model.py --data.
+
+Usage:
+    python backend/scripts/export_analyses.py pairs out/pairs.parquet [--since 2024-01-01] [--until 2024-07-01]
+        [--risk-level Critical,Moderate] [--format parquet|arrow] [--row-group-size 10000] [--db path/to/analyses.db]
+
+Dates are UTC days; --until is exclusive.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from backend.services.analysis_export import DEFAULT_ROW_GROUP_SIZE, FORMATS, TABLES, write_export
+from backend.services.analysis_store import AnalysisStore
+
+
+def utc_day(value):
+    return datetime.strptime(value, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('table', choices=TABLES)
+    parser.add_argument('out', help='Output file')
+    parser.add_argument('--since', type=utc_day, help='First day to include (YYYY-MM-DD)')
+    parser.add_argument('--until', type=utc_day, help='Day to stop before (YYYY-MM-DD)')
+    parser.add_argument('--risk-level', help='Comma-separated risk levels to include (default: all)')
+    parser.add_argument('--format', choices=FORMATS, default='parquet')
+    parser.add_argument('--row-group-size', type=int, default=DEFAULT_ROW_GROUP_SIZE)
+    parser.add_argument('--db', help='Analysis database (default: ANALYSIS_DB_PATH or backend/data/analyses.db)')
+    args = parser.parse_args()
+
+    store = AnalysisStore(args.db)
+    risk_levels = [level.strip() for level in args.risk_level.split(',')] if args.risk_level else None
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    print(f"📦 Exporting {args.table} from {store.db_path}...")
+    start = time.perf_counter()
+    rows = write_export(store, args.table, args.out, fmt=args.format, row_group_size=args.row_group_size,
+                        since=args.since, until=args.until, risk_levels=risk_levels)
+    print(f"✅ {rows} rows written to {args.out} in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+"""
+Rebuild Population Aggregates
+Recomputes the dashboard aggregate tables from every stored analysis.
+Use after a backfill or a change to the aggregation rules.
+
+Usage:
+    python backend/scripts/rebuild_aggregates.py [--db path/to/analyses.db]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from backend.services.analysis_store import AnalysisStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--db', help='Analysis database (default: ANALYSIS_DB_PATH or backend/data/analyses.db)')
+    args = parser.parse_args()
+
+    store = AnalysisStore(args.db)
+    print(f"🔄 Rebuilding aggregates in {store.db_path}...")
+    start = time.perf_counter()
+    scanned = store.rebuild_aggregates()
+    print(f"✅ Rebuilt from {scanned} analyses in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
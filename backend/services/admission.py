@@ -0,0 +1,253 @@
+"""
+Admission control for the analysis endpoints, keyed on API client.
+
+Each client (named by a request header the API gateway sets) has a weight,
+a concurrency cap and a token-bucket request rate. At most `capacity`
+requests run at once per process; the rest queue, and freed slots are
+handed out by start-time fair queuing: a client's requests are tagged with
+virtual start times 1/weight apart, so a client with a deep backlog gets
+its weighted share of slots rather than all of them, and a client with
+nothing queued is served next.
+
+Requests are shed early with 429 and Retry-After when the client is over
+its rate, or when the predicted queue wait (requests ahead of it times the
+recent median service time) exceeds the latency target. A request still
+queued when the target passes is shed as well.
+
+Configuration:
+    ADMISSION_CONCURRENCY          Requests processed at once per process (default 0 = no admission control)
+    ADMISSION_LATENCY_TARGET       Seconds a request may queue (default 5)
+    ADMISSION_CLIENT_HEADER        Header naming the client (default X-Client-Id)
+    ADMISSION_CLIENT_CONCURRENCY   Default per-client cap (default: ADMISSION_CONCURRENCY)
+    ADMISSION_CLIENT_RATE          Default per-client requests per second (default 0 = unlimited)
+    ADMISSION_CLIENTS              JSON per-client overrides of weight, concurrency, rate and burst, e.g.
+                                   {"clinic-web": {"weight": 4}, "partner-a": {"concurrency": 2, "rate": 0.5}}
+"""
+import itertools
+import json
+import os
+import threading
+import time
+
+from .resilience import LatencyTracker, env_float
+
+ANONYMOUS = 'anonymous'
+# Distinct client names tracked; later unknown names share one bucket
+MAX_CLIENTS = 1000
+OTHER_CLIENTS = 'other'
+# Service time assumed until enough requests have completed (see service_estimate)
+DEFAULT_SERVICE_SECONDS = 5.0
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed; retry_after is in seconds."""
+
+    def __init__(self, client, reason, retry_after):
+        reasons = {'rate': 'over its request rate', 'overload': 'would queue past the latency target',
+                   'timeout': 'queued past the latency target'}
+        super().__init__(f"Client {client} {reasons.get(reason, reason)}, retry in {retry_after:.0f}s")
+        self.client = client
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Client:
+    def __init__(self, name, weight, concurrency, rate, burst):
+        self.name = name
+        self.weight = weight
+        self.concurrency = concurrency
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.refilled_at = time.monotonic()
+        self.last_finish = 0.0
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = {'rate': 0, 'overload': 0, 'timeout': 0}
+        self.busy_seconds = 0.0
+        self.waits = LatencyTracker()
+
+    def refill(self, now):
+        if now > self.refilled_at:
+            self.tokens = min(self.burst, self.tokens + (now - self.refilled_at) * self.rate)
+            self.refilled_at = now
+
+
+class Ticket:
+    __slots__ = ('client', 'start_tag', 'seq', 'enqueued_at', 'admitted_at', 'event')
+
+    def __init__(self, client, start_tag, seq, now):
+        self.client = client
+        self.start_tag = start_tag
+        self.seq = seq
+        self.enqueued_at = now
+        self.admitted_at = None
+        self.event = threading.Event()
+
+
+class AdmissionController:
+    def __init__(self, capacity, latency_target=5.0, client_concurrency=None, client_rate=0.0,
+                 clients=None, client_header='X-Client-Id', service_estimate=DEFAULT_SERVICE_SECONDS):
+        self.capacity = capacity
+        self.latency_target = latency_target
+        self.client_concurrency = client_concurrency or capacity
+        self.client_rate = client_rate
+        self.overrides = clients or {}
+        self.client_header = client_header
+        self.service_estimate = service_estimate
+        self.in_use = 0
+        self._clients = {}
+        self._waiters = []
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+        self._service = LatencyTracker()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """The configured controller, or None when ADMISSION_CONCURRENCY is 0."""
+        capacity = int(env_float('ADMISSION_CONCURRENCY', 0))
+        if capacity <= 0:
+            return None
+        try:
+            clients = json.loads(os.getenv('ADMISSION_CLIENTS') or '{}')
+        except ValueError as e:
+            print(f"Warning: ignoring invalid ADMISSION_CLIENTS: {e}")
+            clients = {}
+        return cls(capacity,
+                   latency_target=env_float('ADMISSION_LATENCY_TARGET', 5),
+                   client_concurrency=int(env_float('ADMISSION_CLIENT_CONCURRENCY', 0)) or None,
+                   client_rate=env_float('ADMISSION_CLIENT_RATE', 0),
+                   clients=clients,
+                   client_header=os.getenv('ADMISSION_CLIENT_HEADER', 'X-Client-Id'))
+
+    def _client(self, name):
+        client = self._clients.get(name)
+        if client is None and len(self._clients) >= MAX_CLIENTS and name not in self.overrides:
+            # The shared bucket is created past the cap rather than looked up through it
+            name = OTHER_CLIENTS
+            client = self._clients.get(name)
+        if client is None:
+            limits = self.overrides.get(name, {})
+            rate = float(limits.get('rate', self.client_rate))
+            client = self._clients[name] = _Client(
+                name,
+                weight=max(float(limits.get('weight', 1)), 0.01),
+                concurrency=max(int(limits.get('concurrency', self.client_concurrency)), 1),
+                rate=rate,
+                burst=max(float(limits.get('burst', max(rate, 1.0))), 1.0)
+            )
+        return client
+
+    def service_time(self):
+        """Median seconds a request holds its slot."""
+        median = self._service.percentile(50)
+        return self.service_estimate if median is None else median
+
+    def _predicted_wait(self, client, start_tag):
+        service = self.service_time()
+        ahead = sum(1 for t in self._waiters if t.start_tag <= start_tag)
+        wait = (ahead + 1) * service / self.capacity
+        if client.in_flight >= client.concurrency:
+            wait = max(wait, (client.queued + 1) * service / client.concurrency)
+        return wait
+
+    def admit(self, name):
+        """
+        Waits for a slot for client name and returns the ticket to release().
+        Raises AdmissionRejected when the request is shed.
+        """
+        name = name or ANONYMOUS
+        with self._lock:
+            now = time.monotonic()
+            client = self._client(name)
+            if client.rate:
+                client.refill(now)
+                if client.tokens < 1:
+                    client.rejected['rate'] += 1
+                    raise AdmissionRejected(client.name, 'rate', (1 - client.tokens) / client.rate)
+            start_tag = max(self._virtual_time, client.last_finish)
+            ticket = Ticket(client, start_tag, next(self._seq), now)
+            if self.in_use < self.capacity and client.in_flight < client.concurrency:
+                self._start(ticket, now)
+            else:
+                wait = self._predicted_wait(client, start_tag)
+                if wait > self.latency_target:
+                    client.rejected['overload'] += 1
+                    raise AdmissionRejected(client.name, 'overload', wait)
+                self._waiters.append(ticket)
+                client.queued += 1
+            if client.rate:
+                client.tokens -= 1
+            client.last_finish = start_tag + 1 / client.weight
+
+        if ticket.event.wait(self.latency_target):
+            return ticket
+        with self._lock:
+            # _dispatch() may have admitted us just as we timed out
+            if ticket.event.is_set():
+                return ticket
+            self._waiters.remove(ticket)
+            client.queued -= 1
+            client.rejected['timeout'] += 1
+        raise AdmissionRejected(client.name, 'timeout', self.service_time())
+
+    def _start(self, ticket, now):
+        client = ticket.client
+        self.in_use += 1
+        client.in_flight += 1
+        client.admitted += 1
+        self._virtual_time = max(self._virtual_time, ticket.start_tag)
+        ticket.admitted_at = now
+        client.waits.record(now - ticket.enqueued_at)
+        ticket.event.set()
+
+    def release(self, ticket):
+        with self._lock:
+            now = time.monotonic()
+            client = ticket.client
+            elapsed = now - ticket.admitted_at
+            client.busy_seconds += elapsed
+            client.in_flight -= 1
+            self.in_use -= 1
+            self._service.record(elapsed)
+            self._dispatch(now)
+
+    def _dispatch(self, now):
+        """Hands free slots to the eligible waiters with the lowest start tags."""
+        while self.in_use < self.capacity:
+            eligible = [t for t in self._waiters if t.client.in_flight < t.client.concurrency]
+            if not eligible:
+                return
+            ticket = min(eligible, key=lambda t: (t.start_tag, t.seq))
+            self._waiters.remove(ticket)
+            ticket.client.queued -= 1
+            self._start(ticket, now)
+
+    def stats(self):
+        with self._lock:
+            busy_total = sum(c.busy_seconds for c in self._clients.values()) or 1.0
+            clients = {}
+            for client in self._clients.values():
+                p95 = client.waits.percentile(95)
+                clients[client.name] = {
+                    "weight": client.weight,
+                    "concurrency": client.concurrency,
+                    "rate": client.rate,
+                    "in_flight": client.in_flight,
+                    "queued": client.queued,
+                    "admitted": client.admitted,
+                    "rejected": dict(client.rejected),
+                    "utilization": round(client.in_flight / self.capacity, 3),
+                    "busy_share": round(client.busy_seconds / busy_total, 3),
+                    "p95_wait_ms": round(p95 * 1000, 3) if p95 is not None else None
+                }
+            return {
+                "capacity": self.capacity,
+                "in_use": self.in_use,
+                "queued": len(self._waiters),
+                "latency_target_s": self.latency_target,
+                "service_p50_ms": round(self.service_time() * 1000, 3),
+                "clients": clients
+            }
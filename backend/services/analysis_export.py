@@ -0,0 +1,245 @@
+"""
+Bulk export of stored analyses to columnar files (Parquet, or an Arrow IPC
+stream) for offline analysis and model retraining.
+
+Three tables, flattened from the stored results:
+    analyses   one row per analysis: scores, levels, FAERS totals
+    entities   one row per detected entity
+    pairs      one row per drug x symptom FAERS count, with the columns
+               ml/train_model.py trains on (drug, symptom, faers_reports,
+               label) plus the analysis they came from
+
+Rows are written in fixed-size row groups (record batches for Arrow) as
+the store is scanned, so memory is bounded by the row group size however
+large the export. Date and risk level filters run in the database scan;
+rows come out in created_at order, so Parquet row-group statistics also
+let readers skip row groups by date.
+
+Requires pyarrow.
+"""
+from .resilience import OPENFDA
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pa = pq = None
+
+FORMATS = ('parquet', 'arrow')
+DEFAULT_ROW_GROUP_SIZE = 10000
+
+# FAERS report counts -> training label, as in analysis/results/training_data_robust.csv
+LABEL_THRESHOLDS = ((2000, 2), (300, 1))
+
+COLUMNS = {
+    'analyses': [
+        ('analysis_id', 'string'), ('created_at', 'timestamp'), ('file_name', 'string'),
+        ('risk_level', 'string'), ('risk_score', 'float64'), ('total_reports', 'int64'),
+        ('ml_prediction', 'string'), ('ml_confidence', 'float64'), ('medications', 'int32'),
+        ('conditions', 'int32'), ('faers_pairs', 'int32'), ('faers_complete', 'bool'),
+        ('nlp_source', 'string')
+    ],
+    'entities': [
+        ('analysis_id', 'string'), ('created_at', 'timestamp'), ('risk_level', 'string'),
+        ('category', 'string'), ('type', 'string'), ('text', 'string'), ('frequency', 'int32'),
+        ('score', 'float64'), ('speaker', 'int32')
+    ],
+    'pairs': [
+        ('analysis_id', 'string'), ('created_at', 'timestamp'), ('risk_level', 'string'),
+        ('drug', 'string'), ('symptom', 'string'), ('faers_reports', 'int64'), ('label', 'int8')
+    ]
+}
+TABLES = tuple(COLUMNS)
+
+
+class ExportUnavailable(Exception):
+    """Raised when pyarrow is not installed."""
+
+
+def report_label(count):
+    for threshold, label in LABEL_THRESHOLDS:
+        if count > threshold:
+            return label
+    return 0
+
+
+def _pair_counts(result):
+    """
+    FAERS counts for the analysis' drug x symptom pairs. Only non-zero
+    counts are stored, so the other checked pairs are 0, unless openFDA was
+    unavailable or the check was cut short (then they are unknown).
+    """
+    faers = result.get('faers_data') or {}
+    counts = {(d['drug'].lower(), d['symptom'].lower()): d['reports'] for d in faers.get('details', [])}
+    if not faers.get('complete') or OPENFDA in result.get('degraded_upstreams', []):
+        return counts
+    skipped = {(p['drug'].lower(), p['symptom'].lower()) for p in faers.get('skipped_pairs', [])}
+    entities = result.get('entities', [])
+    drugs = [e['Text'].lower() for e in entities if e.get('Category') == 'MEDICATION']
+    symptoms = [e['Text'].lower() for e in entities if e.get('Category') == 'MEDICAL_CONDITION']
+    for pair in ((drug, symptom) for drug in drugs for symptom in symptoms):
+        if pair not in skipped:
+            counts.setdefault(pair, 0)
+    return counts
+
+
+def table_rows(table, summary, result):
+    """The table's rows (dicts keyed by COLUMNS) for one stored analysis."""
+    created_at = int(summary['created_at'] * 1000)
+    level = summary['risk_level']
+    if table == 'analyses':
+        entities = result.get('entities', [])
+        ml = result.get('ml_analysis') or {}
+        faers = result.get('faers_data') or {}
+        return [{
+            'analysis_id': summary['analysis_id'],
+            'created_at': created_at,
+            'file_name': summary['file_name'],
+            'risk_level': level,
+            'risk_score': summary['risk_score'],
+            'total_reports': summary['total_reports'],
+            'ml_prediction': ml.get('ml_prediction'),
+            'ml_confidence': ml.get('ml_confidence'),
+            'medications': sum(1 for e in entities if e.get('Category') == 'MEDICATION'),
+            'conditions': sum(1 for e in entities if e.get('Category') == 'MEDICAL_CONDITION'),
+            'faers_pairs': faers.get('pairs_total', len(faers.get('details', []))),
+            'faers_complete': faers.get('complete'),
+            'nlp_source': result.get('nlp_source')
+        }]
+    if table == 'entities':
+        return [{
+            'analysis_id': summary['analysis_id'],
+            'created_at': created_at,
+            'risk_level': level,
+            'category': e.get('Category'),
+            'type': e.get('Type'),
+            'text': e.get('Text'),
+            'frequency': e.get('Frequency', 1),
+            'score': e.get('Score'),
+            'speaker': e.get('Speaker')
+        } for e in result.get('entities', [])]
+    if table == 'pairs':
+        return [{
+            'analysis_id': summary['analysis_id'],
+            'created_at': created_at,
+            'risk_level': level,
+            'drug': drug,
+            'symptom': symptom,
+            'faers_reports': count,
+            'label': report_label(count)
+        } for (drug, symptom), count in _pair_counts(result).items()]
+    raise ValueError(f"Unknown export table: {table}")
+
+
+def iter_row_groups(store, table, row_group_size=DEFAULT_ROW_GROUP_SIZE, **filters):
+    """
+    Lists of exactly row_group_size rows (the last may be shorter) for the
+    analyses matching filters (see AnalysisStore.iter_results).
+    """
+    if table not in COLUMNS:
+        raise ValueError(f"Unknown export table: {table}")
+    rows = []
+    for summary, result in store.iter_results(**filters):
+        rows.extend(table_rows(table, summary, result))
+        while len(rows) >= row_group_size:
+            yield rows[:row_group_size]
+            del rows[:row_group_size]
+    if rows:
+        yield rows
+
+
+def schema(table):
+    if pa is None:
+        raise ExportUnavailable("Export requires pyarrow")
+    types = {
+        'string': pa.string(), 'float64': pa.float64(), 'int64': pa.int64(), 'int32': pa.int32(),
+        'int8': pa.int8(), 'bool': pa.bool_(), 'timestamp': pa.timestamp('ms', tz='UTC')
+    }
+    return pa.schema([(name, types[kind]) for name, kind in COLUMNS[table]])
+
+
+def _open_writer(sink, fmt, table_schema):
+    if fmt == 'parquet':
+        return pq.ParquetWriter(sink, table_schema)
+    return pa.ipc.new_stream(sink, table_schema)
+
+
+def write_export(store, table, sink, fmt='parquet', row_group_size=DEFAULT_ROW_GROUP_SIZE, **filters):
+    """
+    Writes the table to sink (a path or writable binary file), one row group
+    (or record batch) at a time. An export without rows still has a schema.
+
+    Returns:
+        int: rows written
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    table_schema = schema(table)
+    writer = _open_writer(sink, fmt, table_schema)
+    rows_written = 0
+    try:
+        for rows in iter_row_groups(store, table, row_group_size, **filters):
+            writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=table_schema))
+            rows_written += len(rows)
+    finally:
+        writer.close()
+    return rows_written
+
+
+class _ChunkSink:
+    """Write-only file that hands what was written since the last drain() to a streaming response."""
+
+    def __init__(self):
+        self.closed = False
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def writable(self):
+        return True
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_export(store, table, fmt='parquet', row_group_size=DEFAULT_ROW_GROUP_SIZE, **filters):
+    """
+    The export as a generator of byte chunks, one per row group, for a
+    streaming HTTP response. Validates its arguments before the first chunk.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if table not in COLUMNS:
+        raise ValueError(f"Unknown export table: {table}")
+    table_schema = schema(table)
+
+    def generate():
+        sink = _ChunkSink()
+        writer = _open_writer(sink, fmt, table_schema)
+        try:
+            for rows in iter_row_groups(store, table, row_group_size, **filters):
+                writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=table_schema))
+                chunk = sink.drain()
+                if chunk:
+                    yield chunk
+        finally:
+            writer.close()
+        yield sink.drain()
+
+    return generate()
@@ -0,0 +1,436 @@
+"""
+Analysis Store - persists /analyze results in SQLite (WAL mode).
+Writes are queued and committed in batches by a background thread so
+persistence never adds latency to the request path. Each record is
+inserted under its own savepoint, so one bad record does not cost the
+rest of its batch; when the bounded queue is full, new records are
+dropped and counted rather than held in memory.
+Population aggregates (per drug, symptom, pair, risk level and day) are
+maintained incrementally in the same transaction as each insert.
+"""
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+from .resilience import env_float
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'analyses.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    analysis_id TEXT NOT NULL UNIQUE,
+    created_at REAL NOT NULL,
+    file_name TEXT,
+    risk_level TEXT,
+    risk_score REAL,
+    total_reports INTEGER,
+    result TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_created ON analyses (created_at);
+CREATE INDEX IF NOT EXISTS idx_analyses_level ON analyses (risk_level, id);
+CREATE INDEX IF NOT EXISTS idx_analyses_score ON analyses (risk_score);
+
+CREATE TABLE IF NOT EXISTS analysis_entities (
+    analysis_row INTEGER NOT NULL REFERENCES analyses (id),
+    category TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entities_lookup ON analysis_entities (category, text, analysis_row);
+
+CREATE TABLE IF NOT EXISTS agg_drugs (
+    drug TEXT PRIMARY KEY,
+    encounters INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_agg_drugs_count ON agg_drugs (encounters);
+
+CREATE TABLE IF NOT EXISTS agg_symptoms (
+    symptom TEXT PRIMARY KEY,
+    encounters INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_agg_symptoms_count ON agg_symptoms (encounters);
+
+CREATE TABLE IF NOT EXISTS agg_pairs (
+    drug TEXT NOT NULL,
+    symptom TEXT NOT NULL,
+    encounters INTEGER NOT NULL DEFAULT 0,
+    reports INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (drug, symptom)
+);
+CREATE INDEX IF NOT EXISTS idx_agg_pairs_count ON agg_pairs (encounters);
+
+CREATE TABLE IF NOT EXISTS agg_levels (
+    risk_level TEXT PRIMARY KEY,
+    encounters INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS agg_days (
+    day TEXT NOT NULL,
+    risk_level TEXT NOT NULL,
+    encounters INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, risk_level)
+);
+"""
+
+AGGREGATE_TABLES = ('agg_drugs', 'agg_symptoms', 'agg_pairs', 'agg_levels', 'agg_days')
+
+SUMMARY_COLUMNS = "id, analysis_id, created_at, file_name, risk_level, risk_score, total_reports"
+
+
+class AnalysisStore:
+    def __init__(self, db_path=None, batch_size=100, flush_interval=0.5, max_queued=None):
+        self.db_path = db_path or os.getenv('ANALYSIS_DB_PATH', DEFAULT_DB_PATH)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queued = int(env_float('ANALYSIS_STORE_MAX_QUEUE', 10000)) if max_queued is None else max_queued
+        # Records not persisted: queue full, or failed to insert
+        self.dropped = {'queue_full': 0, 'write_error': 0}
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        conn.close()
+
+        self.start_writer()
+
+    def start_writer(self):
+        """
+        Starts the background writer. Also called in forked server workers,
+        where the parent's thread (and anything it had queued) does not exist.
+        """
+        self._queue = queue.Queue(maxsize=self.max_queued)
+        self._local = threading.local()
+        self._writer = threading.Thread(target=self._write_loop, name='analysis-store', daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self):
+        # One read connection per thread; WAL lets readers run alongside the writer
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def save(self, analysis_id, result, file_name=None, created_at=None):
+        """
+        Queues an analysis for persistence. Never blocks on disk; returns
+        False if the queue is full and the analysis was dropped.
+        """
+        try:
+            self._queue.put_nowait({
+                'analysis_id': analysis_id,
+                'created_at': created_at or time.time(),
+                'file_name': file_name,
+                'result': result
+            })
+        except queue.Full:
+            self.dropped['queue_full'] += 1
+            print(f"Analysis store queue full ({self.max_queued}); dropped {analysis_id}")
+            return False
+        return True
+
+    def stats(self):
+        return {"queued": self._queue.qsize(), "max_queued": self.max_queued, "dropped": dict(self.dropped)}
+
+    def flush(self):
+        """Blocks until every queued analysis has been written."""
+        self._queue.join()
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                with conn:
+                    conn.execute("BEGIN")
+                    for record in batch:
+                        self._insert_isolated(conn, record)
+            except Exception as e:
+                self.dropped['write_error'] += len(batch)
+                print(f"Analysis store write error, {len(batch)} analyses lost: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _insert_isolated(self, conn, record):
+        """Inserts one record; if it fails, only its own writes are rolled back."""
+        conn.execute("SAVEPOINT record")
+        try:
+            self._insert(conn, record)
+        except Exception as e:
+            conn.execute("ROLLBACK TO record")
+            self.dropped['write_error'] += 1
+            print(f"Analysis store dropped {record['analysis_id']}: {e}")
+        finally:
+            conn.execute("RELEASE record")
+
+    def _insert(self, conn, record):
+        result = record['result']
+        risk = result.get('risk_analysis', {})
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO analyses "
+            "(analysis_id, created_at, file_name, risk_level, risk_score, total_reports, result) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                record['analysis_id'],
+                record['created_at'],
+                record['file_name'],
+                risk.get('level'),
+                risk.get('score'),
+                result.get('faers_data', {}).get('total_reports', 0),
+                json.dumps(result)
+            )
+        )
+        if not cursor.rowcount:
+            return
+        row_id = cursor.lastrowid
+        entities = self._entity_keys(result)
+        conn.executemany(
+            "INSERT INTO analysis_entities (analysis_row, category, text) VALUES (?, ?, ?)",
+            [(row_id, category, text) for category, text in entities]
+        )
+        self._update_aggregates(conn, result, record['created_at'], entities)
+
+    @staticmethod
+    def _entity_keys(result):
+        return {
+            (e.get('Category'), e.get('Text', '').lower())
+            for e in result.get('entities', [])
+            if e.get('Category') in ('MEDICATION', 'MEDICAL_CONDITION')
+        }
+
+    @staticmethod
+    def _update_aggregates(conn, result, created_at, entities):
+        """Adds one encounter to every aggregate it contributes to."""
+        drugs = sorted(text for category, text in entities if category == 'MEDICATION')
+        symptoms = sorted(text for category, text in entities if category == 'MEDICAL_CONDITION')
+        reports = {
+            (d['drug'].lower(), d['symptom'].lower()): d['reports']
+            for d in result.get('faers_data', {}).get('details', [])
+        }
+        level = result.get('risk_analysis', {}).get('level') or 'Unknown'
+        day = datetime.fromtimestamp(created_at, timezone.utc).strftime('%Y-%m-%d')
+
+        conn.executemany(
+            "INSERT INTO agg_drugs (drug, encounters) VALUES (?, 1) "
+            "ON CONFLICT (drug) DO UPDATE SET encounters = encounters + 1",
+            [(drug,) for drug in drugs]
+        )
+        conn.executemany(
+            "INSERT INTO agg_symptoms (symptom, encounters) VALUES (?, 1) "
+            "ON CONFLICT (symptom) DO UPDATE SET encounters = encounters + 1",
+            [(symptom,) for symptom in symptoms]
+        )
+        conn.executemany(
+            "INSERT INTO agg_pairs (drug, symptom, encounters, reports) VALUES (?, ?, 1, ?) "
+            "ON CONFLICT (drug, symptom) DO UPDATE SET "
+            "encounters = encounters + 1, reports = reports + excluded.reports",
+            [(drug, symptom, reports.get((drug, symptom), 0)) for drug in drugs for symptom in symptoms]
+        )
+        conn.execute(
+            "INSERT INTO agg_levels (risk_level, encounters) VALUES (?, 1) "
+            "ON CONFLICT (risk_level) DO UPDATE SET encounters = encounters + 1",
+            (level,)
+        )
+        conn.execute(
+            "INSERT INTO agg_days (day, risk_level, encounters) VALUES (?, ?, 1) "
+            "ON CONFLICT (day, risk_level) DO UPDATE SET encounters = encounters + 1",
+            (day, level)
+        )
+
+    def rebuild_aggregates(self, batch_size=1000):
+        """
+        Recomputes every aggregate from the stored analyses (for backfills
+        or after changing aggregation rules). Runs in a single transaction,
+        so live writes wait and the dashboard never sees a partial rebuild.
+        Returns the number of analyses scanned.
+        """
+        conn = self._connect()
+        scanned = 0
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for table in AGGREGATE_TABLES:
+                conn.execute(f"DELETE FROM {table}")
+            rows = conn.execute("SELECT created_at, result FROM analyses ORDER BY id")
+            while True:
+                batch = rows.fetchmany(batch_size)
+                if not batch:
+                    break
+                for row in batch:
+                    result = json.loads(row['result'])
+                    self._update_aggregates(conn, result, row['created_at'], self._entity_keys(result))
+                scanned += len(batch)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        return scanned
+
+    def aggregates(self, top=10, days=30):
+        """
+        Population statistics for the dashboard. Every query reads a bounded
+        slice of an aggregate table, so cost does not grow with history size.
+        """
+        conn = self._reader()
+        levels = {
+            row['risk_level']: row['encounters']
+            for row in conn.execute("SELECT risk_level, encounters FROM agg_levels")
+        }
+        top_drugs = conn.execute(
+            "SELECT drug, encounters FROM agg_drugs ORDER BY encounters DESC LIMIT ?", (top,)
+        ).fetchall()
+        top_symptoms = conn.execute(
+            "SELECT symptom, encounters FROM agg_symptoms ORDER BY encounters DESC LIMIT ?", (top,)
+        ).fetchall()
+        top_pairs = conn.execute(
+            "SELECT drug, symptom, encounters, reports FROM agg_pairs "
+            "ORDER BY encounters DESC LIMIT ?", (top,)
+        ).fetchall()
+        since = datetime.fromtimestamp(time.time() - days * 86400, timezone.utc).strftime('%Y-%m-%d')
+        daily = conn.execute(
+            "SELECT day, risk_level, encounters FROM agg_days WHERE day >= ? ORDER BY day", (since,)
+        ).fetchall()
+
+        return {
+            "totals": {
+                "total_calls": sum(levels.values()),
+                "critical_calls": levels.get('Critical', 0),
+                "moderate_calls": levels.get('Moderate', 0),
+                "low_risk_calls": levels.get('Low Risk', 0)
+            },
+            "risk_levels": levels,
+            "top_drugs": [dict(row) for row in top_drugs],
+            "top_symptoms": [dict(row) for row in top_symptoms],
+            "top_pairs": [dict(row) for row in top_pairs],
+            "daily": [dict(row) for row in daily]
+        }
+
+    def get(self, analysis_id):
+        """Returns the full stored result for an analysis, or None."""
+        row = self._reader().execute(
+            f"SELECT {SUMMARY_COLUMNS}, result FROM analyses WHERE analysis_id = ?",
+            (analysis_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        record = self._summary(row)
+        record['result'] = json.loads(row['result'])
+        return record
+
+    def list_analyses(self, limit=20, cursor=None, risk_level=None, min_score=None,
+                      max_score=None, since=None, until=None, drug=None, symptom=None):
+        """
+        Newest-first page of analysis summaries using keyset pagination.
+
+        Args:
+            cursor: next_cursor from the previous page (opaque row id).
+            since/until: Unix timestamps bounding created_at.
+            drug/symptom: Case-insensitive exact entity match.
+
+        Returns:
+            dict: {"items": [...], "next_cursor": str or None}
+        """
+        clauses, params = [], []
+        if cursor:
+            clauses.append("id < ?")
+            params.append(int(cursor))
+        if risk_level:
+            clauses.append("risk_level = ?")
+            params.append(risk_level)
+        if min_score is not None:
+            clauses.append("risk_score >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            clauses.append("risk_score <= ?")
+            params.append(max_score)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        for category, text in (('MEDICATION', drug), ('MEDICAL_CONDITION', symptom)):
+            if text:
+                clauses.append(
+                    "id IN (SELECT analysis_row FROM analysis_entities WHERE category = ? AND text = ?)"
+                )
+                params.extend([category, text.lower()])
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._reader().execute(
+            f"SELECT {SUMMARY_COLUMNS} FROM analyses {where} ORDER BY id DESC LIMIT ?",
+            params + [limit + 1]
+        ).fetchall()
+
+        items = [self._summary(row) for row in rows[:limit]]
+        next_cursor = str(rows[limit - 1]['id']) if len(rows) > limit else None
+        return {"items": items, "next_cursor": next_cursor}
+
+    def iter_results(self, since=None, until=None, risk_levels=None, batch_size=500):
+        """
+        Yields (summary, result) for every stored analysis matching the
+        filters, oldest first. Rows are fetched batch_size at a time on a
+        dedicated connection, so memory does not grow with the result set.
+
+        Args:
+            since/until: Unix timestamps bounding created_at.
+            risk_levels: Iterable of risk levels to keep (default: all).
+        """
+        clauses, params = [], []
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        if risk_levels:
+            risk_levels = list(risk_levels)
+            clauses.append(f"risk_level IN ({', '.join('?' * len(risk_levels))})")
+            params.extend(risk_levels)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                f"SELECT {SUMMARY_COLUMNS}, result FROM analyses {where} ORDER BY created_at, id", params
+            )
+            while True:
+                batch = rows.fetchmany(batch_size)
+                if not batch:
+                    break
+                for row in batch:
+                    yield self._summary(row), json.loads(row['result'])
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _summary(row):
+        return {
+            "analysis_id": row['analysis_id'],
+            "created_at": row['created_at'],
+            "file_name": row['file_name'],
+            "risk_level": row['risk_level'],
+            "risk_score": row['risk_score'],
+            "total_reports": row['total_reports']
+        }
@@ -0,0 +1,195 @@
+"""
+Audio Preprocessing - shrinks PCM/WAV uploads before transcription.
+Downmixes to mono, resamples to 16 kHz and trims leading/trailing
+silence with an energy-based voice activity detector.
+Audio is processed in blocks so memory stays flat for long calls.
+"""
+import io
+import tempfile
+import wave
+
+import numpy as np
+
+TARGET_RATE = 16000
+BLOCK_SECONDS = 10
+FRAME_MS = 30
+# Frames quieter than this (dBFS) are always silence; louder frames must also
+# clear the estimated noise floor by VAD_MARGIN_DB to count as voice
+VAD_FLOOR_DB = -50.0
+VAD_MARGIN_DB = 12.0
+PAD_MS = 200
+SPOOL_SIZE = 8 * 1024 * 1024
+
+
+def is_wav(stream):
+    """Checks the RIFF/WAVE header without consuming the stream."""
+    position = stream.tell()
+    header = stream.read(12)
+    stream.seek(position)
+    return header[:4] == b'RIFF' and header[8:12] == b'WAVE'
+
+
+def _lowpass_taps(ratio, num_taps=63):
+    """Windowed-sinc anti-aliasing filter for downsampling by `ratio`."""
+    cutoff = 0.5 / ratio
+    n = np.arange(num_taps) - (num_taps - 1) / 2
+    taps = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(num_taps)
+    return (taps / taps.sum()).astype(np.float32)
+
+
+def _decode_block(raw, sample_width, channels):
+    """PCM bytes -> float32 mono samples in [-1, 1]."""
+    if sample_width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif sample_width == 2:
+        samples = np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768
+    elif sample_width == 3:
+        b = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        ints = b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)
+        ints = np.where(ints & 0x800000, ints - 0x1000000, ints)
+        samples = ints.astype(np.float32) / 8388608
+    elif sample_width == 4:
+        samples = np.frombuffer(raw, dtype='<i4').astype(np.float32) / 2147483648
+    else:
+        raise ValueError(f"Unsupported sample width: {sample_width}")
+
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples
+
+
+def _frame_energies_db(pcm, frame):
+    """RMS energy in dBFS per frame of int16 samples."""
+    usable = len(pcm) - len(pcm) % frame
+    if not usable:
+        return np.empty(0, dtype=np.float32)
+    frames = pcm[:usable].astype(np.float32).reshape(-1, frame) / 32768
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+
+def detect_voice_bounds(energies_db):
+    """
+    Returns (first, last) voiced frame indices, or None when there is no
+    silence to trim: all frames silent, or no quiet stretch to tell the
+    noise floor from speech (continuous speech, a tone).
+    The noise floor is estimated as the 10th percentile frame energy.
+    """
+    if not len(energies_db):
+        return None
+    noise_floor, loud = np.percentile(energies_db, (10, 90))
+    if loud - noise_floor < VAD_MARGIN_DB:
+        return None
+    threshold = max(VAD_FLOOR_DB, noise_floor + VAD_MARGIN_DB)
+    voiced = np.flatnonzero(energies_db > threshold)
+    if not len(voiced):
+        return None
+    return int(voiced[0]), int(voiced[-1])
+
+
+def preprocess_audio(stream):
+    """
+    Converts a WAV stream to trimmed mono 16-bit PCM at no more than 16 kHz.
+
+    Args:
+        stream: Seekable binary file object positioned at the start.
+
+    Returns:
+        (stream, report): the processed WAV (positioned at 0) and a dict of
+        size/duration reductions. Non-WAV input is returned untouched with
+        a None report.
+    """
+    if not is_wav(stream):
+        return stream, None
+
+    stream.seek(0, io.SEEK_END)
+    original_bytes = stream.tell()
+    stream.seek(0)
+
+    with wave.open(stream, 'rb') as reader:
+        channels = reader.getnchannels()
+        sample_width = reader.getsampwidth()
+        rate = reader.getframerate()
+        total_frames = reader.getnframes()
+
+        # Never upsample: narrowband telephone audio stays at its own rate
+        out_rate = min(rate, TARGET_RATE)
+        ratio = rate / out_rate
+        taps = _lowpass_taps(ratio) if ratio > 1 else None
+        history = np.zeros(len(taps) - 1 if taps is not None else 0, dtype=np.float32)
+
+        resampled = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+        energies = []
+        frame = out_rate * FRAME_MS // 1000
+        carry = np.empty(0, dtype=np.int16)
+        consumed = 0   # input samples processed so far
+        produced = 0   # output samples written so far
+
+        block_frames = rate * BLOCK_SECONDS
+        while True:
+            raw = reader.readframes(block_frames)
+            if not raw:
+                break
+            block = _decode_block(raw, sample_width, channels)
+
+            if taps is not None:
+                padded = np.concatenate((history, block))
+                history = padded[-len(history):]
+                block = np.convolve(padded, taps, mode='valid')
+
+            # Output sample j sits at input position j * ratio
+            end = consumed + len(block)
+            last = int(np.ceil(end / ratio))
+            positions = np.arange(produced, last) * ratio - consumed
+            out = np.interp(positions, np.arange(len(block)), block)
+            pcm = np.clip(out * 32768, -32768, 32767).astype(np.int16)
+            resampled.write(pcm.tobytes())
+            consumed = end
+            produced = last
+
+            pending = np.concatenate((carry, pcm))
+            usable = len(pending) - len(pending) % frame
+            energies.append(_frame_energies_db(pending[:usable], frame))
+            carry = pending[usable:]
+
+    original_duration = total_frames / rate if rate else 0
+    energies = np.concatenate(energies) if energies else np.empty(0)
+    bounds = detect_voice_bounds(energies)
+
+    pad = PAD_MS // FRAME_MS
+    if bounds is None:
+        # Nothing to trim safely; send it all rather than an empty file
+        start_sample, end_sample = 0, produced
+    else:
+        start_sample = max(0, bounds[0] - pad) * frame
+        end_sample = min(produced, (bounds[1] + 1 + pad) * frame)
+
+    output = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    with wave.open(output, 'wb') as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(out_rate)
+        resampled.seek(start_sample * 2)
+        remaining = (end_sample - start_sample) * 2
+        while remaining > 0:
+            chunk = resampled.read(min(remaining, 1024 * 1024))
+            if not chunk:
+                break
+            writer.writeframes(chunk)
+            remaining -= len(chunk)
+    resampled.close()
+
+    processed_bytes = output.tell()
+    output.seek(0)
+    processed_duration = (end_sample - start_sample) / out_rate
+
+    report = {
+        "original_bytes": original_bytes,
+        "processed_bytes": processed_bytes,
+        "original_duration": round(original_duration, 2),
+        "processed_duration": round(processed_duration, 2),
+        "original_format": {"sample_rate": rate, "channels": channels, "sample_width": sample_width},
+        "size_reduction": round(original_bytes / processed_bytes, 2) if processed_bytes else None,
+        "trimmed_seconds": round(max(0.0, produced / out_rate - processed_duration), 2)
+    }
+    return output, report
@@ -0,0 +1,88 @@
+"""
+Per-request deadlines.
+A request's Deadline lives in a contextvar, so upstream calls anywhere
+below it (including executor threads started via tracing.propagate) can
+bound their own timeouts by the time the request has left.
+"""
+import contextvars
+import time
+
+MIN_DEADLINE_SECONDS = 1.0
+
+_current_deadline = contextvars.ContextVar('current_deadline', default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a stage or upstream call cannot start or finish within the request deadline."""
+
+    def __init__(self, stage):
+        super().__init__(f"deadline exceeded before {stage} completed")
+        self.stage = stage
+
+
+class Deadline:
+    def __init__(self, seconds):
+        self.budget = seconds
+        self.start = time.monotonic()
+        self.expires_at = self.start + seconds
+
+    @classmethod
+    def from_request(cls, default_seconds, max_seconds, override_ms=None):
+        """The default deadline, or a per-request override clamped to sane bounds."""
+        seconds = default_seconds if override_ms is None else override_ms / 1000
+        return cls(min(max(seconds, MIN_DEADLINE_SECONDS), max_seconds))
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def elapsed(self):
+        return time.monotonic() - self.start
+
+    def expired(self):
+        return time.monotonic() >= self.expires_at
+
+    def check(self, stage):
+        if self.expired():
+            raise DeadlineExceeded(stage)
+
+    def timeout(self, default, stage, reserve=0.0):
+        """
+        default, shortened to the time left (minus reserve). Raises
+        DeadlineExceeded when nothing is left to give.
+        """
+        remaining = self.remaining() - reserve
+        if remaining <= 0:
+            raise DeadlineExceeded(stage)
+        return min(default, remaining) if default else remaining
+
+    def summary(self):
+        return {
+            "budget_ms": round(self.budget * 1000),
+            "elapsed_ms": round(self.elapsed() * 1000, 1),
+            "remaining_ms": round(self.remaining() * 1000, 1)
+        }
+
+
+def current_deadline():
+    return _current_deadline.get()
+
+
+def set_deadline(deadline):
+    """Makes deadline current; pass the returned token to reset_deadline()."""
+    return _current_deadline.set(deadline)
+
+
+def reset_deadline(token):
+    _current_deadline.reset(token)
+
+
+def upstream_timeout(default, minimum=0.1):
+    """
+    An upstream call's timeout: default, bounded by the time the current
+    request has left (never below minimum, so the call can still fail
+    cleanly; callers check expiry before starting).
+    """
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return default
+    return max(minimum, min(default, deadline.remaining()))
@@ -0,0 +1,117 @@
+"""
+In-memory cache of FAERS drug side-effect profiles (top-K reactions per
+drug) behind /drug-profile. /analyze prefetches the profile of every drug
+it detects in the background, so the FAERS chart is usually served from
+memory by the time a clinician opens it.
+
+Configuration:
+    DRUG_PROFILE_TOP_K        Reactions kept per drug (default 10)
+    DRUG_PROFILE_TTL          Seconds before a profile is refetched (default 86400)
+    DRUG_PROFILE_CACHE_SIZE   Profiles kept in memory (default 1000)
+    DRUG_PROFILE_WORKERS      Background prefetch threads (default 4)
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from .resilience import env_float
+
+
+def normalize_drug(name):
+    return (name or '').strip().lower()
+
+
+class DrugProfileCache:
+    def __init__(self, safety_service, top_k=None, ttl=None, max_size=None, workers=None):
+        self.safety_service = safety_service
+        self.top_k = int(env_float('DRUG_PROFILE_TOP_K', 10)) if top_k is None else top_k
+        self.ttl = env_float('DRUG_PROFILE_TTL', 86400) if ttl is None else ttl
+        self.max_size = int(env_float('DRUG_PROFILE_CACHE_SIZE', 1000)) if max_size is None else max_size
+        self.workers = int(env_float('DRUG_PROFILE_WORKERS', 4)) if workers is None else workers
+        self._profiles = OrderedDict()
+        # Drug -> future of the fetch in progress, shared by concurrent callers
+        self._inflight = {}
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+        self.start_workers()
+
+    def start_workers(self):
+        """Also called in forked server workers, where the parent's threads do not exist."""
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='drug-profile')
+        self._inflight = {}
+
+    def get(self, drug):
+        """The cached, fresh profile for drug, or None."""
+        drug = normalize_drug(drug)
+        with self._lock:
+            profile = self._profiles.get(drug)
+            if profile is None or time.time() - profile['fetched_at'] >= self.ttl:
+                self._misses += 1
+                return None
+            self._profiles.move_to_end(drug)
+            self._hits += 1
+            return profile
+
+    def get_many(self, drugs, timeout=None):
+        """
+        Profiles for several drugs in one call: cached ones from memory, the
+        rest fetched in parallel, waiting up to timeout seconds. Drugs whose
+        profile is unavailable map to None.
+        """
+        drugs = list(dict.fromkeys(normalize_drug(d) for d in drugs if normalize_drug(d)))
+        profiles = {drug: self.get(drug) for drug in drugs}
+        futures = {drug: self._fetch_async(drug) for drug, profile in profiles.items() if profile is None}
+        if futures:
+            wait(futures.values(), timeout=timeout)
+            for drug, future in futures.items():
+                if future.done() and future.exception() is None:
+                    profiles[drug] = future.result()
+        return profiles
+
+    def prefetch(self, drugs):
+        """Starts background fetches for drugs without a fresh profile; never blocks."""
+        for drug in drugs:
+            drug = normalize_drug(drug)
+            if drug and not self._is_fresh(drug):
+                self._fetch_async(drug)
+
+    def _is_fresh(self, drug):
+        with self._lock:
+            profile = self._profiles.get(drug)
+            return profile is not None and time.time() - profile['fetched_at'] < self.ttl
+
+    def _fetch_async(self, drug):
+        with self._lock:
+            future = self._inflight.get(drug)
+            if future is None:
+                future = self._inflight[drug] = self._pool.submit(self._fetch, drug)
+            return future
+
+    def _fetch(self, drug):
+        try:
+            reactions = self.safety_service.fetch_drug_profile(drug, limit=self.top_k)
+            profile = {
+                "drug": drug,
+                "reactions": [{"term": r.get('term'), "count": r.get('count')} for r in reactions],
+                "fetched_at": time.time()
+            }
+            with self._lock:
+                self._profiles[drug] = profile
+                self._profiles.move_to_end(drug)
+                while len(self._profiles) > self.max_size:
+                    self._profiles.popitem(last=False)
+            return profile
+        finally:
+            with self._lock:
+                self._inflight.pop(drug, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "profiles": len(self._profiles),
+                "fetching": len(self._inflight),
+                "hits": self._hits,
+                "misses": self._misses
+            }
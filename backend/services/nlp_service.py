@@ -1,26 +1,81 @@
 import boto3
+from botocore.config import Config
 import os
+import time
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+
+from .deadline import DeadlineExceeded
+from .resilience import COMPREHEND_MEDICAL, CircuitOpenError, UpstreamError, env_float, get_breaker
+from .scheduling import get_gate
+from .request_profiler import profiled
+from .tracing import propagate
+from .traffic_capture import record_upstream
 
 class MedicalNLPService:
     def __init__(self):
+        timeout = env_float('COMPREHEND_TIMEOUT', 10)
         self.client = boto3.client(
             service_name='comprehendmedical',
             region_name=os.getenv('AWS_REGION', 'us-east-1'),
             aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY')
+            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+            config=Config(
+                connect_timeout=timeout,
+                read_timeout=timeout,
+                retries={'max_attempts': 2, 'mode': 'standard'}
+            )
         )
+        self.breaker = get_breaker(COMPREHEND_MEDICAL)
+        # Queues calls by the current priority while Comprehend is saturated
+        self.gate = get_gate(COMPREHEND_MEDICAL)
+        self.max_parallel = int(env_float('NLP_MAX_PARALLEL', 4))
 
     def analyze_text(self, text):
         """
         Extracts medical entities from the given text using AWS Comprehend Medical.
         Returns a list of high-confidence entities.
+        Raises CircuitOpenError when Comprehend Medical is known to be degraded,
+        and DeadlineExceeded when the request deadline passes first.
+        """
+        entities = self._detect_entities(text)
+        for entity in entities:
+            del entity['BeginOffset']
+        return entities
+
+    def analyze_segments(self, segments):
+        """
+        Analyzes speaker segments (see logic.speaker_attribution) with parallel
+        Comprehend Medical calls. Entities come back in transcript order, each
+        attributed with 'Speaker' and the 'UtteranceStart' time it came from.
+        Raises CircuitOpenError when Comprehend Medical is known to be degraded.
         """
+        def analyze(segment):
+            entities = self._detect_entities(segment['text'])
+            offsets = [offset for offset, _ in segment['offsets']]
+            for entity in entities:
+                index = max(0, bisect_right(offsets, entity.pop('BeginOffset')) - 1)
+                entity['Speaker'] = segment['speaker']
+                entity['UtteranceStart'] = segment['offsets'][index][1] if offsets else None
+            return entities
+
+        if len(segments) <= 1:
+            return analyze(segments[0]) if segments else []
+        with ThreadPoolExecutor(max_workers=min(self.max_parallel, len(segments))) as executor:
+            results = list(executor.map(profiled(propagate(analyze)), segments))
+        return [entity for entities in results for entity in entities]
+
+    def _detect_entities(self, text):
         if not text:
             return []
 
+        start = time.monotonic()
         try:
-            response = self.client.detect_entities_v2(Text=text)
+            with self.gate.slot():
+                start = time.monotonic()
+                response = self.breaker.deadline_bound_call(self.client.detect_entities_v2, Text=text)
             entities = response.get('Entities', [])
+            record_upstream(COMPREHEND_MEDICAL, text, entities, time.monotonic() - start)
             
             # Filter for high confidence and relevant types
             filtered_entities = []
@@ -31,13 +86,16 @@ class MedicalNLPService:
                         'Category': entity.get('Category'),
                         'Type': entity.get('Type'),
                         'Score': entity.get('Score'),
-                        'Traits': entity.get('Traits', [])
+                        'Traits': entity.get('Traits', []),
+                        'BeginOffset': entity.get('BeginOffset', 0)
                     })
             
             return filtered_entities
 
+        except (CircuitOpenError, DeadlineExceeded):
+            raise
         except Exception as e:
+            record_upstream(COMPREHEND_MEDICAL, text, None, time.monotonic() - start, error=type(e).__name__)
             print(f"AWS Comprehend Error: {e}")
-            # For development without valid AWS keys, we might want to return mock data
-            # raise e
-            return []
+            # The caller falls back to the local extractor (NLP_LOCAL_MODE)
+            raise UpstreamError(COMPREHEND_MEDICAL, e) from e
@@ -0,0 +1,139 @@
+"""
+Precomputed FAERS report counts for drug x symptom pairs, the first lookup
+tier of SafetyService (ahead of the in-memory cache and openFDA).
+
+scripts/build_pair_matrix.py turns collected counts (e.g.
+analysis/results/training_data_robust.csv) into a dense int32 matrix saved
+as .npy, plus a JSON sidecar with the drug and symptom vocabularies and
+the date the counts were collected. The matrix is memory-mapped, so every
+server worker shares one copy from the page cache. Pairs never collected
+hold -1 and fall through to openFDA.
+
+Configuration:
+    FAERS_MATRIX_PATH           Matrix file (default models/faers_pair_counts.npy; empty disables)
+    FAERS_MATRIX_MAX_AGE_DAYS   Ignore the matrix once its counts are older (default 0 = never)
+"""
+import datetime
+import json
+import os
+
+import numpy as np
+
+from .resilience import env_float
+
+MATRIX_PATH = os.path.join(os.path.dirname(__file__), '..', 'models', 'faers_pair_counts.npy')
+UNKNOWN = -1
+
+
+def normalize_term(term):
+    return ' '.join((term or '').lower().split())
+
+
+def metadata_path(path):
+    return os.path.splitext(path)[0] + '.json'
+
+
+def build_pair_matrix(rows, as_of, sources=()):
+    """
+    Dense matrix from (drug, symptom, count) rows; a later row for the same
+    pair wins, so newer collections can be appended to older ones.
+
+    Returns:
+        tuple: (int32 matrix, metadata dict)
+    """
+    counts = {}
+    for drug, symptom, count in rows:
+        drug, symptom = normalize_term(drug), normalize_term(symptom)
+        if drug and symptom:
+            counts[(drug, symptom)] = int(count)
+    drugs = sorted({drug for drug, _ in counts})
+    symptoms = sorted({symptom for _, symptom in counts})
+    drug_index = {drug: i for i, drug in enumerate(drugs)}
+    symptom_index = {symptom: i for i, symptom in enumerate(symptoms)}
+
+    matrix = np.full((len(drugs), len(symptoms)), UNKNOWN, dtype=np.int32)
+    for (drug, symptom), count in counts.items():
+        matrix[drug_index[drug], symptom_index[symptom]] = count
+    metadata = {
+        "as_of": as_of,
+        "drugs": drugs,
+        "symptoms": symptoms,
+        "pairs": len(counts),
+        "sources": list(sources)
+    }
+    return matrix, metadata
+
+
+def save_pair_matrix(path, matrix, metadata):
+    """Writes the matrix and its sidecar, each replaced atomically."""
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        np.save(f, matrix)
+    os.replace(tmp, path)
+    tmp = metadata_path(path) + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(metadata, f, indent=1)
+    os.replace(tmp, metadata_path(path))
+
+
+class PairCountMatrix:
+    def __init__(self, path):
+        with open(metadata_path(path)) as f:
+            metadata = json.load(f)
+        self.path = path
+        self.matrix = np.load(path, mmap_mode='r')
+        self.as_of = metadata['as_of']
+        self.sources = metadata.get('sources', [])
+        self._drugs = {drug: i for i, drug in enumerate(metadata['drugs'])}
+        self._symptoms = {symptom: i for i, symptom in enumerate(metadata['symptoms'])}
+        if self.matrix.shape != (len(self._drugs), len(self._symptoms)):
+            raise ValueError(f"{path}: matrix shape {self.matrix.shape} does not match its vocabularies")
+        self.pairs = metadata.get('pairs', int((self.matrix != UNKNOWN).sum()))
+
+    def get(self, drug, symptom):
+        """Returns (found, count)."""
+        i = self._drugs.get(normalize_term(drug))
+        j = self._symptoms.get(normalize_term(symptom))
+        if i is None or j is None:
+            return False, None
+        count = int(self.matrix[i, j])
+        if count == UNKNOWN:
+            return False, None
+        return True, count
+
+    def __contains__(self, pair):
+        return self.get(*pair)[0]
+
+    def age_days(self, today=None):
+        today = today or datetime.date.today()
+        return (today - datetime.date.fromisoformat(self.as_of)).days
+
+    def stats(self):
+        return {
+            "as_of": self.as_of,
+            "age_days": self.age_days(),
+            "drugs": len(self._drugs),
+            "symptoms": len(self._symptoms),
+            "pairs": self.pairs
+        }
+
+
+def load_pair_matrix(path=None, max_age_days=None):
+    """
+    The configured matrix, or None when it is disabled, missing, unreadable
+    or older than max_age_days.
+    """
+    path = os.getenv('FAERS_MATRIX_PATH', MATRIX_PATH) if path is None else path
+    if max_age_days is None:
+        max_age_days = env_float('FAERS_MATRIX_MAX_AGE_DAYS', 0)
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        matrix = PairCountMatrix(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Warning: FAERS pair matrix {path} could not be loaded: {e}")
+        return None
+    if max_age_days and matrix.age_days() > max_age_days:
+        print(f"Warning: FAERS pair matrix {path} is {matrix.age_days()} days old (as of {matrix.as_of}); ignoring it")
+        return None
+    return matrix
@@ -0,0 +1,179 @@
+"""
+On-demand per-request profiling.
+A single /analyze request can be profiled end to end (including the FAERS,
+NLP segment and upstream hedging threads) by sending X-Profile-Token
+matching PROFILE_TOKEN. The merged cProfile stats and a wall-clock stage
+timeline are written to PROFILE_DIR and retrievable by request ID.
+Unprofiled requests only pay for a header lookup and no-op method calls.
+"""
+import contextvars
+import cProfile
+import hmac
+import io
+import json
+import os
+import pstats
+import re
+import threading
+import time
+
+DEFAULT_PROFILE_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'profiles')
+REQUEST_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+class NullProfile:
+    """Stand-in used when profiling is off; every hook is a no-op."""
+    enabled = False
+
+    def mark(self, stage):
+        pass
+
+    def wrap(self, fn):
+        return fn
+
+    def finish(self):
+        pass
+
+
+NULL_PROFILE = NullProfile()
+
+_current_profile = contextvars.ContextVar('current_profile', default=NULL_PROFILE)
+
+
+def set_profile(profile):
+    """Makes profile current; pass the returned token to reset_profile()."""
+    return _current_profile.set(profile)
+
+
+def reset_profile(token):
+    _current_profile.reset(token)
+
+
+def profiled(fn):
+    """
+    fn, profiled in whichever worker thread runs it if the current request
+    is being profiled. Wrap a task already bound with tracing.propagate.
+    """
+    return _current_profile.get().wrap(fn)
+
+
+class RequestProfile:
+    enabled = True
+
+    def __init__(self, request_id, profile_dir, on_finish=None):
+        self.request_id = request_id
+        self.profile_dir = profile_dir
+        self._on_finish = on_finish
+        self._lock = threading.Lock()
+        self._thread_stats = []
+        self._timeline = []
+        self._stage = None
+        self._t0 = time.perf_counter()
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+
+    def _span(self, name, start, end):
+        with self._lock:
+            self._timeline.append({
+                "name": name,
+                "thread": threading.current_thread().name,
+                "start_ms": round((start - self._t0) * 1000, 3),
+                "duration_ms": round((end - start) * 1000, 3)
+            })
+
+    def mark(self, stage):
+        """Ends the current pipeline stage (if any) and starts the next one."""
+        now = time.perf_counter()
+        if self._stage:
+            self._span(self._stage[0], self._stage[1], now)
+        self._stage = (stage, now) if stage else None
+
+    def wrap(self, fn):
+        """Profiles fn in whichever worker thread runs it."""
+        def profiled(*args, **kwargs):
+            profiler = cProfile.Profile()
+            start = time.perf_counter()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Python 3.12+ profiles every thread from the request's
+                # profiler and refuses a second one; nothing to merge then
+                profiler = None
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                if profiler:
+                    profiler.disable()
+                    with self._lock:
+                        self._thread_stats.append(profiler)
+                self._span(getattr(fn, '__name__', 'task'), start, time.perf_counter())
+        return profiled
+
+    def finish(self):
+        """Stops profiling and writes <id>.prof (pstats) and <id>.json."""
+        self.mark(None)
+        self._profiler.disable()
+        total_ms = round((time.perf_counter() - self._t0) * 1000, 3)
+        try:
+            stats = pstats.Stats(self._profiler)
+            for profiler in self._thread_stats:
+                stats.add(profiler)
+
+            os.makedirs(self.profile_dir, exist_ok=True)
+            base = os.path.join(self.profile_dir, self.request_id)
+            stats.dump_stats(f"{base}.prof")
+
+            text = io.StringIO()
+            pstats.Stats(f"{base}.prof", stream=text).sort_stats('cumulative').print_stats(40)
+            with open(f"{base}.json", 'w') as f:
+                json.dump({
+                    "request_id": self.request_id,
+                    "total_ms": total_ms,
+                    "timeline": sorted(self._timeline, key=lambda s: s['start_ms']),
+                    "call_tree": text.getvalue()
+                }, f, indent=2)
+        except Exception as e:
+            print(f"Profile write error: {e}")
+        finally:
+            if self._on_finish:
+                self._on_finish()
+
+
+class RequestProfiler:
+    def __init__(self, token=None, profile_dir=None):
+        self.token = token if token is not None else os.getenv('PROFILE_TOKEN')
+        self.profile_dir = profile_dir or os.getenv('PROFILE_DIR', DEFAULT_PROFILE_DIR)
+        # One profiled request at a time keeps overhead bounded and avoids
+        # clashing interpreter-wide profilers
+        self._active = threading.Lock()
+
+    def authorized(self, supplied_token):
+        """Profiling is off unless PROFILE_TOKEN is configured and matches."""
+        if not self.token or not supplied_token:
+            return False
+        return hmac.compare_digest(self.token.encode(), supplied_token.encode())
+
+    def start(self, request_id, supplied_token):
+        """Returns a live RequestProfile if authorized, else NULL_PROFILE."""
+        if not self.authorized(supplied_token):
+            return NULL_PROFILE
+        if not self._active.acquire(blocking=False):
+            print(f"Profiling skipped for {request_id}: another request is being profiled")
+            return NULL_PROFILE
+        try:
+            return RequestProfile(request_id, self.profile_dir, on_finish=self._active.release)
+        except Exception:
+            self._active.release()
+            raise
+
+    def load(self, request_id, binary=False):
+        """Returns the stored profile (JSON dict, or .prof path) or None."""
+        if not REQUEST_ID_PATTERN.match(request_id):
+            return None
+        path = os.path.join(self.profile_dir, f"{request_id}.{'prof' if binary else 'json'}")
+        if not os.path.exists(path):
+            return None
+        if binary:
+            return path
+        with open(path) as f:
+            return json.load(f)
@@ -0,0 +1,288 @@
+"""
+Per-upstream resilience primitives.
+Circuit breakers that fail fast once an upstream is degraded, plus
+p95-delayed hedging for idempotent calls.
+"""
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .deadline import DeadlineExceeded, current_deadline
+from .request_profiler import profiled
+from .tracing import KIND_CLIENT, propagate, set_attribute, tracer
+
+# Upstream names used as breaker keys and in the response's degraded list
+DEEPGRAM = 'deepgram'
+COMPREHEND_MEDICAL = 'comprehend_medical'
+OPENFDA = 'openfda'
+
+
+def env_float(name, default):
+    """Reads a float setting from the environment, falling back on bad values."""
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return float(default)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the upstream's circuit is open."""
+
+    def __init__(self, upstream):
+        super().__init__(f"{upstream} is unavailable (circuit open)")
+        self.upstream = upstream
+
+
+class UpstreamError(Exception):
+    """Raised when an upstream call failed and no trustworthy value exists."""
+
+    def __init__(self, upstream, cause):
+        super().__init__(f"{upstream} request failed: {cause}")
+        self.upstream = upstream
+
+
+class LatencyTracker:
+    """Rolling window of call latencies used for percentile estimates."""
+
+    MIN_SAMPLES = 20
+
+    def __init__(self, window=200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct):
+        """Returns the pct-th percentile, or None until enough samples exist."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < self.MIN_SAMPLES:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+
+class CircuitBreaker:
+    """
+    Trips after consecutive failures (errors or latency SLO breaches) and
+    rejects calls until reset_timeout has passed, then lets one probe through.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0, latency_slo=None,
+                 hedging=True):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.latency_slo = latency_slo
+        self.hedging = hedging
+        self.latency = LatencyTracker()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self):
+        """Returns True if a call may proceed right now."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self, elapsed):
+        self.latency.record(elapsed)
+        if self.latency_slo is not None and elapsed > self.latency_slo:
+            self.record_failure()
+            return
+        with self._lock:
+            self._failures = 0
+            self._state = self.CLOSED
+            self._probe_in_flight = False
+
+    def release_probe(self):
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    print(f"Circuit opened for {self.name} after {self._failures} failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def call(self, fn, *args, **kwargs):
+        """Runs fn through the breaker, raising CircuitOpenError when tripped."""
+        with tracer.span(f"upstream.{self.name}", kind=KIND_CLIENT, **{'peer.service': self.name}) as span:
+            if not self.allow():
+                span.set_attribute('circuit.open', True)
+                raise CircuitOpenError(self.name)
+            start = time.monotonic()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                deadline = current_deadline()
+                if deadline is not None and deadline.expired():
+                    # Our own request budget ran out, which says nothing
+                    # about the upstream's health
+                    self.release_probe()
+                    raise DeadlineExceeded(self.name) from e
+                self.record_failure()
+                raise
+            self.record_success(time.monotonic() - start)
+            return result
+
+    def hedged_call(self, fn, *args, **kwargs):
+        """
+        Like call(), but if the call has not finished after the upstream's
+        observed p95 latency a second attempt is started and the first
+        successful result wins. Only use for idempotent calls.
+        With nothing to hedge at (hedging off, or too few samples yet) the
+        call runs on the caller's thread, bounded by the upstream's own
+        timeout. When hedging under a request deadline, DeadlineExceeded is
+        raised once it passes (an attempt still running is abandoned, not
+        counted as a failure).
+        """
+        return self._hedged(fn, args, kwargs, inline_ok=True)
+
+    def deadline_bound_call(self, fn, *args, **kwargs):
+        """
+        hedged_call() for clients whose timeouts cannot follow the request
+        deadline (boto3 fixes them per client): under a deadline the call
+        always runs off the caller's thread, and DeadlineExceeded is raised
+        once the deadline passes even if nothing is hedged.
+        """
+        return self._hedged(fn, args, kwargs, inline_ok=False)
+
+    def _hedged(self, fn, args, kwargs, inline_ok):
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.check(self.name)
+        delay = self.latency.percentile(95) if self.hedging else None
+        if delay is None and (inline_ok or deadline is None):
+            return self.call(fn, *args, **kwargs)
+
+        outcomes = queue.SimpleQueue()
+        # Set once the caller has its answer; a hedge not yet started skips itself
+        finished = threading.Event()
+
+        def attempt():
+            if finished.is_set():
+                return
+            try:
+                outcomes.put((True, self.call(fn, *args, **kwargs)))
+            except Exception as e:
+                outcomes.put((False, e))
+
+        def hedge_attempt():
+            try:
+                attempt()
+            finally:
+                _hedge_slots.release()
+
+        # Named for the profile timeline
+        attempt.__name__ = f'{self.name}_call'
+        hedge_attempt.__name__ = f'{self.name}_hedge'
+
+        # The primary gets its own thread so it starts (and its hedge timer
+        # with it) right away instead of queueing behind other calls
+        threading.Thread(target=profiled(propagate(attempt)), name=f'{self.name}-call', daemon=True).start()
+        hedge_at = time.monotonic() + delay if delay is not None else None
+        hedge = None
+        running = 1
+        error = None
+        try:
+            while running:
+                timeout = None
+                if hedge_at is not None:
+                    timeout = max(0.0, hedge_at - time.monotonic())
+                if deadline is not None:
+                    timeout = deadline.remaining() if timeout is None else min(timeout, deadline.remaining())
+                try:
+                    succeeded, value = outcomes.get(timeout=timeout)
+                except queue.Empty:
+                    pass
+                else:
+                    if succeeded:
+                        return value
+                    running -= 1
+                    error = error or value
+                    continue
+                if deadline is not None and deadline.expired():
+                    raise DeadlineExceeded(self.name)
+                if hedge_at is not None and time.monotonic() >= hedge_at:
+                    hedge_at = None
+                    # Hedges are extra load: only sent while a hedge worker
+                    # is idle, never queued behind other requests' hedges
+                    if _hedge_slots.acquire(blocking=False):
+                        set_attribute('hedged', True)
+                        hedge = _hedge_pool.submit(profiled(propagate(hedge_attempt)))
+                        running += 1
+                    else:
+                        set_attribute('hedge_skipped', True)
+            raise error
+        finally:
+            finished.set()
+            # A hedge cancelled before it started never reaches its own release
+            if hedge is not None and hedge.cancel():
+                _hedge_slots.release()
+
+
+HEDGE_MAX_WORKERS = int(env_float('HEDGE_MAX_WORKERS', 20))
+_hedge_pool = ThreadPoolExecutor(max_workers=HEDGE_MAX_WORKERS, thread_name_prefix='hedge')
+_hedge_slots = threading.BoundedSemaphore(HEDGE_MAX_WORKERS)
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name):
+    """Returns the process-wide breaker for an upstream, configured from env."""
+    with _breakers_lock:
+        if name not in _breakers:
+            prefix = name.upper()
+            slo = env_float(f'{prefix}_LATENCY_SLO', 0)
+            _breakers[name] = CircuitBreaker(
+                name,
+                failure_threshold=int(env_float('CIRCUIT_FAILURE_THRESHOLD', 5)),
+                reset_timeout=env_float('CIRCUIT_RESET_TIMEOUT', 30),
+                latency_slo=slo or None,
+                hedging=os.getenv('UPSTREAM_HEDGING', '1') != '0',
+            )
+        return _breakers[name]
+
+
+def breaker_states():
+    """Returns {upstream: state} for every breaker created so far."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.name: b.state for b in breakers}
+
+
+def degraded_upstreams():
+    """Names of upstreams whose circuit is currently not closed."""
+    return sorted(name for name, state in breaker_states().items()
+                  if state != CircuitBreaker.CLOSED)
@@ -0,0 +1,175 @@
+"""
+Response encoding for large JSON payloads.
+Serializes with orjson when installed, trims payloads to the fields a
+client asked for, and compresses with brotli or gzip as negotiated from
+Accept-Encoding.
+
+Field selection (query parameters, dotted paths apply inside lists):
+    ?fields=analysis_id,risk_analysis,entities.Text   keep only these
+    ?exclude=utterances,entities.Traits               drop these
+
+Configuration:
+    RESPONSE_COMPRESSION            1 (default) | 0
+    RESPONSE_MIN_COMPRESS_BYTES     Smaller bodies are sent as-is (default 1024)
+"""
+import gzip
+import json
+import os
+
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+
+from .resilience import env_float
+from .tracing import set_attribute
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_ENABLED = os.getenv('RESPONSE_COMPRESSION', '1') != '0'
+MIN_COMPRESS_BYTES = int(env_float('RESPONSE_MIN_COMPRESS_BYTES', 1024))
+# Mid-range levels: most of the size win at a fraction of the max-level CPU
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def dumps(obj, sort_keys=False, indent=False):
+    """Serializes obj to JSON bytes, compact unless indent (two spaces) is set."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=DefaultJSONProvider.default, option=option)
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits; the stdlib encoder copes
+    return json.dumps(obj, default=DefaultJSONProvider.default, sort_keys=sort_keys,
+                      indent=2 if indent else None,
+                      separators=(',', ': ') if indent else (',', ':'),
+                      ensure_ascii=False).encode('utf-8')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by dumps(), so jsonify() benefits too."""
+
+    def dumps(self, obj, **kwargs):
+        # jsonify() passes compact separators, or indent=2 in debug mode;
+        # orjson covers both. Anything else goes to the stdlib encoder.
+        if (set(kwargs) - {'separators', 'indent'}
+                or kwargs.get('separators', (',', ':')) != (',', ':')
+                or kwargs.get('indent') not in (None, 2)):
+            return super().dumps(obj, **kwargs)
+        return dumps(obj, sort_keys=self.sort_keys, indent='indent' in kwargs).decode('utf-8')
+
+
+def parse_field_list(value):
+    """Splits a comma-separated query parameter into field paths."""
+    if not value:
+        return []
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+
+def _path_tree(paths):
+    tree = {}
+    for path in paths:
+        node = tree
+        for part in path.split('.'):
+            node = node.setdefault(part, {})
+    return tree
+
+
+def _include(value, tree):
+    if not tree:
+        return value
+    if isinstance(value, list):
+        return [_include(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {key: _include(value[key], sub) for key, sub in tree.items() if key in value}
+    return value
+
+
+def _exclude(value, tree):
+    if isinstance(value, list):
+        return [_exclude(item, tree) for item in value]
+    if isinstance(value, dict):
+        result = {}
+        for key, item in value.items():
+            if key not in tree:
+                result[key] = item
+            elif tree[key]:
+                result[key] = _exclude(item, tree[key])
+        return result
+    return value
+
+
+def select_fields(payload, fields=None, exclude=None):
+    """
+    Returns a trimmed copy of payload keeping only `fields` (if given) and
+    dropping `exclude`. The original payload is never modified.
+    """
+    if fields:
+        payload = _include(payload, _path_tree(fields))
+    if exclude:
+        payload = _exclude(payload, _path_tree(exclude))
+    return payload
+
+
+def negotiate_encoding(accept_encoding):
+    """Picks 'br', 'gzip' or None from an Accept-Encoding header."""
+    if not accept_encoding:
+        return None
+    offered = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        offered[name.strip().lower()] = quality
+
+    wildcard = offered.get('*', 0.0)
+    candidates = (['br'] if brotli is not None else []) + ['gzip']
+    best, best_quality = None, 0.0
+    for name in candidates:
+        quality = offered.get(name, wildcard)
+        # Ties keep the earlier (better-compressing) encoding
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+def json_response(payload, status=200, accept_encoding=None):
+    """
+    Builds a JSON Response, compressed when the client accepts it and the
+    body is large enough to benefit. Sizes are recorded on the current span.
+    """
+    body = dumps(payload)
+    raw_size = len(body)
+    encoding = None
+    if COMPRESSION_ENABLED and raw_size >= MIN_COMPRESS_BYTES:
+        encoding = negotiate_encoding(accept_encoding)
+    if encoding == 'br':
+        body = brotli.compress(body, quality=BROTLI_QUALITY)
+    elif encoding == 'gzip':
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+    response = Response(body, status=status, mimetype='application/json')
+    response.vary.add('Accept-Encoding')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+
+    set_attribute('response.json_bytes', raw_size)
+    set_attribute('response.body_bytes', len(body))
+    set_attribute('response.encoding', encoding or 'identity')
+    return response
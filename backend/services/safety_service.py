@@ -1,57 +1,180 @@
 import requests
-from functools import lru_cache
+import threading
+import time
+from collections import OrderedDict
+
+from .deadline import DeadlineExceeded, upstream_timeout
+from .pair_matrix import load_pair_matrix
+from .resilience import OPENFDA, CircuitOpenError, UpstreamError, env_float, get_breaker
+from .scheduling import get_gate
+from .traffic_capture import record_upstream
+
+class PairCountCache:
+    """
+    Thread-safe LRU of FAERS pair counts. Unlike functools.lru_cache it can
+    be asked whether a pair is cached (without refreshing it), which the
+    per-request query planner uses to tell free pairs from billable ones.
+    """
+
+    def __init__(self, maxsize=100):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns (found, count)."""
+        with self._lock:
+            if key not in self._entries:
+                return False, None
+            self._entries.move_to_end(key)
+            return True, self._entries[key]
+
+    def put(self, key, count):
+        with self._lock:
+            self._entries[key] = count
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+# Where fetch_pair_count found a count
+PAIR_FROM_MATRIX = 'matrix'
+PAIR_FROM_CACHE = 'cache'
+PAIR_FROM_OPENFDA = 'openfda'
+
 
 class SafetyService:
-    def __init__(self):
+    def __init__(self, pair_matrix=None):
         self.base_url = "https://api.fda.gov/drug/event.json"
+        self.timeout = env_float('FAERS_TIMEOUT', 10)
+        # Precomputed counts (see pair_matrix.py), consulted before the cache
+        self.pair_matrix = load_pair_matrix() if pair_matrix is None else pair_matrix
+        self.pair_cache = PairCountCache(int(env_float('FAERS_CACHE_SIZE', 100)))
+        self.breaker = get_breaker(OPENFDA)
+        # Queues calls by the current priority while openFDA is saturated
+        self.gate = get_gate(OPENFDA)
+
+    def _get(self, params):
+        # Bounded by the request deadline, if any
+        response = requests.get(self.base_url, params=params, timeout=upstream_timeout(self.timeout))
+        # openFDA answers 404 when a search has no matches; that is a valid empty result
+        if response.status_code >= 500 or response.status_code == 429:
+            response.raise_for_status()
+        return response.json()
 
-    @lru_cache(maxsize=100)
     def check_drug_risks(self, drug_name, symptom_name):
         """
         Queries FAERS to find the number of reported events for a drug-symptom pair.
-        Cached to improve performance on repeated queries.
+        Returns 0 when openFDA is unavailable; use fetch_pair_count to tell
+        an outage apart from a genuine zero.
+        """
+        try:
+            return self.fetch_pair_count(drug_name, symptom_name)[0]
+        except (CircuitOpenError, UpstreamError, DeadlineExceeded):
+            return 0
+
+    @staticmethod
+    def pair_query(drug_name, symptom_name):
+        """openFDA search for reports naming the drug and the reaction."""
+        return f'patient.drug.medicinalproduct:"{drug_name}" AND patient.reaction.reactionmeddrapt:"{symptom_name}"'
+
+    def is_pair_cached(self, drug_name, symptom_name):
+        if self.pair_matrix and (drug_name, symptom_name) in self.pair_matrix:
+            return True
+        return (drug_name, symptom_name) in self.pair_cache
+
+    def fetch_pair_count(self, drug_name, symptom_name):
         """
+        Same lookup as check_drug_risks, answered from the precomputed matrix
+        or the cache when possible. Raises CircuitOpenError / UpstreamError
+        when openFDA is unavailable so outages are neither cached nor
+        mistaken for 0.
+
+        Returns:
+            tuple: (count, source), source being one of PAIR_FROM_MATRIX,
+            PAIR_FROM_CACHE or PAIR_FROM_OPENFDA
+        """
+        if self.pair_matrix:
+            found, count = self.pair_matrix.get(drug_name, symptom_name)
+            if found:
+                return count, PAIR_FROM_MATRIX
+        found, count = self.pair_cache.get((drug_name, symptom_name))
+        if found:
+            return count, PAIR_FROM_CACHE
+        count = self._query_pair_count(drug_name, symptom_name)
+        self.pair_cache.put((drug_name, symptom_name), count)
+        return count, PAIR_FROM_OPENFDA
+
+    def _query_pair_count(self, drug_name, symptom_name):
         if not drug_name or not symptom_name:
             return 0
 
         # Construct query
         # search=patient.drug.medicinalproduct:{drug}+AND+patient.reaction.reactionmeddrapt:{symptom}
-        query = f'patient.drug.medicinalproduct:"{drug_name}" AND patient.reaction.reactionmeddrapt:"{symptom_name}"'
-        
         params = {
-            'search': query,
+            'search': self.pair_query(drug_name, symptom_name),
             'limit': 1
         }
 
+        start = time.monotonic()
         try:
-            response = requests.get(self.base_url, params=params, timeout=10)
-            data = response.json()
+            with self.gate.slot():
+                start = time.monotonic()
+                data = self.breaker.hedged_call(self._get, params)
             
+            count = 0
             if "meta" in data and "results" in data["meta"]:
-                return data["meta"]["results"]["total"]
-            return 0
+                count = data["meta"]["results"]["total"]
+            record_upstream(OPENFDA, (drug_name, symptom_name), count, time.monotonic() - start)
+            return count
 
+        except (CircuitOpenError, DeadlineExceeded):
+            raise
         except Exception as e:
+            record_upstream(OPENFDA, (drug_name, symptom_name), None, time.monotonic() - start,
+                            error=type(e).__name__)
             print(f"FAERS API Error: {e}")
-            return 0
+            raise UpstreamError(OPENFDA, e)
 
     def get_drug_profile(self, drug_name):
         """
         Gets common side effects for a drug.
+        Returns [] when openFDA is unavailable; use fetch_drug_profile to tell
+        an outage apart from a drug without reports.
+        """
+        try:
+            return self.fetch_drug_profile(drug_name)
+        except Exception as e:
+            print(f"FAERS Profile Error: {e}")
+            return []
+
+    def fetch_drug_profile(self, drug_name, limit=5):
+        """
+        The drug's most reported reactions, as [{"term": str, "count": int}],
+        most reported first. Raises CircuitOpenError / UpstreamError when
+        openFDA is unavailable.
         """
         # Implementation for charts (count by reaction)
         query = f'patient.drug.medicinalproduct:"{drug_name}"'
         params = {
             'search': query,
-            'count': 'patient.reaction.reactionmeddrapt.exact'
+            'count': 'patient.reaction.reactionmeddrapt.exact',
+            'limit': limit
         }
         
         try:
-            response = requests.get(self.base_url, params=params, timeout=10)
-            data = response.json()
-            if "results" in data:
-                return data["results"][:5] # Top 5
-            return []
+            with self.gate.slot():
+                data = self.breaker.hedged_call(self._get, params)
+        except (CircuitOpenError, DeadlineExceeded):
+            raise
         except Exception as e:
-            print(f"FAERS Profile Error: {e}")
-            return []
+            raise UpstreamError(OPENFDA, e)
+        return data.get("results", [])[:limit]
@@ -0,0 +1,190 @@
+"""
+Priority scheduling for pipeline work.
+Each stage (Comprehend Medical, openFDA, ML) gets a gate with a fixed
+number of concurrent slots. While the stage is saturated, freed slots go
+to the most urgent waiter first; a waiter that has queued longer than the
+starvation limit is served ahead of fresher, more urgent ones, oldest first.
+
+The priority of the current encounter (or FAERS pair) lives in a
+contextvar, like the request deadline, so it follows work into executor
+threads started via tracing.propagate.
+"""
+import contextlib
+import contextvars
+import itertools
+import os
+import threading
+import time
+
+from .deadline import DeadlineExceeded, current_deadline
+from .resilience import COMPREHEND_MEDICAL, OPENFDA, LatencyTracker, env_float
+from .tracing import set_attribute
+
+# Lower is more urgent
+CRITICAL = 0
+URGENT = 1
+ROUTINE = 2
+PRIORITY_NAMES = {CRITICAL: 'critical', URGENT: 'urgent', ROUTINE: 'routine'}
+
+ML = 'ml'
+
+_current_priority = contextvars.ContextVar('current_priority', default=ROUTINE)
+
+
+def current_priority():
+    return _current_priority.get()
+
+
+def set_priority(priority):
+    """Makes priority current; pass the returned token to reset_priority()."""
+    return _current_priority.set(priority)
+
+
+def reset_priority(token):
+    _current_priority.reset(token)
+
+
+@contextlib.contextmanager
+def prioritized(priority):
+    token = set_priority(priority)
+    try:
+        yield
+    finally:
+        reset_priority(token)
+
+
+class _Waiter:
+    __slots__ = ('priority', 'seq', 'enqueued_at', 'event')
+
+    def __init__(self, priority, seq):
+        self.priority = priority
+        self.seq = seq
+        self.enqueued_at = time.monotonic()
+        self.event = threading.Event()
+
+
+class PriorityGate:
+    """
+    Limits a stage to `capacity` concurrent calls, handing freed slots to
+    waiters by priority with starvation protection. capacity 0 disables
+    the limit.
+    """
+
+    def __init__(self, name, capacity, starvation_seconds=2.0):
+        self.name = name
+        self.capacity = capacity
+        self.starvation_seconds = starvation_seconds
+        self._available = capacity
+        self._waiters = []
+        self._seq = itertools.count()
+        self._promoted = 0
+        self._waits = {priority: LatencyTracker() for priority in PRIORITY_NAMES}
+        self._lock = threading.Lock()
+
+    def acquire(self, priority=ROUTINE, timeout=None):
+        """Takes a slot, waiting up to timeout seconds. Returns False on timeout."""
+        with self._lock:
+            if self._available > 0:
+                self._available -= 1
+                return True
+            waiter = _Waiter(priority, next(self._seq))
+            self._waiters.append(waiter)
+        if waiter.event.wait(timeout):
+            return True
+        with self._lock:
+            # release() may have handed us the slot just as we timed out
+            if waiter.event.is_set():
+                return True
+            self._waiters.remove(waiter)
+        return False
+
+    def release(self):
+        with self._lock:
+            if not self._waiters:
+                self._available += 1
+                return
+            waiter = self._next_waiter()
+            self._waiters.remove(waiter)
+            # The slot passes straight to the waiter
+            waiter.event.set()
+
+    def _next_waiter(self):
+        now = time.monotonic()
+        starved = [w for w in self._waiters if now - w.enqueued_at >= self.starvation_seconds]
+        if starved:
+            waiter = min(starved, key=lambda w: w.seq)
+            if waiter is not min(self._waiters, key=lambda w: (w.priority, w.seq)):
+                self._promoted += 1
+            return waiter
+        return min(self._waiters, key=lambda w: (w.priority, w.seq))
+
+    @contextlib.contextmanager
+    def slot(self, priority=None):
+        """
+        Holds a slot for the duration of the block, at the given or current
+        priority. Raises DeadlineExceeded if the request deadline passes
+        while waiting.
+        """
+        if not self.capacity:
+            yield
+            return
+        priority = current_priority() if priority is None else priority
+        deadline = current_deadline()
+        start = time.monotonic()
+        if not self.acquire(priority, timeout=deadline.remaining() if deadline else None):
+            raise DeadlineExceeded(f"{self.name} queue")
+        waited = time.monotonic() - start
+        self._waits[priority].record(waited)
+        set_attribute('scheduler.priority', PRIORITY_NAMES[priority])
+        set_attribute('scheduler.wait_ms', round(waited * 1000, 3))
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        with self._lock:
+            waiting = {name: 0 for name in PRIORITY_NAMES.values()}
+            for waiter in self._waiters:
+                waiting[PRIORITY_NAMES[waiter.priority]] += 1
+            stats = {
+                "capacity": self.capacity,
+                "in_use": self.capacity - self._available,
+                "waiting": waiting,
+                "starvation_promotions": self._promoted
+            }
+        stats["p95_wait_ms"] = {}
+        for priority, tracker in self._waits.items():
+            p95 = tracker.percentile(95)
+            stats["p95_wait_ms"][PRIORITY_NAMES[priority]] = round(p95 * 1000, 3) if p95 is not None else None
+        return stats
+
+
+_gates = {}
+_gates_lock = threading.Lock()
+
+# Concurrent calls per stage unless <NAME>_CONCURRENCY says otherwise
+DEFAULT_CONCURRENCY = {
+    COMPREHEND_MEDICAL: 8,
+    OPENFDA: 16,
+    ML: os.cpu_count() or 1
+}
+
+
+def get_gate(name):
+    """Returns the process-wide gate for a stage, configured from env."""
+    with _gates_lock:
+        if name not in _gates:
+            _gates[name] = PriorityGate(
+                name,
+                capacity=int(env_float(f'{name.upper()}_CONCURRENCY', DEFAULT_CONCURRENCY.get(name, 0))),
+                starvation_seconds=env_float('PRIORITY_MAX_WAIT_SECONDS', 2.0),
+            )
+        return _gates[name]
+
+
+def gate_stats():
+    """Returns {stage: stats} for every gate created so far."""
+    with _gates_lock:
+        gates = list(_gates.values())
+    return {gate.name: gate.stats() for gate in gates}
@@ -0,0 +1,273 @@
+"""
+Lightweight request tracing.
+Spans carry a trace ID, parent links, timing and attributes, follow the
+request into executor threads via contextvars, and can be exported as
+OTLP/JSON to a local file or an OTLP/HTTP collector.
+
+Configuration:
+    TRACE_EXPORT                  none (default) | file | otlp
+    TRACE_FILE                    JSON-lines output for TRACE_EXPORT=file
+    OTEL_EXPORTER_OTLP_ENDPOINT   Collector base URL for TRACE_EXPORT=otlp
+"""
+import contextvars
+import json
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+
+SERVICE_NAME = 'deepcare-backend'
+DEFAULT_TRACE_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'traces.jsonl')
+TRACEPARENT_PATTERN = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$')
+
+# OTLP span kinds
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+class Span:
+    __slots__ = ('tracer', 'trace_id', 'span_id', 'parent_span_id', 'name', 'kind',
+                 'start_ns', 'end_ns', 'attributes', 'events', 'error', '_token')
+
+    def __init__(self, tracer, name, trace_id, parent_span_id=None, kind=KIND_INTERNAL, attributes=None):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes or {})
+        self.events = []
+        self.error = None
+        self._token = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def record_exception(self, exc):
+        self.error = f"{type(exc).__name__}: {exc}"
+        self.events.append({
+            "name": "exception",
+            "time_ns": time.time_ns(),
+            "attributes": {"exception.type": type(exc).__name__, "exception.message": str(exc)}
+        })
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.tracer._on_end(self)
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.record_exception(exc)
+        _current_span.reset(self._token)
+        self.end()
+        return False
+
+
+class RequestTrace:
+    """Root span of one request plus sequential stage spans (like mark())."""
+
+    def __init__(self, tracer, root):
+        self.tracer = tracer
+        self.root = root
+        self.trace_id = root.trace_id
+        self._stage = None
+        self._token = _current_span.set(root)
+
+    def mark(self, stage):
+        """Ends the current stage span (if any) and starts the next one."""
+        if self._stage:
+            _current_span.set(self.root)
+            self._stage.end()
+        self._stage = None
+        if stage:
+            self._stage = Span(self.tracer, stage, self.trace_id, self.root.span_id)
+            _current_span.set(self._stage)
+
+    def finish(self, status_code=None):
+        self.mark(None)
+        if status_code is not None:
+            self.root.set_attribute('http.status_code', status_code)
+            if status_code >= 500:
+                self.root.error = self.root.error or f"HTTP {status_code}"
+        _current_span.reset(self._token)
+        self.root.end()
+
+
+class Tracer:
+    def __init__(self, exporter=None, batch_size=256, flush_interval=2.0):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = None
+        self.start_exporter()
+
+    def start_exporter(self):
+        """Starts the export thread (again, in forked server workers)."""
+        if self.exporter is None:
+            return
+        self._queue = queue.Queue(maxsize=10000)
+        threading.Thread(target=self._export_loop, name='trace-exporter', daemon=True).start()
+
+    def span(self, name, kind=KIND_INTERNAL, **attributes):
+        """Child of the current span (or a new trace); use as a context manager."""
+        parent = _current_span.get()
+        if parent is None:
+            return Span(self, name, secrets.token_hex(16), kind=kind, attributes=attributes)
+        return Span(self, name, parent.trace_id, parent.span_id, kind=kind, attributes=attributes)
+
+    def start_request(self, name, trace_id=None, traceparent=None, **attributes):
+        """
+        Starts a request's root span in the current context. A valid W3C
+        traceparent header continues the caller's trace.
+        """
+        parent_span_id = None
+        match = TRACEPARENT_PATTERN.match(traceparent or '')
+        if match:
+            trace_id, parent_span_id = match.groups()
+        root = Span(self, name, trace_id or secrets.token_hex(16), parent_span_id,
+                    kind=KIND_SERVER, attributes=attributes)
+        return RequestTrace(self, root)
+
+    def _on_end(self, span):
+        if self._queue is None:
+            return
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            pass  # Dropping spans beats blocking requests on a slow exporter
+
+    def _export_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self.exporter.export(to_otlp(batch))
+            except Exception as e:
+                print(f"Trace export error: {e}")
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes):
+    return [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items() if v is not None]
+
+
+def to_otlp(spans):
+    """Encodes spans as an OTLP/JSON ExportTraceServiceRequest."""
+    encoded = []
+    for span in spans:
+        item = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": span.kind,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": _otlp_attributes(span.attributes),
+            "events": [
+                {"name": e["name"], "timeUnixNano": str(e["time_ns"]), "attributes": _otlp_attributes(e["attributes"])}
+                for e in span.events
+            ],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1}
+        }
+        if span.parent_span_id:
+            item["parentSpanId"] = span.parent_span_id
+        encoded.append(item)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME})},
+            "scopeSpans": [{"scope": {"name": "deepcare.tracing"}, "spans": encoded}]
+        }]
+    }
+
+
+class FileExporter:
+    """Appends one OTLP/JSON export request per line."""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def export(self, payload):
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(payload) + "\n")
+
+
+class OTLPHttpExporter:
+    """Posts OTLP/JSON to a collector's /v1/traces endpoint."""
+
+    def __init__(self, endpoint, timeout=5):
+        self.url = endpoint.rstrip('/') + '/v1/traces'
+        self.timeout = timeout
+
+    def export(self, payload):
+        import requests
+        response = requests.post(self.url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+
+
+def exporter_from_env():
+    mode = os.getenv('TRACE_EXPORT', 'none').lower()
+    if mode == 'file':
+        return FileExporter(os.getenv('TRACE_FILE', DEFAULT_TRACE_FILE))
+    if mode == 'otlp':
+        return OTLPHttpExporter(os.getenv('OTEL_EXPORTER_OTLP_ENDPOINT', 'http://localhost:4318'))
+    return None
+
+
+tracer = Tracer(exporter_from_env())
+
+
+def current_span():
+    return _current_span.get()
+
+
+def set_attribute(key, value):
+    """Sets an attribute on the current span, if there is one."""
+    span = _current_span.get()
+    if span is not None:
+        span.set_attribute(key, value)
+
+
+def propagate(fn):
+    """
+    Binds fn to the caller's context so spans it creates in another thread
+    (e.g. a ThreadPoolExecutor worker) stay children of the caller's span.
+    """
+    context = contextvars.copy_context()
+
+    def run_in_context(*args, **kwargs):
+        # A Context can only be entered by one thread at a time, so each
+        # invocation runs in its own copy
+        return context.copy().run(fn, *args, **kwargs)
+    run_in_context.__name__ = getattr(fn, '__name__', 'task')
+    return run_in_context
@@ -0,0 +1,216 @@
+"""
+Opt-in capture of production /analyze traffic for replay.
+For each sampled request, records what its upstreams answered (Deepgram
+transcript, Comprehend Medical entities, openFDA pair counts) and how long
+they took, anonymized, as one JSON line in a gzip trace file per worker
+process. benchmarks/replay_traffic.py re-drives the backend from it.
+
+Anonymization keeps the workload's shape, not its content:
+    - transcript words outside the clinical vocabulary (risk engine symptoms,
+      ML encoder classes) are masked to 'x' runs of the same length and
+      digits to '0', so text lengths, NLP offsets and critical-symptom
+      pre-scans survive; names, dates and free text do not
+    - entity and FAERS terms outside the vocabulary become keyed
+      pseudonyms, stable across requests for one salt, so cache locality
+      and drug x symptom fan-out survive
+    - audio is never stored, only its size
+
+Configuration:
+    TRAFFIC_CAPTURE         1 to enable (default off)
+    TRAFFIC_CAPTURE_DIR     Where trace files go (default backend/data/traffic)
+    TRAFFIC_CAPTURE_SAMPLE  Fraction of requests captured (default 1.0)
+    TRAFFIC_CAPTURE_SALT    Pseudonym key; set it to keep pseudonyms stable
+                            across restarts (default: random per process)
+"""
+import contextvars
+import gzip
+import hashlib
+import hmac
+import json
+import os
+import random
+import re
+import threading
+import time
+
+from .resilience import COMPREHEND_MEDICAL, OPENFDA, env_float
+
+DEFAULT_CAPTURE_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'traffic')
+FORMAT_VERSION = 1
+# Comprehend entity fields kept; Attributes and Ids could carry related text
+ENTITY_FIELDS = ('Text', 'Category', 'Type', 'Score', 'Traits', 'BeginOffset')
+
+_current_capture = contextvars.ContextVar('current_capture', default=None)
+
+_WORD = re.compile(r'[^\W\d_]+')
+_DIGIT = re.compile(r'\d')
+
+
+def current_capture():
+    return _current_capture.get()
+
+
+def set_capture(capture):
+    """Makes capture current; pass the returned token to reset_capture()."""
+    return _current_capture.set(capture)
+
+
+def reset_capture(token):
+    _current_capture.reset(token)
+
+
+def record_upstream(upstream, request, response, seconds, error=None):
+    """Adds an upstream call to the current request's capture, if any."""
+    capture = _current_capture.get()
+    if capture is not None:
+        capture.add_call(upstream, request, response, seconds, error)
+
+
+def text_key(text):
+    """Lookup key replay stubs use for a (masked) NLP input text."""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+class Anonymizer:
+    def __init__(self, vocabulary=(), salt=None):
+        self.terms = {term.lower() for term in vocabulary}
+        self.words = {word for term in self.terms for word in _WORD.findall(term)}
+        self._key = (salt or os.urandom(16).hex()).encode('utf-8')
+
+    def mask(self, text):
+        """Masks non-vocabulary words and all digits, preserving length and layout."""
+        if not text:
+            return text
+        text = _DIGIT.sub('0', text)
+        return _WORD.sub(lambda m: m.group(0) if m.group(0).lower() in self.words else 'x' * len(m.group(0)), text)
+
+    def term(self, term):
+        """A vocabulary term as-is, anything else as a stable pseudonym."""
+        if not term or term.lower() in self.terms:
+            return term
+        digest = hmac.new(self._key, term.lower().encode('utf-8'), hashlib.sha256).hexdigest()
+        return f"term-{digest[:10]}"
+
+
+class RequestCapture:
+    """What one request's upstreams returned, before anonymization."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._start = time.monotonic()
+        self.audio_bytes = 0
+        self.form = {}
+        self.transcription = None
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def record_transcription(self, seconds, transcript, utterances):
+        self.transcription = {'seconds': seconds, 'transcript': transcript, 'utterances': utterances}
+
+    def add_call(self, upstream, request, response, seconds, error=None):
+        # FAERS pairs are recorded from executor threads
+        with self._lock:
+            self.calls.append((upstream, request, response, seconds, error))
+
+    def elapsed(self):
+        return time.monotonic() - self._start
+
+
+class TrafficRecorder:
+    def __init__(self, capture_dir=None, sample_rate=None, vocabulary=(), salt=None, batch_size=50,
+                 flush_interval=10.0):
+        self.capture_dir = capture_dir or os.getenv('TRAFFIC_CAPTURE_DIR', DEFAULT_CAPTURE_DIR)
+        self.sample_rate = env_float('TRAFFIC_CAPTURE_SAMPLE', 1.0) if sample_rate is None else sample_rate
+        self.anonymizer = Anonymizer(vocabulary, salt or os.getenv('TRAFFIC_CAPTURE_SALT'))
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._oldest = None
+        self._lock = threading.Lock()
+        os.makedirs(self.capture_dir, exist_ok=True)
+
+    def start(self):
+        """A capture for this request, or None if it is not sampled."""
+        if random.random() >= self.sample_rate:
+            return None
+        return RequestCapture()
+
+    def finish(self, capture, status_code):
+        if capture is None:
+            return
+        record = self.anonymize(capture)
+        record['status'] = status_code
+        record['latency_ms'] = round(capture.elapsed() * 1000, 3)
+        line = json.dumps(record, separators=(',', ':'))
+        with self._lock:
+            self._pending.append(line)
+            self._oldest = self._oldest or time.monotonic()
+            due = (len(self._pending) >= self.batch_size or
+                   time.monotonic() - self._oldest >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def anonymize(self, capture):
+        a = self.anonymizer
+        record = {
+            'v': FORMAT_VERSION,
+            'ts': round(capture.started_at, 3),
+            'audio_bytes': capture.audio_bytes,
+            'form': capture.form
+        }
+        if capture.transcription:
+            t = capture.transcription
+            record['deepgram'] = {
+                'ms': round(t['seconds'] * 1000, 3),
+                'transcript': a.mask(t['transcript']),
+                'utterances': [dict(u, text=a.mask(u.get('text'))) for u in t['utterances']]
+            }
+        comprehend, openfda = [], []
+        for upstream, request, response, seconds, error in capture.calls:
+            # No timing for FAERS pairs served from the cache
+            ms = round(seconds * 1000, 3) if seconds is not None else None
+            if upstream == COMPREHEND_MEDICAL:
+                comprehend.append({
+                    'key': text_key(a.mask(request)),
+                    'ms': ms,
+                    'entities': [dict({field: e.get(field) for field in ENTITY_FIELDS}, Text=a.term(e.get('Text')))
+                                 for e in response or []],
+                    'error': error
+                })
+            elif upstream == OPENFDA:
+                drug, symptom = request
+                openfda.append({'drug': a.term(drug), 'symptom': a.term(symptom),
+                                'count': response, 'ms': ms, 'error': error})
+        record['comprehend'] = comprehend
+        record['openfda'] = openfda
+        return record
+
+    def flush(self):
+        """Appends pending records as one gzip member to this process's trace file."""
+        with self._lock:
+            lines, self._pending, self._oldest = self._pending, [], None
+        if not lines:
+            return
+        path = os.path.join(self.capture_dir, f"traffic-{os.getpid()}.jsonl.gz")
+        try:
+            with open(path, 'ab') as f:
+                f.write(gzip.compress(('\n'.join(lines) + '\n').encode('utf-8')))
+        except OSError as e:
+            print(f"Traffic capture write failed: {e}")
+
+
+def load_trace(paths):
+    """Reads trace files (or directories of them), ordered by arrival time."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if name.endswith('.jsonl.gz'))
+        else:
+            files.append(path)
+    records = []
+    for path in files:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    records.sort(key=lambda record: record['ts'])
+    return records
@@ -0,0 +1,116 @@
+"""
+Extracts what the pipeline uses from a Deepgram /v1/listen response: the
+transcript and the diarized utterances.
+
+An hour-long call returns several MB of JSON, almost all of it per-word
+timings (results.channels[].alternatives[].words, results.utterances[].words)
+and paragraph sentences. parse_listen_response() cuts those arrays out of
+the raw bytes before parsing, so they are never materialized, instead of
+building the SDK's typed object graph for the whole document.
+"""
+import json
+import re
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+# Arrays of flat objects; the first ']' outside a string closes them
+WORD_LEVEL_KEYS = (b'words', b'sentences')
+
+_WORD_LEVEL_ARRAY = re.compile(rb'"(?:' + b'|'.join(WORD_LEVEL_KEYS) + rb')"\s*:\s*\[')
+
+
+def _loads(raw):
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def strip_word_arrays(raw):
+    """
+    Returns raw (bytes) with every word-level array emptied. Strings are
+    tracked by quote parity; a string ending in an escaped backslash can
+    throw that off, which leaves invalid JSON (the caller falls back to a
+    full parse) rather than wrong data.
+    """
+    kept = []
+    pos = 0
+    # Resume the search past each array so its contents are never scanned twice
+    match = _WORD_LEVEL_ARRAY.search(raw)
+    while match:
+        start = match.end()
+        quotes = 0
+        scanned = start
+        end = raw.find(b']', start)
+        while end != -1:
+            quotes += raw.count(b'"', scanned, end) - raw.count(b'\\"', scanned, end)
+            scanned = end
+            if quotes % 2 == 0:
+                break
+            end = raw.find(b']', end + 1)
+        if end == -1:
+            break
+        kept.append(raw[pos:start])
+        pos = end
+        match = _WORD_LEVEL_ARRAY.search(raw, end)
+    if not kept:
+        return raw
+    kept.append(raw[pos:])
+    return b''.join(kept)
+
+
+def parse_listen_response(raw, include_words=False):
+    """
+    Transcript fields from raw /v1/listen response bytes. Word-level arrays
+    are skipped unless include_words is set, in which case each utterance
+    also carries its 'words'.
+
+    Returns:
+        dict: {"transcript": str, "utterances": [{"speaker", "text", "start", "end", "confidence"}]}
+    """
+    if include_words:
+        document = _loads(raw)
+    else:
+        try:
+            document = _loads(strip_word_arrays(raw))
+        except ValueError:
+            document = _loads(raw)
+
+    results = document.get('results') or {}
+    transcript = ''
+    channels = results.get('channels') or []
+    if channels and channels[0].get('alternatives'):
+        transcript = channels[0]['alternatives'][0].get('transcript') or ''
+    utterances = []
+    for utterance in results.get('utterances') or []:
+        fields = {
+            "speaker": utterance.get('speaker'),
+            "text": utterance.get('transcript'),
+            "start": utterance.get('start'),
+            "end": utterance.get('end'),
+            "confidence": utterance.get('confidence')
+        }
+        if include_words:
+            fields['words'] = utterance.get('words') or []
+        utterances.append(fields)
+    return {"transcript": transcript, "utterances": utterances}
+
+
+def listen_response_fields(response, include_words=False):
+    """The same fields as parse_listen_response(), from the SDK's typed response."""
+    transcript = ''
+    utterances = []
+    if response and response.results:
+        transcript = response.results.channels[0].alternatives[0].transcript
+        for utt in response.results.utterances or []:
+            fields = {
+                "speaker": utt.speaker,
+                "text": utt.transcript,
+                "start": utt.start,
+                "end": utt.end,
+                "confidence": utt.confidence
+            }
+            if include_words:
+                fields['words'] = [word.dict() for word in utt.words or []]
+            utterances.append(fields)
+    return {"transcript": transcript, "utterances": utterances}
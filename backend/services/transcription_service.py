@@ -1,35 +1,115 @@
+import math
 import os
+import requests
 from deepgram import DeepgramClient
 
+from .deadline import current_deadline, upstream_timeout
+from .resilience import DEEPGRAM, env_float, get_breaker
+from .transcript_parsing import listen_response_fields, parse_listen_response
+
+# Size of each chunk streamed to Deepgram; keeps upload memory flat
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+LISTEN_URL = "https://api.deepgram.com/v1/listen"
+LISTEN_OPTIONS = {
+    "model": "nova-2",
+    "smart_format": True,
+    "diarize": True,
+    "punctuate": True,
+    "utterances": True
+}
+
 class TranscriptionService:
     def __init__(self):
         self.api_key = os.getenv("DEEPGRAM_API_KEY")
         if not self.api_key:
             raise ValueError("DEEPGRAM_API_KEY not found in environment variables")
         self.deepgram = DeepgramClient(api_key=self.api_key)
+        self.timeout = int(env_float('DEEPGRAM_TIMEOUT', 120))
+        # Parse the raw response for just the fields we use instead of
+        # building the SDK's typed response (see transcript_parsing)
+        self.raw_json = os.getenv('DEEPGRAM_RAW_JSON', '0') == '1'
+        self.breaker = get_breaker(DEEPGRAM)
+
+    def transcribe(self, audio, include_words=False):
+        """
+        Transcribes audio (a path or binary file object) and returns
+        {"transcript": str, "utterances": [...]}; see
+        transcript_parsing.parse_listen_response. Word-level timings are
+        only kept when include_words is set.
+        """
+        if self.raw_json:
+            return parse_listen_response(self.transcribe_raw(audio), include_words=include_words)
+        return listen_response_fields(self.transcribe_audio(audio), include_words=include_words)
 
-    def transcribe_audio(self, audio_file_path):
+    def transcribe_audio(self, audio):
         """
-        Transcribes the given audio file using Deepgram's Nova-2 model.
+        Transcribes the given audio using Deepgram's Nova-2 model.
+        Accepts a file path or an open binary file object; the audio is
+        streamed in chunks rather than read into memory.
         Returns the full JSON response.
+        Raises CircuitOpenError without uploading when Deepgram is degraded,
+        and DeadlineExceeded when the request deadline leaves no time for it.
         """
-        if not os.path.exists(audio_file_path):
-            raise FileNotFoundError(f"Audio file not found: {audio_file_path}")
+        return self._with_file(audio, self._transcribe)
+
+    def transcribe_raw(self, audio):
+        """Like transcribe_audio(), but returns the undecoded response body (bytes)."""
+        return self._with_file(audio, self._transcribe_raw)
+
+    @staticmethod
+    def _with_file(audio, transcribe):
+        if isinstance(audio, (str, os.PathLike)):
+            if not os.path.exists(audio):
+                raise FileNotFoundError(f"Audio file not found: {audio}")
+            with open(audio, "rb") as file:
+                return transcribe(file)
+        return transcribe(audio)
 
+    def _transcribe(self, file):
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.check(DEEPGRAM)
         try:
-            with open(audio_file_path, "rb") as file:
-                buffer_data = file.read()
-
-            response = self.deepgram.listen.v1.media.transcribe_file(
-                request=buffer_data,
-                model="nova-2",
-                smart_format=True,
-                diarize=True,
-                punctuate=True,
-                utterances=True
+            response = self.breaker.call(
+                self.deepgram.listen.v1.media.transcribe_file,
+                request=self._iter_chunks(file),
+                **LISTEN_OPTIONS,
+                # The SDK takes whole seconds; round up so a short budget still gets a try
+                request_options={"timeout_in_seconds": max(1, math.ceil(upstream_timeout(self.timeout)))}
             )
             return response
 
         except Exception as e:
             print(f"Transcription error: {e}")
             raise e
+
+    def _transcribe_raw(self, file):
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.check(DEEPGRAM)
+        try:
+            return self.breaker.call(self._post_listen, file, upstream_timeout(self.timeout))
+        except Exception as e:
+            print(f"Transcription error: {e}")
+            raise e
+
+    def _post_listen(self, file, timeout):
+        response = requests.post(
+            LISTEN_URL,
+            params={key: str(value).lower() if isinstance(value, bool) else value
+                    for key, value in LISTEN_OPTIONS.items()},
+            data=self._iter_chunks(file),
+            headers={"Authorization": f"Token {self.api_key}", "Content-Type": "application/octet-stream"},
+            timeout=timeout
+        )
+        response.raise_for_status()
+        return response.content
+
+    @staticmethod
+    def _iter_chunks(file):
+        while True:
+            chunk = file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
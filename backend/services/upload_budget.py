@@ -0,0 +1,34 @@
+"""
+Per-process accounting of in-flight upload bytes.
+Lets the API apply backpressure before a burst of large recordings
+exhausts worker memory.
+"""
+import threading
+
+
+class UploadBudget:
+    def __init__(self, max_bytes, retry_after=5):
+        self.max_bytes = max_bytes
+        self.retry_after = retry_after
+        self.in_use = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self, nbytes):
+        """
+        Reserves nbytes if they fit in the budget.
+        A single upload is always admitted when nothing else is in flight,
+        so a request below the size limit can never be rejected forever.
+        """
+        with self._lock:
+            if self.in_use and self.in_use + nbytes > self.max_bytes:
+                return False
+            self.in_use += nbytes
+            return True
+
+    def release(self, nbytes):
+        with self._lock:
+            self.in_use = max(0, self.in_use - nbytes)
+
+    def stats(self):
+        with self._lock:
+            return {"in_use_bytes": self.in_use, "budget_bytes": self.max_bytes}
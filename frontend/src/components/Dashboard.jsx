@@ -9,6 +9,11 @@ import {
 } from "lucide-react";
 import { motion } from "framer-motion";
 import { getSessionStats, getAnalysisHistory } from "../utils/sessionManager";
+import {
+  fetchStats,
+  fetchHistory,
+  loadHistoryEntry,
+} from "../utils/historyApi";
 
 const Dashboard = ({ onNavigate }) => {
   const [stats, setStats] = useState({
@@ -18,24 +23,49 @@ const Dashboard = ({ onNavigate }) => {
     lowRiskCalls: 0,
   });
   const [recentCalls, setRecentCalls] = useState([]);
+  // Whether the numbers come from the server's history or this session only
+  const [fromServer, setFromServer] = useState(false);
 
   useEffect(() => {
-    // Load session statistics
-    const loadStats = () => {
-      const sessionStats = getSessionStats();
-      setStats(sessionStats);
+    let cancelled = false;
 
-      const history = getAnalysisHistory();
-      setRecentCalls(history.slice(0, 5)); // Show last 5
+    const loadStats = async () => {
+      try {
+        const [serverStats, recent] = await Promise.all([
+          fetchStats(),
+          fetchHistory({ limit: 5 }),
+        ]);
+        if (cancelled) return;
+        setStats(serverStats);
+        setRecentCalls(recent.items);
+        setFromServer(true);
+      } catch (error) {
+        // History store unavailable: fall back to this session's analyses
+        if (cancelled) return;
+        setStats(getSessionStats());
+        setRecentCalls(getAnalysisHistory().slice(0, 5)); // Show last 5
+        setFromServer(false);
+      }
     };
 
     loadStats();
 
-    // Refresh every 2 seconds
-    const interval = setInterval(loadStats, 2000);
-    return () => clearInterval(interval);
+    // Refresh every 5 seconds
+    const interval = setInterval(loadStats, 5000);
+    return () => {
+      cancelled = true;
+      clearInterval(interval);
+    };
   }, []);
 
+  const openCall = async (call) => {
+    try {
+      onNavigate("call-analysis", await loadHistoryEntry(call));
+    } catch (error) {
+      console.error("Error loading analysis:", error);
+    }
+  };
+
   const container = {
     hidden: { opacity: 0 },
     show: {
@@ -72,7 +102,8 @@ const Dashboard = ({ onNavigate }) => {
 
     if (diffMins < 1) return "Just now";
     if (diffMins < 60) return `${diffMins} min ago`;
-    return `${Math.floor(diffMins / 60)} hours ago`;
+    if (diffMins < 1440) return `${Math.floor(diffMins / 60)} hours ago`;
+    return date.toLocaleDateString();
   };
 
   return (
@@ -101,7 +132,7 @@ const Dashboard = ({ onNavigate }) => {
         </motion.button>
       </div>
 
-      {/* Session Stats Grid */}
+      {/* Stats Grid */}
       <div className="grid grid-cols-1 md:grid-cols-4 gap-6">
         <motion.div
           variants={item}
@@ -188,7 +219,9 @@ const Dashboard = ({ onNavigate }) => {
               className="mx-auto text-muted-foreground opacity-20 mb-4"
             />
             <p className="text-muted-foreground mb-4">
-              No calls analyzed yet this session
+              {fromServer
+                ? "No calls analyzed yet"
+                : "No calls analyzed yet this session"}
             </p>
             <button
               onClick={() => onNavigate("call-analysis")}
@@ -202,9 +235,7 @@ const Dashboard = ({ onNavigate }) => {
             {recentCalls.map((call) => (
               <div
                 key={call.id}
-                onClick={() => {
-                  onNavigate("call-analysis", call);
-                }}
+                onClick={() => openCall(call)}
                 className="p-4 hover:bg-accent/50 transition-colors flex items-center justify-between group cursor-pointer"
               >
                 <div className="flex items-center space-x-4 flex-1 min-w-0">
@@ -1,4 +1,4 @@
-import React, { useEffect, useRef } from "react";
+import React, { useEffect, useRef, useState } from "react";
 import {
   Chart as ChartJS,
   CategoryScale,
@@ -10,6 +10,7 @@ import {
 } from "chart.js";
 import { Bar } from "react-chartjs-2";
 import { TrendingUp } from "lucide-react";
+import { fetchStats } from "../utils/historyApi";
 
 // Register Chart.js components
 ChartJS.register(
@@ -21,7 +22,138 @@ ChartJS.register(
   Legend
 );
 
+const API_URL = import.meta.env.VITE_API_URL || "http://localhost:5000";
+const MAX_PROFILE_DRUGS = 20;
+const MAX_POPULATION_PAIRS = 5;
+
 const FAERSChart = ({ data }) => {
+  const [profiles, setProfiles] = useState({});
+  const [selectedDrug, setSelectedDrug] = useState(null);
+  const [populationPairs, setPopulationPairs] = useState([]);
+
+  const drugs = [
+    ...new Set(
+      (data?.entities || [])
+        .filter((entity) => entity.Category === "MEDICATION")
+        .map((entity) => entity.Text.toLowerCase())
+    ),
+  ].slice(0, MAX_PROFILE_DRUGS);
+  const drugKey = drugs.join(",");
+
+  // One batch call; the backend prefetched these profiles during analysis
+  useEffect(() => {
+    if (!drugKey) {
+      setProfiles({});
+      return undefined;
+    }
+    let cancelled = false;
+    fetch(`${API_URL}/drug-profile?drugs=${encodeURIComponent(drugKey)}`)
+      .then((response) => (response.ok ? response.json() : { profiles: {} }))
+      .then((body) => {
+        if (!cancelled) setProfiles(body.profiles || {});
+      })
+      .catch(() => {});
+    return () => {
+      cancelled = true;
+    };
+  }, [drugKey]);
+
+  // Population context from /stats; hidden when the history store is unavailable
+  useEffect(() => {
+    let cancelled = false;
+    fetchStats()
+      .then((stats) => {
+        if (!cancelled) {
+          setPopulationPairs((stats.topPairs || []).slice(0, MAX_POPULATION_PAIRS));
+        }
+      })
+      .catch(() => {});
+    return () => {
+      cancelled = true;
+    };
+  }, [data?.analysis_id]);
+
+  const profileDrugs = drugs.filter((drug) => profiles[drug]?.reactions?.length);
+  const activeDrug = profileDrugs.includes(selectedDrug) ? selectedDrug : profileDrugs[0];
+  const activeReactions = activeDrug ? profiles[activeDrug].reactions : [];
+
+  const profileSection = activeDrug ? (
+    <div className="mt-6">
+      <h3 className="text-sm font-medium text-foreground mb-2">
+        Most reported reactions
+      </h3>
+      <div className="flex flex-wrap gap-2 mb-3">
+        {profileDrugs.map((drug) => (
+          <button
+            key={drug}
+            onClick={() => setSelectedDrug(drug)}
+            className={`px-2 py-1 rounded-md text-xs border ${
+              drug === activeDrug
+                ? "bg-primary text-primary-foreground border-primary"
+                : "border-border text-muted-foreground"
+            }`}
+          >
+            {drug}
+          </button>
+        ))}
+      </div>
+      <div style={{ height: "220px" }}>
+        <Bar
+          data={{
+            labels: activeReactions.map((r) => r.term.toLowerCase()),
+            datasets: [
+              {
+                label: `FAERS reports with ${activeDrug}`,
+                data: activeReactions.map((r) => r.count),
+                backgroundColor: "rgba(59, 130, 246, 0.7)", // Blue
+                borderColor: "rgba(59, 130, 246, 1)",
+                borderWidth: 2,
+                borderRadius: 6,
+              },
+            ],
+          }}
+          options={{
+            responsive: true,
+            maintainAspectRatio: false,
+            indexAxis: "y",
+            plugins: { legend: { display: false } },
+          }}
+        />
+      </div>
+    </div>
+  ) : null;
+
+  const populationSection = populationPairs.length ? (
+    <div className="mt-6">
+      <h3 className="text-sm font-medium text-foreground mb-2">
+        Most common pairs across recent encounters
+      </h3>
+      <div style={{ height: "200px" }}>
+        <Bar
+          data={{
+            labels: populationPairs.map((p) => `${p.drug} + ${p.symptom}`),
+            datasets: [
+              {
+                label: "Encounters",
+                data: populationPairs.map((p) => p.encounters),
+                backgroundColor: "rgba(16, 185, 129, 0.7)", // Green
+                borderColor: "rgba(16, 185, 129, 1)",
+                borderWidth: 2,
+                borderRadius: 6,
+              },
+            ],
+          }}
+          options={{
+            responsive: true,
+            maintainAspectRatio: false,
+            indexAxis: "y",
+            plugins: { legend: { display: false } },
+          }}
+        />
+      </div>
+    </div>
+  ) : null;
+
   if (
     !data ||
     !data.faers_data ||
@@ -38,6 +170,8 @@ const FAERSChart = ({ data }) => {
           No FAERS data available. Upload an audio file with detected
           medications to see the comparison.
         </div>
+        {profileSection}
+        {populationSection}
       </div>
     );
   }
@@ -151,6 +285,8 @@ const FAERSChart = ({ data }) => {
       <div style={{ height: "250px" }}>
         <Bar data={chartData} options={options} />
       </div>
+      {profileSection}
+      {populationSection}
       <div className="mt-4 text-xs text-muted-foreground">
         <p>
           ℹ️ Higher report counts indicate more frequent adverse events recorded
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import { motion } from "framer-motion";
 import {
   FileAudio,
@@ -8,24 +8,77 @@ import {
   ChevronRight,
 } from "lucide-react";
 import { getAnalysisHistory } from "../utils/sessionManager";
+import { fetchHistory, loadHistoryEntry } from "../utils/historyApi";
+
+const PAGE_SIZE = 30;
 
 const History = ({ onSelectAnalysis }) => {
   const [history, setHistory] = useState([]);
+  // Cursor for the next server page; null when there are no more
+  const [nextCursor, setNextCursor] = useState(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
+  // Whether the list comes from the server's history or this session only
+  const [fromServer, setFromServer] = useState(false);
+  const fromServerRef = useRef(false);
 
   useEffect(() => {
-    // Load history from session
-    const loadHistory = () => {
-      const data = getAnalysisHistory();
-      setHistory(data);
+    let cancelled = false;
+
+    const loadHistory = async () => {
+      try {
+        const page = await fetchHistory({ limit: PAGE_SIZE });
+        if (cancelled) return;
+        setHistory(page.items);
+        setNextCursor(page.nextCursor);
+        setFromServer(true);
+        fromServerRef.current = true;
+      } catch (error) {
+        // History store unavailable: show this session's analyses
+        if (cancelled) return;
+        setHistory(getAnalysisHistory());
+        setNextCursor(null);
+        setFromServer(false);
+        fromServerRef.current = false;
+      }
     };
 
     loadHistory();
 
-    // Refresh every 2 seconds to catch new analyses
-    const interval = setInterval(loadHistory, 2000);
-    return () => clearInterval(interval);
+    // Refresh every 2 seconds to catch new analyses in session history;
+    // the server list is loaded once and paged on demand
+    const interval = setInterval(() => {
+      if (!cancelled && !fromServerRef.current) {
+        setHistory(getAnalysisHistory());
+      }
+    }, 2000);
+    return () => {
+      cancelled = true;
+      clearInterval(interval);
+    };
   }, []);
 
+  const loadMore = async () => {
+    setIsLoadingMore(true);
+    try {
+      const page = await fetchHistory({ limit: PAGE_SIZE, cursor: nextCursor });
+      setHistory((current) => [...current, ...page.items]);
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      console.error("Error loading history:", error);
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
+  const openAnalysis = async (item) => {
+    if (!onSelectAnalysis) return;
+    try {
+      onSelectAnalysis("call-analysis", await loadHistoryEntry(item));
+    } catch (error) {
+      console.error("Error loading analysis:", error);
+    }
+  };
+
   const getRiskColor = (level) => {
     switch (level) {
       case "Critical":
@@ -67,7 +120,9 @@ const History = ({ onSelectAnalysis }) => {
         </h2>
         <p className="text-muted-foreground max-w-md">
           Upload and analyze your first call recording to see it appear here.
-          All analyses from this session will be stored.
+          {fromServer
+            ? " All analyses are stored on the server."
+            : " All analyses from this session will be stored."}
         </p>
         <button
           onClick={() => onSelectAnalysis && onSelectAnalysis("call-analysis")}
@@ -91,7 +146,9 @@ const History = ({ onSelectAnalysis }) => {
             Analysis History
           </h1>
           <p className="text-muted-foreground">
-            Session history: {history.length} call
+            {fromServer ? "All analyses" : "Session history"}:{" "}
+            {history.length}
+            {nextCursor ? "+" : ""} call
             {history.length !== 1 ? "s" : ""} analyzed
           </p>
         </div>
@@ -105,9 +162,7 @@ const History = ({ onSelectAnalysis }) => {
             animate={{ opacity: 1, y: 0 }}
             transition={{ delay: index * 0.05 }}
             className="bg-card/50 backdrop-blur-sm rounded-xl border border-border shadow-sm hover:shadow-md transition-all hover:scale-[1.02] cursor-pointer p-5"
-            onClick={() =>
-              onSelectAnalysis && onSelectAnalysis("call-analysis", item)
-            }
+            onClick={() => openAnalysis(item)}
           >
             <div className="flex items-start justify-between mb-3">
               <div className="flex items-center space-x-2">
@@ -164,6 +219,18 @@ const History = ({ onSelectAnalysis }) => {
           </motion.div>
         ))}
       </div>
+
+      {nextCursor && (
+        <div className="flex justify-center">
+          <button
+            onClick={loadMore}
+            disabled={isLoadingMore}
+            className="px-4 py-2 bg-primary text-primary-foreground rounded-lg hover:bg-primary/90 transition-colors font-medium disabled:opacity-50"
+          >
+            {isLoadingMore ? "Loading..." : "Load More"}
+          </button>
+        </div>
+      )}
     </motion.div>
   );
 };
@@ -0,0 +1,60 @@
+// Server-side analysis history (/history) and population stats (/stats)
+// Both need the backend's analysis store; callers fall back to the
+// session history when it is unavailable
+
+const API_URL = import.meta.env.VITE_API_URL || "http://localhost:5000";
+
+const getJson = async (path) => {
+  const response = await fetch(`${API_URL}${path}`);
+  if (!response.ok) {
+    throw new Error(`${path} failed with status ${response.status}`);
+  }
+  return response.json();
+};
+
+// History summaries in the shape of session history entries
+const toHistoryEntry = (summary) => ({
+  id: summary.analysis_id,
+  analysisId: summary.analysis_id,
+  timestamp: new Date(summary.created_at * 1000).toISOString(),
+  fileName: summary.file_name || "Untitled recording",
+  riskScore: summary.risk_score ?? 0,
+  riskLevel: summary.risk_level || "Unknown",
+});
+
+export const fetchStats = async () => {
+  const stats = await getJson("/stats");
+  return {
+    totalCalls: stats.totals.total_calls,
+    criticalCalls: stats.totals.critical_calls,
+    moderateCalls: stats.totals.moderate_calls,
+    lowRiskCalls: stats.totals.low_risk_calls,
+    // Drug-symptom pairs seen in the most encounters (last 30 days)
+    topPairs: stats.top_pairs,
+  };
+};
+
+// One page of history, newest first; pass the returned cursor for the next
+export const fetchHistory = async ({ limit = 20, cursor = null } = {}) => {
+  const params = new URLSearchParams({ limit: String(limit) });
+  if (cursor) {
+    params.set("cursor", cursor);
+  }
+  const page = await getJson(`/history?${params}`);
+  return {
+    items: page.items.map(toHistoryEntry),
+    nextCursor: page.next_cursor,
+  };
+};
+
+// A history entry with its full stored result as `data`, ready to display.
+// Session entries already carry it.
+export const loadHistoryEntry = async (entry) => {
+  if (entry.data || !entry.analysisId) {
+    return entry;
+  }
+  const record = await getJson(
+    `/history/${encodeURIComponent(entry.analysisId)}`
+  );
+  return { ...entry, data: record.result };
+};
@@ -0,0 +1,116 @@
+import unittest
+import sys
+import os
+import threading
+import time
+
+# Add project root to path to import backend modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services.admission import MAX_CLIENTS, OTHER_CLIENTS, AdmissionController, AdmissionRejected
+
+class TestAdmissionController(unittest.TestCase):
+    def queue(self, controller, clients, order):
+        """Queues one request per client name behind the held slots, in order."""
+        threads = []
+        for name in clients:
+            queued = len(controller._waiters)
+
+            def work(name=name):
+                ticket = controller.admit(name)
+                order.append(name)
+                controller.release(ticket)
+            thread = threading.Thread(target=work)
+            thread.start()
+            threads.append(thread)
+            while len(controller._waiters) <= queued:
+                time.sleep(0.001)
+        return threads
+
+    def test_weighted_fair_queuing_between_clients(self):
+        controller = AdmissionController(1, latency_target=60,
+                                         clients={'clinic': {'weight': 2}, 'partner': {'weight': 1}})
+        held = controller.admit('partner')
+        order = []
+        # A partner backlog queued first does not hold the clinic back
+        threads = self.queue(controller, ['partner'] * 4 + ['clinic'] * 4, order)
+        controller.release(held)
+        for thread in threads:
+            thread.join()
+
+        # Two clinic requests per partner request
+        self.assertEqual(order[:6], ['clinic', 'clinic', 'partner', 'clinic', 'clinic', 'partner'])
+        self.assertEqual(sorted(order), ['clinic'] * 4 + ['partner'] * 4)
+        self.assertEqual(controller.stats()['in_use'], 0)
+
+    def test_per_client_concurrency_cap(self):
+        controller = AdmissionController(3, latency_target=60, clients={'partner': {'concurrency': 1}})
+        held = controller.admit('partner')
+        order = []
+        threads = self.queue(controller, ['partner'], order)
+
+        # Free slots remain for other clients while the partner waits
+        clinic = controller.admit('clinic')
+        self.assertEqual(controller.stats()['clients']['partner']['queued'], 1)
+        controller.release(clinic)
+        controller.release(held)
+        threads[0].join()
+        self.assertEqual(order, ['partner'])
+
+    def test_rate_limit(self):
+        controller = AdmissionController(10, clients={'partner': {'rate': 0.5, 'burst': 2}})
+        for _ in range(2):
+            controller.release(controller.admit('partner'))
+
+        with self.assertRaises(AdmissionRejected) as rejected:
+            controller.admit('partner')
+        self.assertEqual(rejected.exception.reason, 'rate')
+        self.assertAlmostEqual(rejected.exception.retry_after, 2, delta=0.1)
+        controller.release(controller.admit('clinic'))
+        self.assertEqual(controller.stats()['clients']['partner']['rejected']['rate'], 1)
+
+    def test_sheds_when_predicted_wait_exceeds_target(self):
+        controller = AdmissionController(1, latency_target=2.5)
+        for _ in range(20):
+            controller._service.record(1.0)
+        held = controller.admit('partner')
+        order = []
+        threads = self.queue(controller, ['partner', 'partner'], order)
+
+        # Two queued ahead and one running at ~1s each: a third would wait ~3s
+        with self.assertRaises(AdmissionRejected) as rejected:
+            controller.admit('partner')
+        self.assertEqual(rejected.exception.reason, 'overload')
+        self.assertAlmostEqual(rejected.exception.retry_after, 3.0)
+        controller.release(held)
+        for thread in threads:
+            thread.join()
+        self.assertEqual(controller.stats()['clients']['partner']['rejected']['overload'], 1)
+
+    def test_queued_request_times_out_at_target(self):
+        controller = AdmissionController(1, latency_target=0.05)
+        for _ in range(20):
+            controller._service.record(0.01)
+        held = controller.admit('partner')
+
+        with self.assertRaises(AdmissionRejected) as rejected:
+            controller.admit('clinic')
+        self.assertEqual(rejected.exception.reason, 'timeout')
+        controller.release(held)
+        stats = controller.stats()
+        self.assertEqual((stats['queued'], stats['in_use']), (0, 0))
+        self.assertEqual(stats['clients']['clinic']['rejected']['timeout'], 1)
+
+    def test_clients_past_the_cap_share_one_bucket(self):
+        controller = AdmissionController(2, clients={'clinic': {'weight': 4}})
+        for i in range(MAX_CLIENTS + 5):
+            controller.release(controller.admit(f"client-{i}"))
+        controller.release(controller.admit('clinic'))
+
+        clients = controller.stats()['clients']
+        self.assertEqual(len(clients), MAX_CLIENTS + 2)
+        self.assertEqual(clients[OTHER_CLIENTS]['admitted'], 5)
+        self.assertEqual(clients['clinic']['weight'], 4)
+
+if __name__ == '__main__':
+    unittest.main()
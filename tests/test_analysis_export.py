@@ -0,0 +1,116 @@
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+# Add project root to path to import backend modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from backend.ml.train_model import load_training_data
+from backend.services.analysis_export import report_label, stream_export, table_rows, write_export
+from backend.services.analysis_store import AnalysisStore
+
+def make_result(level, details, complete=True, degraded=()):
+    return {
+        "risk_analysis": {"level": level, "score": 5.0},
+        "faers_data": {"total_reports": sum(d['reports'] for d in details), "details": details,
+                       "complete": complete, "skipped_pairs": [{"drug": "Aspirin", "symptom": "rash"}]},
+        "degraded_upstreams": list(degraded),
+        "entities": [
+            {'Text': 'Aspirin', 'Category': 'MEDICATION', 'Type': 'GENERIC_NAME', 'Score': 0.9, 'Frequency': 2},
+            {'Text': 'nausea', 'Category': 'MEDICAL_CONDITION', 'Score': 0.8, 'Speaker': 1},
+            {'Text': 'rash', 'Category': 'MEDICAL_CONDITION', 'Score': 0.8},
+            {'Text': 'headache', 'Category': 'MEDICAL_CONDITION', 'Score': 0.8}
+        ],
+        "nlp_source": "comprehend"
+    }
+
+class TestAnalysisExport(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = AnalysisStore(os.path.join(self.tmpdir.name, 'test.db'), flush_interval=0.01)
+        for i in range(30):
+            details = [{"drug": "Aspirin", "symptom": "nausea", "reports": 100 * i}]
+            self.store.save(f"a{i}", make_result('Critical' if i % 3 == 0 else 'Low Risk', details),
+                            created_at=86400 * (i + 1))
+        self.store.flush()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_pairs_fill_checked_zero_counts_only(self):
+        summary = {"analysis_id": "x", "created_at": 1.5, "risk_level": "Moderate", "file_name": None,
+                   "risk_score": 5.0, "total_reports": 2500}
+        details = [{"drug": "Aspirin", "symptom": "Nausea", "reports": 2500}]
+
+        complete = table_rows('pairs', summary, make_result('Moderate', details))
+        degraded = table_rows('pairs', summary, make_result('Moderate', details, degraded=['openfda']))
+
+        # The skipped pair is unknown, not zero
+        self.assertEqual([(r['drug'], r['symptom'], r['faers_reports'], r['label']) for r in complete],
+                         [('aspirin', 'nausea', 2500, 2), ('aspirin', 'headache', 0, 0)])
+        self.assertEqual(len(degraded), 1)
+        self.assertEqual(complete[0]['created_at'], 1500)
+        self.assertEqual([report_label(n) for n in (0, 300, 301, 2000, 2001)], [0, 0, 1, 1, 2])
+
+    def test_fixed_size_row_groups_and_filters(self):
+        path = os.path.join(self.tmpdir.name, 'entities.parquet')
+        rows = write_export(self.store, 'entities', path, row_group_size=25,
+                            since=86400 * 4, until=86400 * 28, risk_levels=['Critical'])
+
+        parquet = pq.ParquetFile(path)
+        self.assertEqual(rows, 8 * 4)
+        self.assertEqual([parquet.metadata.row_group(i).num_rows for i in range(parquet.num_row_groups)], [25, 7])
+        table = parquet.read()
+        self.assertEqual(set(table.column('risk_level').to_pylist()), {'Critical'})
+        self.assertEqual(table.column('frequency').to_pylist()[:2], [2, 1])
+        self.assertEqual(table.column('speaker').to_pylist()[:2], [None, 1])
+
+    def test_row_group_statistics_allow_date_pushdown(self):
+        path = os.path.join(self.tmpdir.name, 'analyses.parquet')
+        write_export(self.store, 'analyses', path, row_group_size=10)
+
+        since = pd.Timestamp(86400 * 26, unit='s', tz='UTC')
+        recent = pd.read_parquet(path, filters=[('created_at', '>=', since)])
+        first_group = pq.ParquetFile(path).metadata.row_group(0).column(1).statistics
+
+        self.assertEqual(list(recent['analysis_id']), [f"a{i}" for i in range(25, 30)])
+        self.assertEqual(first_group.max, pd.Timestamp(86400 * 10, unit='s', tz='UTC'))
+
+    def test_stream_yields_a_chunk_per_row_group(self):
+        chunks = list(stream_export(self.store, 'pairs', 'parquet', row_group_size=20))
+        arrow_chunks = list(stream_export(self.store, 'pairs', 'arrow', row_group_size=20))
+
+        # 30 analyses x 2 known pairs: 3 row groups, then the footer
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(pq.read_table(io.BytesIO(b''.join(chunks))).num_rows, 60)
+        self.assertEqual(pa.ipc.open_stream(b''.join(arrow_chunks)).read_all().num_rows, 60)
+
+    def test_empty_export_and_bad_arguments(self):
+        empty = b''.join(stream_export(self.store, 'pairs', since=86400 * 100))
+
+        self.assertEqual(pq.read_table(io.BytesIO(empty)).column_names,
+                         ['analysis_id', 'created_at', 'risk_level', 'drug', 'symptom', 'faers_reports', 'label'])
+        with self.assertRaises(ValueError):
+            stream_export(self.store, 'transcripts')
+        with self.assertRaises(ValueError):
+            stream_export(self.store, 'pairs', 'csv')
+
+    def test_pairs_export_is_training_data(self):
+        path = os.path.join(self.tmpdir.name, 'pairs.parquet')
+        write_export(self.store, 'pairs', path)
+
+        df = load_training_data([path])
+        # The last analysis' count wins for a pair seen in several
+        self.assertEqual(df.to_dict('records'), [
+            {'drug': 'aspirin', 'symptom': 'nausea', 'faers_reports': 2900, 'label': 2},
+            {'drug': 'aspirin', 'symptom': 'headache', 'faers_reports': 0, 'label': 0}
+        ])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+import sys
+import os
+import sqlite3
+import tempfile
+import time
+
+# Add project root to path to import backend modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services.analysis_store import AnalysisStore
+
+def make_result(level, score, drug='aspirin', symptom='headache'):
+    return {
+        "risk_analysis": {"level": level, "score": score},
+        "faers_data": {"total_reports": 10, "details": []},
+        "entities": [
+            {'Text': drug, 'Category': 'MEDICATION'},
+            {'Text': symptom, 'Category': 'MEDICAL_CONDITION'}
+        ]
+    }
+
+class TestAnalysisStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = AnalysisStore(os.path.join(self.tmpdir.name, 'test.db'), flush_interval=0.01)
+        for i in range(5):
+            self.store.save(f"a{i}", make_result('Critical' if i % 2 else 'Low Risk', float(i)),
+                            created_at=1000 + i)
+        self.store.save("lisinopril-call", make_result('Moderate', 5.0, drug='Lisinopril'),
+                        created_at=2000)
+        self.store.flush()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_keyset_pagination_is_newest_first(self):
+        first = self.store.list_analyses(limit=4)
+        second = self.store.list_analyses(limit=4, cursor=first['next_cursor'])
+
+        ids = [item['analysis_id'] for item in first['items'] + second['items']]
+        self.assertEqual(ids, ["lisinopril-call", "a4", "a3", "a2", "a1", "a0"])
+        self.assertIsNone(second['next_cursor'])
+
+    def test_filters(self):
+        critical = self.store.list_analyses(risk_level='Critical')
+        by_drug = self.store.list_analyses(drug='LISINOPRIL')
+        by_time = self.store.list_analyses(since=1002, until=1004)
+
+        self.assertEqual([i['analysis_id'] for i in critical['items']], ["a3", "a1"])
+        self.assertEqual([i['analysis_id'] for i in by_drug['items']], ["lisinopril-call"])
+        self.assertEqual([i['analysis_id'] for i in by_time['items']], ["a3", "a2"])
+
+    def test_get_returns_full_result(self):
+        record = self.store.get("a3")
+
+        self.assertEqual(record['risk_level'], 'Critical')
+        self.assertEqual(record['result']['faers_data']['total_reports'], 10)
+        self.assertIsNone(self.store.get("missing"))
+
+    def test_aggregates_are_maintained_incrementally(self):
+        stats = self.store.aggregates(top=5, days=100000)
+
+        self.assertEqual(stats['totals']['total_calls'], 6)
+        self.assertEqual(stats['totals']['critical_calls'], 2)
+        self.assertEqual(stats['top_drugs'][0], {'drug': 'aspirin', 'encounters': 5})
+        self.assertEqual(stats['top_symptoms'], [{'symptom': 'headache', 'encounters': 6}])
+        pairs = {(p['drug'], p['symptom']): p['encounters'] for p in stats['top_pairs']}
+        self.assertEqual(pairs, {('aspirin', 'headache'): 5, ('lisinopril', 'headache'): 1})
+
+    def test_rebuild_matches_incremental(self):
+        before = self.store.aggregates(top=5, days=100000)
+
+        scanned = self.store.rebuild_aggregates()
+
+        self.assertEqual(scanned, 6)
+        self.assertEqual(self.store.aggregates(top=5, days=100000), before)
+
+    def test_bad_record_does_not_lose_its_batch(self):
+        store = AnalysisStore(os.path.join(self.tmpdir.name, 'batch.db'), flush_interval=0.2)
+        bad = make_result('Critical', 9.0)
+        bad['entities'].append({'Text': None, 'Category': 'MEDICATION'})
+        store.save("good-1", make_result('Low Risk', 1.0))
+        store.save("bad", bad)
+        store.save("good-2", make_result('Low Risk', 2.0))
+        store.flush()
+
+        self.assertIsNotNone(store.get("good-1"))
+        self.assertIsNone(store.get("bad"))
+        self.assertIsNotNone(store.get("good-2"))
+        self.assertEqual(store.dropped, {'queue_full': 0, 'write_error': 1})
+        # The bad record's partial writes were rolled back with it
+        self.assertEqual(store.aggregates(days=100000)['totals']['total_calls'], 2)
+
+    def test_full_queue_drops_and_counts(self):
+        path = os.path.join(self.tmpdir.name, 'full.db')
+        store = AnalysisStore(path, batch_size=1, flush_interval=0.01, max_queued=1)
+        # Hold the write lock so the writer stalls on the first record
+        lock = sqlite3.connect(path)
+        lock.execute("BEGIN IMMEDIATE")
+        self.assertTrue(store.save("a", make_result('Low Risk', 1.0)))
+        while store._queue.qsize():
+            time.sleep(0.001)
+
+        self.assertTrue(store.save("b", make_result('Low Risk', 1.0)))
+        self.assertFalse(store.save("c", make_result('Low Risk', 1.0)))
+        lock.rollback()
+        lock.close()
+        store.flush()
+
+        self.assertEqual([store.get(i) is not None for i in "abc"], [True, True, False])
+        self.assertEqual(store.dropped['queue_full'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import io
+import unittest
+import sys
+import os
+import tempfile
+from unittest import mock
+
+# app.py imports its modules relative to backend/
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+
+_tmpdir = tempfile.TemporaryDirectory()
+os.environ.setdefault('ANALYSIS_DB_PATH', os.path.join(_tmpdir.name, 'analyses.db'))
+
+import app as backend_app
+from services.resilience import OPENFDA, UpstreamError
+from services.safety_service import PAIR_FROM_MATRIX, PAIR_FROM_OPENFDA
+
+# Names the precomputed FAERS matrix does not know, so every pair needs openFDA
+PRIOR = {
+    "analysis_id": "prior",
+    "transcript": "Taking zolvarex and feeling dizzy.",
+    "entities": [
+        {"Text": "zolvarex", "Category": "MEDICATION", "Type": "GENERIC_NAME", "Score": 0.9, "Traits": []},
+        {"Text": "dizziness", "Category": "MEDICAL_CONDITION", "Type": "DX_NAME", "Score": 0.9, "Traits": []}
+    ],
+    # Nothing settled, so the pair is looked up again
+    "faers_data": {"details": [], "complete": False}
+}
+
+class TestReanalyzeEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.client = backend_app.app.test_client()
+
+    def reanalyze(self, **body):
+        return self.client.post('/reanalyze', json={"prior": PRIOR, **body})
+
+    def test_openfda_failure_leaves_faers_incomplete(self):
+        with mock.patch.object(backend_app.safety_service, 'fetch_pair_count',
+                               side_effect=UpstreamError(OPENFDA, 'HTTP 503')):
+            response = self.reanalyze(entities=PRIOR['entities'])
+
+        data = response.get_json()
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(data['faers_data']['complete'])
+        self.assertEqual(data['faers_data']['pairs_checked'], 0)
+        self.assertIn(OPENFDA, data['degraded_upstreams'])
+        # An outage, not a deadline cut
+        self.assertNotIn('faers', data['deadline']['degraded_stages'])
+
+    def test_malformed_input_is_a_400(self):
+        entity = {"Text": "zolvarex", "Category": "MEDICATION"}
+        for body in ({"utterances": ["not an utterance"]},
+                     {"utterances": [{"speaker": 0, "text": 42}]},
+                     {"entities": [{**entity, "Text": 123}]},
+                     {"entities": [{**entity, "Score": "high"}]},
+                     {"entities": [{**entity, "Traits": "NEGATION"}]},
+                     {"entities": [{**entity, "Frequency": 0}]},
+                     {"entities": [{**entity, "Frequency": 1.5}]}):
+            with self.subTest(body=body):
+                response = self.reanalyze(**body)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.get_json())
+
+    def test_negated_corrections_are_not_analyzed(self):
+        negated = {"Text": "rash", "Category": "MEDICAL_CONDITION", "Traits": [{"Name": "NEGATION", "Score": 0.9}]}
+        with mock.patch.object(backend_app.safety_service, 'fetch_pair_count', return_value=(0, PAIR_FROM_OPENFDA)):
+            response = self.reanalyze(entities=PRIOR['entities'] + [negated])
+
+        data = response.get_json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([e['Text'] for e in data['entities']], ['zolvarex', 'dizziness'])
+        self.assertEqual(data['faers_data']['pairs_total'], 1)
+
+    def test_matrix_counts_are_dated(self):
+        for source, matrix_pairs in ((PAIR_FROM_MATRIX, 1), (PAIR_FROM_OPENFDA, 0)):
+            with self.subTest(source=source), \
+                    mock.patch.object(backend_app.safety_service, 'fetch_pair_count', return_value=(12, source)):
+                data = self.reanalyze(entities=PRIOR['entities']).get_json()
+            self.assertEqual(data['faers_data']['total_reports'], 12)
+            self.assertEqual(data['faers_data']['matrix_pairs'], matrix_pairs)
+            if matrix_pairs:
+                self.assertEqual(data['faers_data']['matrix_as_of'], backend_app.safety_service.pair_matrix.as_of)
+            else:
+                self.assertIsNone(data['faers_data']['matrix_as_of'])
+
+class TestAnalyzeEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.client = backend_app.app.test_client()
+
+    def test_patient_mode_without_utterances_analyzes_whole_transcript(self):
+        transcription = mock.Mock()
+        transcription.transcribe.return_value = {"transcript": PRIOR['transcript'], "utterances": []}
+        nlp = mock.Mock()
+        nlp.analyze_text.return_value = PRIOR['entities']
+        with mock.patch.object(backend_app, 'transcription_service', transcription), \
+                mock.patch.object(backend_app, 'nlp_service', nlp), \
+                mock.patch.object(backend_app, 'NLP_LOCAL_MODE', 'fallback'), \
+                mock.patch.object(backend_app.safety_service, 'fetch_pair_count', return_value=(0, PAIR_FROM_OPENFDA)):
+            response = self.client.post('/analyze', data={
+                "audio": (io.BytesIO(b"audio"), "visit.wav"),
+                "speaker_mode": "patient",
+                "patient_speaker": "0"
+            })
+
+        data = response.get_json()
+        self.assertEqual(response.status_code, 200)
+        nlp.analyze_text.assert_called_once_with(PRIOR['transcript'])
+        nlp.analyze_segments.assert_not_called()
+        self.assertEqual([e['Text'] for e in data['entities']], ['zolvarex', 'dizziness'])
+        self.assertNotIn('speaker_analysis', data)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import sys
+import os
+import io
+import wave
+
+import numpy as np
+
+# Add project root to path to import backend modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services.audio_preprocessing import preprocess_audio
+
+def make_wav(rate=48000, channels=2, seconds=6, voiced=(2, 4)):
+    t = np.arange(rate * seconds) / rate
+    tone = 0.3 * np.sin(2 * np.pi * 300 * t) * ((t > voiced[0]) & (t < voiced[1]))
+    samples = np.repeat((tone * 32767).astype('<i2'), channels)
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as writer:
+        writer.setnchannels(channels)
+        writer.setsampwidth(2)
+        writer.setframerate(rate)
+        writer.writeframes(samples.tobytes())
+    buffer.seek(0)
+    return buffer
+
+class TestAudioPreprocessing(unittest.TestCase):
+    def test_downmix_resample_and_trim(self):
+        output, report = preprocess_audio(make_wav())
+
+        with wave.open(output, 'rb') as reader:
+            self.assertEqual(reader.getnchannels(), 1)
+            self.assertEqual(reader.getframerate(), 16000)
+        self.assertAlmostEqual(report['processed_duration'], 2.4, delta=0.2)
+        self.assertGreater(report['size_reduction'], 10)
+
+    def test_audio_without_silence_is_not_trimmed(self):
+        for voiced in ((-1, 7), (7, 8)):
+            with self.subTest(voiced=voiced):
+                output, report = preprocess_audio(make_wav(voiced=voiced))
+
+                # Continuous tone, then all silence: both sent whole
+                self.assertAlmostEqual(report['processed_duration'], 6.0, delta=0.05)
+                self.assertEqual(report['trimmed_seconds'], 0)
+                with wave.open(output, 'rb') as reader:
+                    self.assertEqual(reader.getnframes(), 16000 * 6)
+
+    def test_narrowband_audio_is_not_upsampled(self):
+        output, report = preprocess_audio(make_wav(rate=8000, channels=1))
+
+        with wave.open(output, 'rb') as reader:
+            self.assertEqual(reader.getframerate(), 8000)
+        self.assertLess(report['processed_bytes'], report['original_bytes'])
+
+    def test_non_wav_input_passes_through(self):
+        stream = io.BytesIO(b'ID3\x03\x00\x00\x00\x00\x00\x00mp3 data')
+
+        output, report = preprocess_audio(stream)
+
+        self.assertIs(output, stream)
+        self.assertIsNone(report)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import sys
+import os
+import time
+
+# Add project root to path to import backend modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services.deadline import (
+    Deadline, DeadlineExceeded, reset_deadline, set_deadline, upstream_timeout
+)
+from backend.services.resilience import CircuitBreaker
+
+class TestDeadline(unittest.TestCase):
+    def test_override_is_clamped(self):
+        self.assertEqual(Deadline.from_request(120, 300).budget, 120)
+        self.assertEqual(Deadline.from_request(120, 300, override_ms=5000).budget, 5)
+        self.assertEqual(Deadline.from_request(120, 300, override_ms=10).budget, 1.0)
+        self.assertEqual(Deadline.from_request(120, 300, override_ms=10 ** 9).budget, 300)
+
+    def test_timeout_shrinks_then_raises(self):
+        deadline = Deadline(1.0)
+        self.assertEqual(deadline.timeout(0.5, 'faers'), 0.5)
+        self.assertLessEqual(deadline.timeout(10, 'faers'), 1.0)
+        with self.assertRaises(DeadlineExceeded):
+            deadline.timeout(10, 'faers', reserve=1.0)
+
+    def test_upstream_timeout_bounded_by_current_deadline(self):
+        self.assertEqual(upstream_timeout(10), 10)
+        token = set_deadline(Deadline(0.2))
+        try:
+            self.assertLessEqual(upstream_timeout(10), 0.2)
+            time.sleep(0.21)
+            self.assertEqual(upstream_timeout(10), 0.1)
+        finally:
+            reset_deadline(token)
+        self.assertEqual(upstream_timeout(10), 10)
+
+class TestDeadlineUpstreamCalls(unittest.TestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=60)
+
+    def test_hedged_call_gives_up_at_deadline_without_tripping(self):
+        # Only a hedged call runs off the caller's thread and can be abandoned
+        for _ in range(50):
+            self.breaker.latency.record(1.0)
+        deadline = Deadline(0.05)
+        token = set_deadline(deadline)
+        try:
+            start = time.monotonic()
+            with self.assertRaises(DeadlineExceeded):
+                self.breaker.hedged_call(time.sleep, 0.5)
+            self.assertLess(time.monotonic() - start, 0.3)
+        finally:
+            reset_deadline(token)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_expired_deadline_skips_call(self):
+        calls = []
+        token = set_deadline(Deadline(0.01))
+        try:
+            time.sleep(0.02)
+            with self.assertRaises(DeadlineExceeded):
+                self.breaker.hedged_call(calls.append, 1)
+        finally:
+            reset_deadline(token)
+        self.assertEqual(calls, [])
+
+    def test_failure_after_deadline_is_not_counted(self):
+        def slow_failure():
+            time.sleep(0.03)
+            raise TimeoutError("read timed out")
+
+        token = set_deadline(Deadline(0.02))
+        try:
+            with self.assertRaises(DeadlineExceeded):
+                self.breaker.call(slow_failure)
+        finally:
+            reset_deadline(token)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import sys
+import os
+import threading
+import time
+
+# Add project root to path to import backend modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services.drug_profiles import DrugProfileCache
+from backend.services.resilience import OPENFDA, UpstreamError
+
+class FakeSafetyService:
+    """Counts profile queries; 'unknown' fails like an openFDA outage."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def fetch_drug_profile(self, drug_name, limit=5):
+        with self._lock:
+            self.calls.append(drug_name)
+        time.sleep(self.delay)
+        if drug_name == 'unknown':
+            raise UpstreamError(OPENFDA, 'HTTP 500')
+        return [{'term': f'REACTION {i}', 'count': 100 - i} for i in range(limit)]
+
+class TestDrugProfileCache(unittest.TestCase):
+    def test_batch_fetches_misses_once_then_serves_from_memory(self):
+        safety = FakeSafetyService()
+        cache = DrugProfileCache(safety, top_k=3, ttl=60, max_size=10, workers=2)
+
+        profiles = cache.get_many(['Aspirin', 'metformin', 'aspirin', 'unknown'], timeout=5)
+        self.assertEqual(list(profiles), ['aspirin', 'metformin', 'unknown'])
+        self.assertEqual(len(profiles['aspirin']['reactions']), 3)
+        self.assertIsNone(profiles['unknown'])
+
+        cache.get_many(['aspirin', 'metformin'], timeout=5)
+        self.assertEqual(sorted(safety.calls), ['aspirin', 'metformin', 'unknown'])
+        self.assertEqual(cache.stats()['profiles'], 2)
+
+    def test_prefetch_is_background_and_deduplicated(self):
+        safety = FakeSafetyService(delay=0.1)
+        cache = DrugProfileCache(safety, top_k=3, ttl=60, max_size=10, workers=2)
+
+        start = time.monotonic()
+        cache.prefetch(['aspirin', 'Aspirin', 'metformin'])
+        self.assertLess(time.monotonic() - start, 0.05)
+        # A request arriving mid-prefetch waits on the same fetch
+        profiles = cache.get_many(['aspirin'], timeout=5)
+
+        self.assertIsNotNone(profiles['aspirin'])
+        self.assertEqual(safety.calls.count('aspirin'), 1)
+
+    def test_stale_and_evicted_profiles_are_refetched(self):
+        safety = FakeSafetyService()
+        cache = DrugProfileCache(safety, top_k=3, ttl=0.05, max_size=1, workers=1)
+
+        cache.get_many(['aspirin'], timeout=5)
+        cache.get_many(['metformin'], timeout=5)
+        self.assertIsNone(cache.get('aspirin'))
+        time.sleep(0.06)
+        self.assertIsNone(cache.get('metformin'))
+
+if __name__ == '__main__':
+    unittest.main()
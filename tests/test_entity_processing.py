@@ -0,0 +1,80 @@
+import unittest
+import sys
+import os
+
+# Add project root to path to import backend modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.logic.entity_processing import filter_active_entities, deduplicate_entities, plan_faers_pairs
+from backend.logic.risk_engine import RiskEngine
+
+class TestEntityProcessing(unittest.TestCase):
+    def setUp(self):
+        self.raw_entities = [
+            {'Text': 'Aspirin', 'Category': 'MEDICATION', 'Traits': []},
+            {'Text': 'chest pain', 'Category': 'MEDICAL_CONDITION', 'Traits': []},
+            {'Text': 'aspirin', 'Category': 'MEDICATION', 'Traits': []},
+            {'Text': 'fever', 'Category': 'MEDICAL_CONDITION', 'Traits': [{'Name': 'NEGATION'}]},
+            {'Text': 'diabetes', 'Category': 'MEDICAL_CONDITION', 'Traits': [{'Name': 'PERTAINS_TO_FAMILY'}]}
+        ]
+
+    def test_filter_removes_negated_and_family_history(self):
+        active = filter_active_entities(self.raw_entities)
+
+        self.assertEqual([e['Text'] for e in active], ['Aspirin', 'chest pain', 'aspirin'])
+
+    def test_deduplicate_keeps_first_casing_and_counts(self):
+        unique = deduplicate_entities(filter_active_entities(self.raw_entities))
+
+        self.assertEqual([(e['Text'], e['Frequency']) for e in unique], [('Aspirin', 2), ('chest pain', 1)])
+
+class TestFaersPlanner(unittest.TestCase):
+    def setUp(self):
+        self.entities = [
+            {'Text': 'aspirin', 'Category': 'MEDICATION', 'Score': 0.99, 'Frequency': 3},
+            {'Text': 'metformin', 'Category': 'MEDICATION', 'Score': 0.75, 'Frequency': 1},
+            {'Text': 'back pain', 'Category': 'MEDICAL_CONDITION', 'Score': 0.99, 'Frequency': 4},
+            {'Text': 'nausea', 'Category': 'MEDICAL_CONDITION', 'Score': 0.8, 'Frequency': 1},
+            {'Text': 'Chest pain', 'Category': 'MEDICAL_CONDITION', 'Score': 0.72, 'Frequency': 1},
+        ]
+        self.tier = RiskEngine().symptom_tier
+
+    def test_ranks_by_tier_then_confidence_and_frequency(self):
+        planned, skipped = plan_faers_pairs(self.entities, 0, symptom_tier=self.tier)
+
+        self.assertEqual(skipped, [])
+        self.assertEqual([(p['drug'], p['symptom']) for p in planned], [
+            ('aspirin', 'Chest pain'), ('metformin', 'Chest pain'),
+            ('aspirin', 'nausea'), ('metformin', 'nausea'),
+            ('aspirin', 'back pain'), ('metformin', 'back pain'),
+        ])
+
+    def test_budget_skips_least_informative_pairs(self):
+        cached = {('metformin', 'Chest pain'), ('metformin', 'back pain')}
+        looked_up = []
+
+        def is_cached(drug, symptom):
+            looked_up.append((drug, symptom))
+            return (drug, symptom) in cached
+
+        planned, skipped = plan_faers_pairs(self.entities, 3, symptom_tier=self.tier, is_cached=is_cached)
+
+        self.assertEqual(sum(1 for p in planned if not p['cached']), 3)
+        self.assertEqual([(p['drug'], p['symptom']) for p in planned], [
+            ('aspirin', 'Chest pain'), ('metformin', 'Chest pain'),
+            ('aspirin', 'nausea'), ('metformin', 'nausea'),
+        ])
+        # Past the budget nothing is looked up, cached or not
+        self.assertEqual(looked_up, [(p['drug'], p['symptom']) for p in planned])
+        self.assertEqual([(p['drug'], p['symptom']) for p in skipped],
+                         [('aspirin', 'back pain'), ('metformin', 'back pain')])
+
+    def test_worst_case_calls_are_bounded(self):
+        entities = ([{'Text': f'drug{i}', 'Category': 'MEDICATION'} for i in range(15)] +
+                    [{'Text': f'condition{i}', 'Category': 'MEDICAL_CONDITION'} for i in range(40)])
+        planned, skipped = plan_faers_pairs(entities, 40)
+
+        self.assertEqual((len(planned), len(skipped)), (40, 560))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import sys
+import unittest
+
+# Add project root to path to import backend modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.logic.entity_processing import filter_active_entities
+from backend.logic.local_entities import LocalEntityExtractor
+
+def traits(entity):
+    return {trait['Name'] for trait in entity['Traits']}
+
+class TestLocalEntities(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.extractor = LocalEntityExtractor(drugs=['Zyloprim'], conditions=['Hair Loss'])
+
+    def entities(self, text):
+        return {e['Text']: e for e in self.extractor.analyze_text(text)}
+
+    def test_extracts_drugs_and_conditions(self):
+        entities = self.extractor.analyze_text("Since starting Lisinopril I get headaches and chest  pain.")
+
+        self.assertEqual([(e['Text'], e['Category'], e['Type']) for e in entities],
+                         [('Lisinopril', 'MEDICATION', 'GENERIC_NAME'),
+                          ('headaches', 'MEDICAL_CONDITION', 'DX_NAME'),
+                          ('chest  pain', 'MEDICAL_CONDITION', 'DX_NAME')])
+        self.assertNotIn('BeginOffset', entities[0])
+
+    def test_brand_names_extra_terms_and_word_boundaries(self):
+        entities = self.entities("Tylenol, zyloprim and some hair loss. Painful? Aleves is not a word.")
+
+        self.assertEqual(entities['Tylenol']['Type'], 'BRAND_NAME')
+        self.assertEqual(entities['zyloprim']['Category'], 'MEDICATION')
+        self.assertEqual(entities['hair loss']['Category'], 'MEDICAL_CONDITION')
+        self.assertNotIn('Painful', entities)
+        self.assertNotIn('Aleves', entities)
+
+    def test_negation(self):
+        entities = self.entities("I deny any chest pain. Nausea was ruled out. I have dizziness.")
+
+        self.assertIn('NEGATION', traits(entities['chest pain']))
+        self.assertIn('NEGATION', traits(entities['Nausea']))
+        self.assertEqual(traits(entities['dizziness']), set())
+
+    def test_negation_scope_ends_at_terminators_and_sentences(self):
+        entities = self.entities("No fever but I have a rash. No. Headache every day.")
+
+        self.assertIn('NEGATION', traits(entities['fever']))
+        self.assertNotIn('NEGATION', traits(entities['rash']))
+        self.assertNotIn('NEGATION', traits(entities['Headache']))
+
+    def test_pseudo_negation(self):
+        entities = self.entities("Not sure if the nausea is from metformin. The ibuprofen is not helping my back pain.")
+
+        self.assertEqual(traits(entities['nausea']), set())
+        self.assertEqual(traits(entities['back pain']), set())
+
+    def test_family_history(self):
+        entities = self.entities("My mother had a stroke. Diabetes runs in the family. "
+                                 "My mom's on warfarin but I take aspirin. My family doctor said it's asthma.")
+
+        self.assertIn('PERTAINS_TO_FAMILY', traits(entities['stroke']))
+        self.assertIn('PERTAINS_TO_FAMILY', traits(entities['Diabetes']))
+        self.assertIn('PERTAINS_TO_FAMILY', traits(entities['warfarin']))
+        self.assertEqual(traits(entities['aspirin']), set())
+        self.assertEqual(traits(entities['asthma']), set())
+
+    def test_filter_active_entities_drops_negated_and_family(self):
+        active = filter_active_entities(self.extractor.analyze_text(
+            "Dad has hypertension. No vomiting. I take Advil for migraines."))
+
+        self.assertEqual(sorted(e['Text'] for e in active), ['Advil', 'migraines'])
+
+    def test_analyze_segments_attributes_entities(self):
+        segments = [
+            {'speaker': 0, 'text': 'I take aspirin. I also take lisinopril.', 'offsets': [(0, 1.0), (16, 3.0)]},
+            {'speaker': None, 'text': 'Any cough?', 'offsets': [(0, 4.0)]},
+        ]
+        entities = self.extractor.analyze_segments(segments)
+
+        self.assertEqual([(e['Text'], e['Speaker'], e['UtteranceStart']) for e in entities],
+                         [('aspirin', 0, 1.0), ('lisinopril', 0, 3.0), ('cough', None, 4.0)])
+
+    def test_has_medical_content(self):
+        self.assertTrue(self.extractor.has_medical_content("It is Nausea mostly"))
+        self.assertFalse(self.extractor.has_medical_content("Hi, how was the drive in?"))
+        self.assertFalse(self.extractor.has_medical_content(""))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -59,5 +59,54 @@ class TestRiskEngine(unittest.TestCase):
         self.assertEqual(result['level'], 'Low Risk')
         self.assertIn('Low risk', result['action_plan'])
 
+class TestRiskEngineBatch(unittest.TestCase):
+    def setUp(self):
+        self.engine = RiskEngine()
+        self.encounters = {
+            'e1': [{'Text': 'severe chest pain', 'Category': 'MEDICAL_CONDITION', 'Frequency': 3}],
+            'e2': [
+                {'Text': 'mild rash', 'Category': 'MEDICAL_CONDITION', 'Frequency': 1},
+                {'Text': 'Aspirin', 'Category': 'MEDICATION', 'Frequency': 2}
+            ],
+            'e3': [
+                {'Text': 'back pain', 'Category': 'MEDICAL_CONDITION', 'Frequency': 5},
+                {'Text': 'diabetes', 'Category': 'MEDICAL_CONDITION', 'Frequency': 4},
+                {'Text': 'arthritis', 'Category': 'MEDICAL_CONDITION', 'Frequency': 3}
+            ],
+            'e4': []
+        }
+        self.totals = {'e1': 50, 'e2': 600, 'e3': 2000, 'e4': 0}
+
+    def _batch(self):
+        ids, texts, categories, frequencies = [], [], [], []
+        for encounter_id, entities in self.encounters.items():
+            for entity in entities:
+                ids.append(encounter_id)
+                texts.append(entity['Text'])
+                categories.append(entity['Category'])
+                frequencies.append(entity['Frequency'])
+        encounters = list(self.encounters)
+        return self.engine.calculate_risk_batch(
+            ids, texts, categories, frequencies,
+            encounters=encounters, faers_totals=[self.totals[e] for e in encounters]
+        )
+
+    def test_batch_matches_calculate_risk(self):
+        batch = self._batch()
+
+        for i, encounter_id in enumerate(batch.encounters):
+            expected = self.engine.calculate_risk(
+                self.encounters[encounter_id], {'total_reports': self.totals[encounter_id]}
+            )
+            self.assertEqual(batch.result(i), expected)
+            self.assertEqual(batch.levels[i], expected['level'])
+            self.assertEqual(batch.scores[i], expected['score'])
+
+    def test_action_plan_is_lazy(self):
+        batch = self._batch()
+
+        self.assertIsNone(batch._entity_order)
+        self.assertIn('CRITICAL ALERT', batch.action_plan(0))
+
 if __name__ == '__main__':
     unittest.main()
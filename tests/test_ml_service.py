@@ -4,6 +4,8 @@ Tests for machine learning prediction service
 """
 import sys
 import os
+import json
+import shutil
 import pytest
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -163,6 +165,124 @@ class TestMLService:
             assert 'ml_available' in result
             assert result['ml_available'] is True
 
+    def test_tiers_are_profiled_cheapest_first(self, ml_service):
+        """Test tiers load in cost order with measured latencies"""
+        names = [tier.name for tier in ml_service.tiers]
+        assert names[-1] == 'forest'
+        if len(names) < 2:
+            pytest.skip("Fast tier artifact not available")
+        assert names[0] == 'fast'
+        stats = ml_service.tier_stats()
+        assert stats['fast']['p99_ms'] < stats['forest']['p50_ms']
+
+    def test_budget_selects_tier(self, ml_service):
+        """Test default uses the full model and a tight budget the fast tier"""
+        if len(ml_service.tiers) < 2:
+            pytest.skip("Fast tier artifact not available")
+        entities = [
+            {'Text': 'aspirin', 'Category': 'MEDICATION', 'Frequency': 1},
+            {'Text': 'dizziness', 'Category': 'MEDICAL_CONDITION', 'Frequency': 1}
+        ]
+        faers_data = {'total_reports': 500}
+
+        full = ml_service.predict_risk(entities, faers_data)
+        assert full['ml_tier'] == 'forest'
+        assert full['ml_tier_reason'] == 'default'
+
+        fast = ml_service.predict_risk(entities, faers_data, budget_ms=0.5)
+        assert fast['ml_tier'] == 'fast'
+        assert fast['ml_tier_reason'] == 'budget'
+        assert abs(sum(fast['ml_probabilities'].values()) - 1.0) < 0.01
+
+    def test_fast_tier_agrees_with_forest(self, ml_service):
+        """Test the fast tier predicts the same level on known pairs"""
+        if len(ml_service.tiers) < 2:
+            pytest.skip("Fast tier artifact not available")
+        fast, forest = ml_service.tiers[0], ml_service.tiers[-1]
+        agree = 0
+        cases = [(d, s, r) for d in range(0, 80, 8) for s in range(0, 60, 6) for r in (0, 50, 500, 5000)]
+        for drug, symptom, reports in cases:
+            agree += int(fast.predict_proba(drug, symptom, reports).argmax() ==
+                         forest.predict_proba(drug, symptom, reports).argmax())
+        assert agree / len(cases) > 0.8
+
+    def test_saturation_falls_back_to_cheapest_tier(self, ml_service):
+        """Test too many in-flight predictions select the cheapest tier"""
+        ml_service._in_flight = ml_service.max_full_inflight
+        try:
+            tier, reason = ml_service.select_tier()
+        finally:
+            ml_service._in_flight = 0
+        assert tier is ml_service.tiers[0]
+        assert reason == 'load'
+
+
+class TestModelHotReload:
+    """Test versioned model releases are swapped in and rolled back"""
+
+    ARTIFACTS = ['risk_classifier.pkl', 'risk_classifier_fast.pkl', 'drug_encoder.pkl', 'symptom_encoder.pkl']
+
+    @pytest.fixture
+    def models_dir(self, tmp_path):
+        source = os.path.join(os.path.dirname(__file__), '..', 'backend', 'models')
+        if not os.path.exists(os.path.join(source, 'risk_classifier.pkl')):
+            pytest.skip("ML model not available")
+        for name in self.ARTIFACTS:
+            if os.path.exists(os.path.join(source, name)):
+                shutil.copy(os.path.join(source, name), tmp_path / name)
+        return tmp_path
+
+    def add_release(self, models_dir, version, corrupt=False):
+        release = models_dir / 'releases' / version
+        release.mkdir(parents=True)
+        for name in self.ARTIFACTS:
+            if os.path.exists(models_dir / name):
+                shutil.copy(models_dir / name, release / name)
+        if corrupt:
+            (release / 'risk_classifier.pkl').write_bytes(b'not a pickle')
+        (release / 'manifest.json').write_text(json.dumps({"version": version}))
+
+    def test_new_release_is_swapped_in_and_rolled_back(self, models_dir):
+        service = MLPredictionService(models_dir=str(models_dir), reload_interval=0)
+        assert service.version == 'base'
+        old_bundle = service._bundle
+
+        self.add_release(models_dir, '20260101T000000')
+        service.check_for_update()
+        assert service.version == '20260101T000000'
+        # In-flight work holding the old bundle keeps a complete model
+        assert old_bundle.model is not None and old_bundle.version == 'base'
+
+        entities = [
+            {'Text': 'aspirin', 'Category': 'MEDICATION', 'Frequency': 1},
+            {'Text': 'dizziness', 'Category': 'MEDICAL_CONDITION', 'Frequency': 1}
+        ]
+        assert service.predict_risk(entities, {'total_reports': 500})['ml_model_version'] == '20260101T000000'
+
+        status = service.rollback()
+        assert status['version'] == 'base'
+        assert status['rollback_versions'] == ['20260101T000000']
+        # The rollback is pinned, so the watcher does not re-apply the newer release
+        service.check_for_update()
+        assert service.version == 'base'
+
+    def test_invalid_release_is_rejected(self, models_dir):
+        service = MLPredictionService(models_dir=str(models_dir), reload_interval=0)
+        self.add_release(models_dir, '20260101T000000', corrupt=True)
+
+        service.check_for_update()
+        assert service.version == 'base'
+        assert '20260101T000000' in service.status()['rejected_versions']
+        with pytest.raises(ValueError):
+            service.reload('20260101T000000')
+
+    def test_incomplete_release_is_ignored(self, models_dir):
+        self.add_release(models_dir, '20260101T000000')
+        (models_dir / 'releases' / '20260101T000000' / 'manifest.json').unlink()
+        service = MLPredictionService(models_dir=str(models_dir), reload_interval=0)
+        assert service.available_versions() == ['base']
+        assert service.version == 'base'
+
 
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
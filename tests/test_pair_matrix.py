@@ -0,0 +1,72 @@
+import csv
+import datetime
+import os
+import sys
+import tempfile
+import unittest
+
+# Add project root to path to import backend modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services.pair_matrix import (MATRIX_PATH, PairCountMatrix, build_pair_matrix, load_pair_matrix,
+                                          save_pair_matrix)
+from backend.services.safety_service import PAIR_FROM_CACHE, PAIR_FROM_MATRIX, PAIR_FROM_OPENFDA, SafetyService
+
+TRAINING_DATA = os.path.join(os.path.dirname(__file__), '..', 'backend', 'analysis', 'results',
+                             'training_data_robust.csv')
+
+class TestPairMatrix(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'counts.npy')
+        rows = [('Aspirin', 'Chest Pain', 120), ('aspirin', 'nausea', 0), ('warfarin', 'bleeding', 900),
+                ('aspirin', 'chest  pain', 150)]
+        save_pair_matrix(self.path, *build_pair_matrix(rows, '2024-05-01', sources=['a.csv']))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_lookup(self):
+        matrix = PairCountMatrix(self.path)
+
+        # The later row for a pair wins; terms are normalized
+        self.assertEqual(matrix.get('ASPIRIN', 'chest pain'), (True, 150))
+        self.assertEqual(matrix.get('aspirin', 'nausea'), (True, 0))
+        # Within the vocabularies but never collected
+        self.assertEqual(matrix.get('warfarin', 'nausea'), (False, None))
+        self.assertEqual(matrix.get('ibuprofen', 'nausea'), (False, None))
+        self.assertIn(('Warfarin', 'Bleeding'), matrix)
+        self.assertEqual(matrix.stats()['pairs'], 3)
+        self.assertEqual(matrix.sources, ['a.csv'])
+
+    def test_stale_or_missing_matrix_is_ignored(self):
+        self.assertIsNone(load_pair_matrix(os.path.join(self.tmp.name, 'missing.npy')))
+        self.assertIsNone(load_pair_matrix(''))
+        age = PairCountMatrix(self.path).age_days()
+        self.assertIsNone(load_pair_matrix(self.path, max_age_days=age - 1))
+        self.assertEqual(load_pair_matrix(self.path, max_age_days=age).as_of, '2024-05-01')
+        self.assertEqual(PairCountMatrix(self.path).age_days(datetime.date(2024, 5, 11)), 10)
+
+    def test_safety_service_answers_known_pairs_without_openfda(self):
+        service = SafetyService(pair_matrix=PairCountMatrix(self.path))
+        queried = []
+        service._query_pair_count = lambda drug, symptom: queried.append((drug, symptom)) or 7
+
+        self.assertTrue(service.is_pair_cached('Aspirin', 'Chest Pain'))
+        self.assertFalse(service.is_pair_cached('warfarin', 'nausea'))
+        self.assertEqual(service.fetch_pair_count('Aspirin', 'Chest Pain'), (150, PAIR_FROM_MATRIX))
+        self.assertEqual(service.fetch_pair_count('warfarin', 'nausea'), (7, PAIR_FROM_OPENFDA))
+        self.assertEqual(service.fetch_pair_count('warfarin', 'nausea'), (7, PAIR_FROM_CACHE))
+        self.assertEqual(queried, [('warfarin', 'nausea')])
+
+    def test_shipped_matrix_matches_training_data(self):
+        matrix = PairCountMatrix(MATRIX_PATH)
+        with open(TRAINING_DATA, newline='') as f:
+            rows = list(csv.DictReader(f))
+
+        self.assertEqual(matrix.pairs, len(rows))
+        for row in rows[::97]:
+            self.assertEqual(matrix.get(row['drug'], row['symptom']), (True, int(row['faers_reports'])))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import unittest
+import sys
+import os
+
+# Add project root to path to import backend modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.logic.entity_processing import deduplicate_entities
+from backend.logic.reanalysis import (
+    build_unit_segments, changed_units, correct_entities, entity_changes, known_pair_counts, reuse_entities,
+    split_units
+)
+
+class TestUnitDiff(unittest.TestCase):
+    def setUp(self):
+        self.utterances = [
+            {'speaker': 0, 'text': 'What brings you in today?', 'start': 0.0},
+            {'speaker': 1, 'text': 'I take aspirin every day.', 'start': 2.0},
+            {'speaker': 1, 'text': 'I have  a headache.', 'start': 4.5}
+        ]
+
+    def test_split_units_by_utterance_and_speaker(self):
+        units = split_units('', self.utterances, speaker=1)
+
+        self.assertEqual([u['text'] for u in units], ['I take aspirin every day.', 'I have a headache.'])
+        self.assertEqual(units[0]['start'], 2.0)
+
+    def test_split_units_by_sentence(self):
+        units = split_units('I take aspirin. Any nausea? No.')
+
+        self.assertEqual([u['text'] for u in units], ['I take aspirin.', 'Any nausea?', 'No.'])
+
+    def test_changed_units_ignores_whitespace_and_finds_edits(self):
+        edited = self.utterances[:2] + [{'speaker': 1, 'text': 'I have chest pain.'},
+                                        {'speaker': 0, 'text': 'Since when?'}]
+
+        changed = changed_units(split_units('', self.utterances), split_units('', edited))
+
+        self.assertEqual(changed, [2, 3])
+
+    def test_unit_segments_track_offsets_and_mixed_speakers(self):
+        units = split_units('', self.utterances)
+
+        segments = build_unit_segments(units, max_chars=60)
+
+        self.assertEqual(len(segments), 2)
+        self.assertIsNone(segments[0]['speaker'])
+        self.assertEqual(segments[0]['offsets'], [(0, 0.0), (26, 2.0)])
+        self.assertEqual(segments[1], {'speaker': 1, 'text': 'I have a headache.', 'offsets': [(0, 4.5)]})
+
+class TestEntityReuse(unittest.TestCase):
+    def test_reuse_counts_mentions_capped_by_prior_frequency(self):
+        prior = [
+            {'Text': 'aspirin', 'Category': 'MEDICATION', 'Score': 0.99, 'Frequency': 2},
+            {'Text': 'fever', 'Category': 'MEDICAL_CONDITION', 'Score': 0.9, 'Frequency': 1},
+            {'Text': 'pain', 'Category': 'MEDICAL_CONDITION', 'Score': 0.8, 'Frequency': 1}
+        ]
+        units = [{'text': 'Aspirin helps.'}, {'text': 'No fever, just fever-like chills. Painful.'},
+                 {'text': 'More aspirin, aspirin, aspirin.'}]
+
+        unique = deduplicate_entities(reuse_entities(units, prior))
+
+        self.assertEqual([(e['Text'], e['Frequency']) for e in unique], [('aspirin', 2), ('fever', 1)])
+        # Occurrences are copies; the prior entities keep their Frequency
+        self.assertIsNot(unique[0], prior[0])
+        self.assertEqual(prior[0]['Frequency'], 2)
+
+    def test_known_pair_counts_from_complete_prior(self):
+        prior = {
+            'entities': [
+                {'Text': 'Aspirin', 'Category': 'MEDICATION'},
+                {'Text': 'headache', 'Category': 'MEDICAL_CONDITION'},
+                {'Text': 'nausea', 'Category': 'MEDICAL_CONDITION'},
+                {'Text': 'rash', 'Category': 'MEDICAL_CONDITION'}
+            ],
+            'faers_data': {
+                'details': [{'drug': 'Aspirin', 'symptom': 'headache', 'reports': 50}],
+                'complete': True,
+                'skipped_pairs': [{'drug': 'Aspirin', 'symptom': 'rash'}]
+            },
+            'degraded_upstreams': []
+        }
+
+        self.assertEqual(known_pair_counts(prior), {('aspirin', 'headache'): 50, ('aspirin', 'nausea'): 0})
+
+    def test_known_pair_counts_trusts_only_details_when_incomplete(self):
+        prior = {
+            'entities': [{'Text': 'aspirin', 'Category': 'MEDICATION'},
+                         {'Text': 'nausea', 'Category': 'MEDICAL_CONDITION'}],
+            'faers_data': {'details': [], 'complete': True},
+            'degraded_upstreams': ['openfda']
+        }
+
+        self.assertEqual(known_pair_counts(prior), {})
+
+class TestEntityCorrections(unittest.TestCase):
+    def setUp(self):
+        self.prior = [
+            {'Text': 'aspirin', 'Category': 'MEDICATION', 'Score': 0.99, 'Type': 'GENERIC_NAME', 'Frequency': 3},
+            {'Text': 'headache', 'Category': 'MEDICAL_CONDITION', 'Score': 0.9, 'Frequency': 1}
+        ]
+
+    def test_corrections_inherit_prior_fields_and_merge(self):
+        entities = correct_entities([
+            {'Text': 'Aspirin', 'Category': 'MEDICATION'},
+            {'Text': 'chest pain', 'Category': 'MEDICAL_CONDITION', 'Frequency': 2},
+            {'Text': 'chest  pain', 'Category': 'MEDICAL_CONDITION'}
+        ], self.prior)
+
+        self.assertEqual([(e['Text'], e['Frequency'], e['Score']) for e in entities],
+                         [('Aspirin', 3, 0.99), ('chest pain', 3, 1.0)])
+        self.assertEqual(entities[0]['Type'], 'GENERIC_NAME')
+
+    def test_malformed_corrections_raise(self):
+        for corrections in ([{'Text': 'aspirin'}], ['aspirin'], [{'Text': 123, 'Category': 'MEDICATION'}],
+                            [{'Text': 'aspirin', 'Category': 'MEDICATION', 'Frequency': 'often'}],
+                            [{'Text': 'aspirin', 'Category': 'MEDICATION', 'Frequency': 0}],
+                            [{'Text': 'aspirin', 'Category': 'MEDICATION', 'Score': 'high'}],
+                            [{'Text': 'aspirin', 'Category': 'MEDICATION', 'Traits': 'NEGATION'}]):
+            with self.subTest(corrections=corrections), self.assertRaises(ValueError):
+                correct_entities(corrections, self.prior)
+
+    def test_entity_changes(self):
+        changes = entity_changes(self.prior, [{'Text': 'Aspirin', 'Category': 'MEDICATION'},
+                                              {'Text': 'rash', 'Category': 'MEDICAL_CONDITION'}])
+
+        self.assertEqual(changes, {
+            'added': [{'category': 'MEDICAL_CONDITION', 'text': 'rash'}],
+            'removed': [{'category': 'MEDICAL_CONDITION', 'text': 'headache'}]
+        })
+
+if __name__ == '__main__':
+    unittest.main()
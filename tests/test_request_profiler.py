@@ -0,0 +1,68 @@
+import unittest
+import sys
+import os
+import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to path to import backend modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services.request_profiler import RequestProfiler, NULL_PROFILE, reset_profile, set_profile
+from backend.services.resilience import CircuitBreaker
+
+def busy_work():
+    return sum(i * i for i in range(10000))
+
+class TestRequestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.profiler = RequestProfiler(token='secret', profile_dir=self.tmpdir.name)
+        self.request_id = uuid.uuid4().hex
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_disabled_without_matching_token(self):
+        self.assertIs(self.profiler.start(self.request_id, None), NULL_PROFILE)
+        self.assertIs(self.profiler.start(self.request_id, 'wrong'), NULL_PROFILE)
+        self.assertIs(RequestProfiler(token='', profile_dir=self.tmpdir.name).start(self.request_id, ''),
+                      NULL_PROFILE)
+
+    def test_profile_includes_stages_and_worker_threads(self):
+        profile = self.profiler.start(self.request_id, 'secret')
+        profile.mark('faers')
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(lambda _: profile.wrap(busy_work)(), range(2)))
+        profile.mark('risk_engine')
+        profile.finish()
+
+        stored = self.profiler.load(self.request_id)
+        names = [span['name'] for span in stored['timeline']]
+        self.assertEqual(names.count('busy_work'), 2)
+        self.assertIn('faers', names)
+        self.assertIn('risk_engine', names)
+        self.assertIn('busy_work', stored['call_tree'])
+        self.assertTrue(os.path.exists(self.profiler.load(self.request_id, binary=True)))
+
+    def test_hedged_upstream_attempts_are_profiled(self):
+        breaker = CircuitBreaker('upstream')
+        for _ in range(50):
+            breaker.latency.record(1.0)
+        profile = self.profiler.start(self.request_id, 'secret')
+        token = set_profile(profile)
+        try:
+            breaker.hedged_call(busy_work)
+        finally:
+            reset_profile(token)
+        profile.finish()
+
+        names = [span['name'] for span in self.profiler.load(self.request_id)['timeline']]
+        self.assertIn('upstream_call', names)
+
+    def test_load_rejects_unknown_or_malformed_ids(self):
+        self.assertIsNone(self.profiler.load(self.request_id))
+        self.assertIsNone(self.profiler.load('../../etc/passwd'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import unittest
+import sys
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+# Add project root to path to import backend modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services import resilience
+from backend.services.deadline import Deadline, DeadlineExceeded, reset_deadline, set_deadline
+from backend.services.resilience import CircuitBreaker, CircuitOpenError
+
+def failing():
+    raise ValueError("upstream down")
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker('test', failure_threshold=3, reset_timeout=0.05)
+
+    def test_opens_after_consecutive_failures(self):
+        for _ in range(3):
+            with self.assertRaises(ValueError):
+                self.breaker.call(failing)
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.call(lambda: 1)
+
+    def test_success_resets_failure_count(self):
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                self.breaker.call(failing)
+        self.assertEqual(self.breaker.call(lambda: 42), 42)
+        with self.assertRaises(ValueError):
+            self.breaker.call(failing)
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_probe_closes_circuit(self):
+        for _ in range(3):
+            with self.assertRaises(ValueError):
+                self.breaker.call(failing)
+        time.sleep(0.06)
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertEqual(self.breaker.call(lambda: 'ok'), 'ok')
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_latency_slo_breach_counts_as_failure(self):
+        breaker = CircuitBreaker('slow', failure_threshold=2, latency_slo=0.001)
+        for _ in range(2):
+            breaker.call(time.sleep, 0.01)
+
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+    def test_hedged_call_returns_faster_attempt(self):
+        for _ in range(50):
+            self.breaker.latency.record(0.01)
+        delays = iter([0.5, 0.0])
+
+        start = time.monotonic()
+        result = self.breaker.hedged_call(lambda: time.sleep(next(delays)) or 'done')
+
+        self.assertEqual(result, 'done')
+        self.assertLess(time.monotonic() - start, 0.4)
+
+    def test_unhedged_call_runs_on_caller_thread(self):
+        breaker = CircuitBreaker('plain', hedging=False)
+        for _ in range(50):
+            breaker.latency.record(0.01)
+        token = set_deadline(Deadline(5))
+        try:
+            # Concurrent calls are not serialized behind a shared pool
+            threads = [threading.Thread(target=breaker.hedged_call, args=(time.sleep, 0.2))
+                       for _ in range(resilience.HEDGE_MAX_WORKERS + 4)]
+            start = time.monotonic()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertLess(time.monotonic() - start, 0.35)
+            self.assertIs(breaker.hedged_call(threading.current_thread), threading.current_thread())
+        finally:
+            reset_deadline(token)
+
+    def test_hedge_skipped_while_hedge_workers_are_busy(self):
+        for _ in range(50):
+            self.breaker.latency.record(0.01)
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.1)
+            return 'done'
+
+        with mock.patch.object(resilience, '_hedge_slots', threading.BoundedSemaphore(1)) as slots:
+            slots.acquire()
+            self.assertEqual(self.breaker.hedged_call(slow), 'done')
+            slots.release()
+        self.assertEqual(len(calls), 1)
+
+    def test_hedge_slots_are_all_returned(self):
+        for _ in range(50):
+            self.breaker.latency.record(0.001)
+
+        def call(_):
+            return self.breaker.hedged_call(lambda: time.sleep(0.003) or 'done')
+
+        with mock.patch.object(resilience, '_hedge_slots', threading.BoundedSemaphore(2)) as slots:
+            # Hedges still queued in the pool when the primary wins get cancelled
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                self.assertEqual(set(executor.map(call, range(400))), {'done'})
+            time.sleep(0.1)
+            acquired = [slots.acquire(blocking=False) for _ in range(2)]
+        self.assertEqual(acquired, [True, True])
+
+    def test_deadline_bound_call_gives_up_at_deadline(self):
+        # No latency samples, so nothing is hedged
+        token = set_deadline(Deadline(0.05))
+        try:
+            start = time.monotonic()
+            with self.assertRaises(DeadlineExceeded):
+                self.breaker.deadline_bound_call(time.sleep, 0.5)
+            self.assertLess(time.monotonic() - start, 0.3)
+        finally:
+            reset_deadline(token)
+
+if __name__ == '__main__':
+    unittest.main()
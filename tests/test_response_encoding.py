@@ -0,0 +1,91 @@
+import unittest
+import sys
+import os
+import gzip
+import json
+from unittest import mock
+
+# Add project root to path to import backend modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from flask import Flask, jsonify
+
+from backend.services import response_encoding
+from backend.services.response_encoding import (
+    FastJSONProvider, dumps, json_response, negotiate_encoding, parse_field_list, select_fields
+)
+
+def sample_response():
+    return {
+        "analysis_id": "abc",
+        "transcript": "I take aspirin and have chest pain. " * 100,
+        "utterances": [{"speaker": 0, "text": "hello", "start": 0.0, "end": 1.2, "confidence": 0.98}],
+        "entities": [
+            {"Text": "aspirin", "Category": "MEDICATION", "Traits": [], "Frequency": 2},
+            {"Text": "chest pain", "Category": "MEDICAL_CONDITION",
+             "Traits": [{"Name": "SYMPTOM", "Score": 0.9}], "Frequency": 1}
+        ],
+        "risk_analysis": {"score": 85, "level": "High"}
+    }
+
+class TestFieldSelection(unittest.TestCase):
+    def test_parse_field_list(self):
+        self.assertEqual(parse_field_list(' utterances, entities.Traits ,,'), ['utterances', 'entities.Traits'])
+        self.assertEqual(parse_field_list(None), [])
+
+    def test_exclude_nested_paths_inside_lists(self):
+        original = sample_response()
+        trimmed = select_fields(original, exclude=['utterances', 'entities.Traits'])
+        self.assertNotIn('utterances', trimmed)
+        self.assertEqual(trimmed['entities'][0], {"Text": "aspirin", "Category": "MEDICATION", "Frequency": 2})
+        # The stored/original result must not be mutated
+        self.assertIn('utterances', original)
+        self.assertIn('Traits', original['entities'][0])
+
+    def test_include_keeps_only_requested_fields(self):
+        trimmed = select_fields(sample_response(), fields=['analysis_id', 'entities.Text', 'missing'])
+        self.assertEqual(trimmed, {"analysis_id": "abc", "entities": [{"Text": "aspirin"}, {"Text": "chest pain"}]})
+
+class TestEncoding(unittest.TestCase):
+    def test_negotiation(self):
+        self.assertIsNone(negotiate_encoding(None))
+        self.assertIsNone(negotiate_encoding('identity'))
+        self.assertEqual(negotiate_encoding('gzip, deflate'), 'gzip')
+        self.assertIsNone(negotiate_encoding('gzip;q=0'))
+        self.assertEqual(negotiate_encoding('*'), 'br' if response_encoding.brotli else 'gzip')
+        if response_encoding.brotli:
+            self.assertEqual(negotiate_encoding('gzip, br'), 'br')
+            self.assertEqual(negotiate_encoding('gzip;q=1.0, br;q=0.5'), 'gzip')
+
+    def test_dumps_matches_stdlib_and_handles_numpy(self):
+        payload = sample_response()
+        self.assertEqual(json.loads(dumps(payload)), payload)
+        self.assertEqual(json.loads(dumps({"score": np.float64(0.5), "n": np.int64(3)})), {"score": 0.5, "n": 3})
+
+    def test_json_response_gzip_round_trip(self):
+        app = Flask(__name__)
+        with app.app_context():
+            response = json_response(sample_response(), accept_encoding='gzip')
+            self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+            self.assertIn('Accept-Encoding', response.headers['Vary'])
+            self.assertEqual(json.loads(gzip.decompress(response.get_data())), sample_response())
+
+            small = json_response({"ok": True}, accept_encoding='gzip')
+            self.assertNotIn('Content-Encoding', small.headers)
+            self.assertEqual(small.get_json(), {"ok": True})
+
+    @unittest.skipIf(response_encoding.orjson is None, "orjson not installed")
+    def test_provider_backs_jsonify(self):
+        app = Flask(__name__)
+        app.json = FastJSONProvider(app)
+        orjson = response_encoding.orjson
+        for debug in (False, True):
+            app.debug = debug
+            with self.subTest(debug=debug), app.app_context(), \
+                    mock.patch.object(orjson, 'dumps', wraps=orjson.dumps) as encode:
+                self.assertEqual(jsonify(sample_response()).get_json(), sample_response())
+                encode.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+import threading
+import time
+
+# Add project root to path to import backend modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services.deadline import Deadline, DeadlineExceeded, reset_deadline, set_deadline
+from backend.services.scheduling import CRITICAL, ROUTINE, URGENT, PriorityGate
+from backend.logic.risk_engine import RiskEngine
+
+class TestPriorityGate(unittest.TestCase):
+    def queue_behind(self, gate, priorities):
+        """Queues one waiter per priority behind a held slot; returns the grant order."""
+        order = []
+        threads = []
+        for index, priority in enumerate(priorities):
+            def work(index=index, priority=priority):
+                with gate.slot(priority):
+                    order.append(index)
+            thread = threading.Thread(target=work)
+            thread.start()
+            threads.append(thread)
+            # Let each waiter enqueue before the next one
+            while len(gate._waiters) <= index:
+                time.sleep(0.001)
+        return order, threads
+
+    def test_most_urgent_waiter_is_served_first(self):
+        gate = PriorityGate('test', capacity=1, starvation_seconds=60)
+        self.assertTrue(gate.acquire())
+        order, threads = self.queue_behind(gate, [ROUTINE, URGENT, ROUTINE, CRITICAL])
+        gate.release()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(order, [3, 1, 0, 2])
+
+    def test_starved_waiter_is_promoted(self):
+        gate = PriorityGate('test', capacity=1, starvation_seconds=0.05)
+        self.assertTrue(gate.acquire())
+        order, threads = self.queue_behind(gate, [ROUTINE])
+        time.sleep(0.06)
+        critical = threading.Thread(target=lambda: gate.acquire(CRITICAL) and order.append('critical'))
+        critical.start()
+        while len(gate._waiters) < 2:
+            time.sleep(0.001)
+        gate.release()
+        threads[0].join()
+        critical.join()
+        gate.release()
+        self.assertEqual(order, [0, 'critical'])
+        self.assertEqual(gate.stats()['starvation_promotions'], 1)
+
+    def test_slot_gives_up_at_deadline(self):
+        gate = PriorityGate('test', capacity=1)
+        self.assertTrue(gate.acquire())
+        token = set_deadline(Deadline(0.05))
+        try:
+            with self.assertRaises(DeadlineExceeded):
+                with gate.slot():
+                    pass
+        finally:
+            reset_deadline(token)
+        self.assertEqual(gate.stats()['waiting']['routine'], 0)
+        gate.release()
+        self.assertEqual(gate.stats()['in_use'], 0)
+
+    def test_zero_capacity_is_unlimited(self):
+        gate = PriorityGate('test', capacity=0)
+        with gate.slot(), gate.slot():
+            self.assertEqual(gate.stats()['waiting']['routine'], 0)
+
+class TestCriticalPrescan(unittest.TestCase):
+    def test_finds_critical_symptoms_in_transcript(self):
+        engine = RiskEngine()
+        self.assertEqual(engine.critical_mentions("Since Monday I've had Chest Pain and shortness of breath."),
+                         ["chest pain", "shortness of breath"])
+        self.assertEqual(engine.critical_mentions("I need a refill of my lisinopril."), [])
+        self.assertEqual(engine.critical_mentions(None), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import sys
+import os
+import glob
+
+# Add project root to path to import backend modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.logic.speaker_attribution import identify_patient_speaker, build_speaker_segments
+from backend.services.nlp_service import MedicalNLPService
+
+CONVERSATIONS = os.path.join(os.path.dirname(__file__), 'conversations')
+
+def load_utterances(path, patient_speaker):
+    """Turns a 'D: ... / P: ...' transcript into diarized utterances."""
+    utterances = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line[:2] in ('D:', 'P:'):
+                speaker = patient_speaker if line[0] == 'P' else 1 - patient_speaker
+                utterances.append({'speaker': speaker, 'text': line[2:].strip(), 'start': float(len(utterances))})
+    return utterances
+
+class FakeComprehendClient:
+    """Returns a MEDICATION entity for every known drug word in the text."""
+    DRUGS = ('lisinopril', 'aspirin')
+
+    def __init__(self):
+        self.calls = []
+
+    def detect_entities_v2(self, Text):
+        self.calls.append(Text)
+        entities = []
+        for drug in self.DRUGS:
+            offset = Text.lower().find(drug)
+            if offset >= 0:
+                entities.append({'Text': drug, 'Category': 'MEDICATION', 'Type': 'GENERIC_NAME',
+                                 'Score': 0.95, 'Traits': [], 'BeginOffset': offset})
+        return {'Entities': entities}
+
+class TestSpeakerAttribution(unittest.TestCase):
+    def test_identifies_patient_in_sample_conversations(self):
+        paths = glob.glob(os.path.join(CONVERSATIONS, '*.txt'))
+        self.assertTrue(paths)
+        for path in paths:
+            for patient in (0, 1):
+                with self.subTest(path=os.path.basename(path), patient=patient):
+                    self.assertEqual(identify_patient_speaker(load_utterances(path, patient)), patient)
+
+    def test_no_patient_without_evidence(self):
+        self.assertIsNone(identify_patient_speaker([{'speaker': 0, 'text': 'I have chest pain'}]))
+        self.assertIsNone(identify_patient_speaker([
+            {'speaker': 0, 'text': 'Hello'}, {'speaker': 1, 'text': 'Hello'}
+        ]))
+
+    def test_segments_respect_max_chars_and_track_offsets(self):
+        utterances = [
+            {'speaker': 1, 'text': 'How are you?', 'start': 0.0},
+            {'speaker': 0, 'text': 'I take aspirin.', 'start': 1.0},
+            {'speaker': 1, 'text': 'Do you take lisinopril?', 'start': 2.0},
+            {'speaker': 0, 'text': 'I also take lisinopril.', 'start': 3.0},
+            {'speaker': 0, 'text': 'My chest hurts.', 'start': 4.0},
+        ]
+        segments = build_speaker_segments(utterances, 0, max_chars=40)
+        self.assertEqual([s['text'] for s in segments],
+                         ['I take aspirin. I also take lisinopril.', 'My chest hurts.'])
+        self.assertEqual(segments[0]['offsets'], [(0, 1.0), (16, 3.0)])
+
+    def test_analyze_segments_attributes_entities(self):
+        service = MedicalNLPService()
+        service.client = FakeComprehendClient()
+        segments = [
+            {'speaker': 0, 'text': 'I take aspirin. I also take lisinopril.', 'offsets': [(0, 1.0), (16, 3.0)]},
+            {'speaker': 0, 'text': 'Aspirin again.', 'offsets': [(0, 4.0)]},
+        ]
+        entities = service.analyze_segments(segments)
+
+        self.assertEqual(len(service.client.calls), 2)
+        self.assertEqual([(e['Text'], e['Speaker'], e['UtteranceStart']) for e in entities],
+                         [('lisinopril', 0, 3.0), ('aspirin', 0, 1.0), ('aspirin', 0, 4.0)])
+        self.assertNotIn('BeginOffset', entities[0])
+        self.assertNotIn('BeginOffset', service.analyze_text('take aspirin')[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to path to import backend modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services.tracing import Tracer, FileExporter, propagate, set_attribute, to_otlp, KIND_SERVER
+from backend.services.resilience import CircuitBreaker, CircuitOpenError
+
+class RecordingTracer(Tracer):
+    """Collects ended spans in memory instead of exporting them."""
+    def __init__(self):
+        super().__init__()
+        self.ended = []
+
+    def _on_end(self, span):
+        self.ended.append(span)
+
+    def named(self, name):
+        return [s for s in self.ended if s.name == name]
+
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        self.tracer = RecordingTracer()
+
+    def test_stage_spans_are_children_of_root(self):
+        trace = self.tracer.start_request('POST /analyze', trace_id='a' * 32)
+        trace.mark('nlp')
+        trace.mark('faers')
+        trace.finish(200)
+
+        root = self.tracer.named('POST /analyze')[0]
+        self.assertEqual(root.kind, KIND_SERVER)
+        self.assertEqual(root.attributes['http.status_code'], 200)
+        for stage in ('nlp', 'faers'):
+            span = self.tracer.named(stage)[0]
+            self.assertEqual(span.trace_id, 'a' * 32)
+            self.assertEqual(span.parent_span_id, root.span_id)
+
+    def test_context_propagates_into_executor_threads(self):
+        trace = self.tracer.start_request('POST /analyze')
+        trace.mark('faers')
+
+        def check_pair(drug):
+            with self.tracer.span('faers.pair', drug=drug) as span:
+                span.set_attribute('faers.cache_hit', True)
+                set_attribute('faers.cache_hit', False)
+                return drug
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(propagate(check_pair), d) for d in ('aspirin', 'warfarin', 'insulin')]
+            results = [f.result() for f in futures]
+        trace.finish(200)
+
+        self.assertEqual(results, ['aspirin', 'warfarin', 'insulin'])
+        faers = self.tracer.named('faers')[0]
+        pairs = self.tracer.named('faers.pair')
+        self.assertEqual(len(pairs), 3)
+        for span in pairs:
+            self.assertEqual(span.trace_id, trace.trace_id)
+            self.assertEqual(span.parent_span_id, faers.span_id)
+            self.assertFalse(span.attributes['faers.cache_hit'])
+
+    def test_traceparent_continues_caller_trace(self):
+        header = '00-' + 'b' * 32 + '-' + 'c' * 16 + '-01'
+        trace = self.tracer.start_request('POST /analyze', trace_id='a' * 32, traceparent=header)
+        trace.finish(200)
+        root = self.tracer.named('POST /analyze')[0]
+        self.assertEqual(root.trace_id, 'b' * 32)
+        self.assertEqual(root.parent_span_id, 'c' * 16)
+
+    def test_breaker_calls_create_client_spans(self):
+        import backend.services.resilience as resilience
+        original = resilience.tracer
+        resilience.tracer = self.tracer
+        try:
+            breaker = CircuitBreaker('openfda', failure_threshold=1, reset_timeout=60)
+            trace = self.tracer.start_request('POST /analyze')
+            with self.assertRaises(RuntimeError):
+                breaker.call(self._fail)
+            with self.assertRaises(CircuitOpenError):
+                breaker.call(lambda: 1)
+            trace.finish(503)
+        finally:
+            resilience.tracer = original
+
+        failed, rejected = self.tracer.named('upstream.openfda')
+        self.assertIn('RuntimeError', failed.error)
+        self.assertTrue(rejected.attributes['circuit.open'])
+        self.assertEqual(failed.parent_span_id, trace.root.span_id)
+
+    def _fail(self):
+        raise RuntimeError('boom')
+
+    def test_otlp_encoding_and_file_export(self):
+        trace = self.tracer.start_request('POST /analyze')
+        with self.tracer.span('faers.pair', drug='aspirin', reports=3, cache_hit=True):
+            pass
+        trace.finish(500)
+
+        payload = to_otlp(self.tracer.ended)
+        spans = payload['resourceSpans'][0]['scopeSpans'][0]['spans']
+        pair = next(s for s in spans if s['name'] == 'faers.pair')
+        values = {a['key']: a['value'] for a in pair['attributes']}
+        self.assertEqual(values['drug'], {'stringValue': 'aspirin'})
+        self.assertEqual(values['reports'], {'intValue': '3'})
+        self.assertEqual(values['cache_hit'], {'boolValue': True})
+        root = next(s for s in spans if s['name'] == 'POST /analyze')
+        self.assertEqual(root['status']['code'], 2)
+        self.assertNotIn('parentSpanId', root)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'traces.jsonl')
+            FileExporter(path).export(payload)
+            with open(path) as f:
+                self.assertEqual(json.loads(f.readline()), payload)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Add project root to path to import backend modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services.resilience import COMPREHEND_MEDICAL, OPENFDA
+from backend.services.traffic_capture import (
+    Anonymizer, TrafficRecorder, load_trace, record_upstream, reset_capture, set_capture, text_key
+)
+
+VOCABULARY = ['aspirin', 'chest pain', 'nausea']
+
+class TestAnonymizer(unittest.TestCase):
+    def test_mask_keeps_vocabulary_and_layout(self):
+        anonymizer = Anonymizer(VOCABULARY, salt='test')
+        text = "Jane Doe, 42: chest pain after Aspirin."
+        masked = anonymizer.mask(text)
+        self.assertEqual(masked, "xxxx xxx, 00: chest pain xxxxx Aspirin.")
+        self.assertEqual(len(masked), len(text))
+        self.assertEqual(anonymizer.mask(masked), masked)
+
+    def test_terms_are_stable_pseudonyms(self):
+        anonymizer = Anonymizer(VOCABULARY, salt='test')
+        self.assertEqual(anonymizer.term('aspirin'), 'aspirin')
+        self.assertEqual(anonymizer.term('Zestoretic'), anonymizer.term('zestoretic'))
+        self.assertNotIn('zestoretic', anonymizer.term('Zestoretic'))
+        self.assertNotEqual(Anonymizer(VOCABULARY, salt='other').term('zestoretic'),
+                            anonymizer.term('zestoretic'))
+
+class TestTrafficRecorder(unittest.TestCase):
+    def test_captured_request_round_trips_anonymized(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            recorder = TrafficRecorder(capture_dir=tmpdir, sample_rate=1.0, vocabulary=VOCABULARY, salt='test')
+            capture = recorder.start()
+            token = set_capture(capture)
+            try:
+                capture.record_transcription(0.3, "Jane takes aspirin and Zestoretic", [])
+                record_upstream(COMPREHEND_MEDICAL, "Jane takes aspirin and Zestoretic", [
+                    {'Text': 'Jane', 'Category': 'PROTECTED_HEALTH_INFORMATION', 'Score': 0.99,
+                     'BeginOffset': 0, 'Attributes': [{'Text': 'Jane Doe'}]}
+                ], 0.1)
+                record_upstream(OPENFDA, ('zestoretic', 'nausea'), 12, 0.05)
+                record_upstream(OPENFDA, ('aspirin', 'nausea'), 40, None)
+            finally:
+                reset_capture(token)
+            record_upstream(OPENFDA, ('aspirin', 'nausea'), 40, None)  # outside the request: ignored
+            recorder.finish(capture, 200)
+            recorder.flush()
+
+            records = load_trace([tmpdir])
+
+        self.assertEqual(len(records), 1)
+        record = records[0]
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['deepgram']['transcript'], "xxxx xxxxx aspirin xxx xxxxxxxxxx")
+        call = record['comprehend'][0]
+        self.assertEqual(call['key'], text_key(record['deepgram']['transcript']))
+        self.assertNotIn('Attributes', call['entities'][0])
+        self.assertTrue(call['entities'][0]['Text'].startswith('term-'))
+        self.assertEqual([(c['symptom'], c['count'], c['ms']) for c in record['openfda']],
+                         [('nausea', 12, 50.0), ('nausea', 40, None)])
+        self.assertNotIn('Jane', str(record))
+        self.assertNotIn('zestoretic', str(record).lower())
+
+    def test_unsampled_requests_are_not_captured(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            recorder = TrafficRecorder(capture_dir=tmpdir, sample_rate=0.0)
+            self.assertIsNone(recorder.start())
+            recorder.finish(None, 200)
+            recorder.flush()
+            self.assertEqual(load_trace([tmpdir]), [])
+
+if __name__ == '__main__':
+    unittest.main()
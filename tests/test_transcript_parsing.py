@@ -0,0 +1,86 @@
+import json
+import os
+import sys
+import unittest
+
+# Add project root to path to import backend modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from deepgram.core.pydantic_utilities import parse_obj_as
+from deepgram.types.listen_v1response import ListenV1Response
+
+from backend.services.transcript_parsing import listen_response_fields, parse_listen_response, strip_word_arrays
+
+def word(text, start, speaker, punctuated=None):
+    return {"word": text, "start": start, "end": start + 0.3, "confidence": 0.98, "speaker": speaker,
+            "speaker_confidence": 0.9, "punctuated_word": punctuated or text}
+
+def listen_response(**alternative_extra):
+    first = [word("what", 0.0, 0), word("brings", 0.3, 0), word("you", 0.6, 0, 'you?')]
+    second = [word("chest", 1.5, 1, 'Chest'), word("pain", 1.8, 1, 'pain [inaudible]'),
+              word("quote", 2.1, 1, 'say "ouch"]')]
+    utterances = [
+        {"start": 0.0, "end": 0.9, "confidence": 0.97, "channel": 0, "transcript": "What brings you?",
+         "words": first, "speaker": 0, "id": "a"},
+        {"start": 1.5, "end": 2.4, "confidence": 0.91, "channel": 0,
+         "transcript": 'Chest pain [inaudible] say "ouch"]', "words": second, "speaker": 1, "id": "b"}
+    ]
+    alternative = {"transcript": 'What brings you? Chest pain [inaudible] say "ouch"]', "confidence": 0.95,
+                   "words": first + second, **alternative_extra}
+    return {
+        "metadata": {"transaction_key": "deprecated", "request_id": "r", "sha256": "s",
+                     "created": "2024-01-01T00:00:00.000Z", "duration": 2.4, "channels": 1, "models": ["m"],
+                     "model_info": {"m": {"name": "general-nova", "version": "2", "arch": "nova-2"}}},
+        "results": {"channels": [{"alternatives": [alternative]}], "utterances": utterances}
+    }
+
+class TestTranscriptParsing(unittest.TestCase):
+    def setUp(self):
+        paragraphs = {"transcript": "What brings you?", "paragraphs": [
+            {"sentences": [{"text": "What brings you?", "start": 0.0, "end": 0.9}],
+             "speaker": 0, "num_words": 3, "start": 0.0, "end": 0.9}]}
+        self.document = listen_response(paragraphs=paragraphs)
+        self.raw = json.dumps(self.document, indent=1).encode('utf-8')
+
+    def test_strip_empties_word_arrays_despite_brackets_and_quotes_in_strings(self):
+        stripped = json.loads(strip_word_arrays(self.raw))
+
+        alternative = stripped['results']['channels'][0]['alternatives'][0]
+        self.assertEqual(alternative['words'], [])
+        self.assertEqual(alternative['paragraphs']['paragraphs'][0]['sentences'], [])
+        self.assertEqual([u['words'] for u in stripped['results']['utterances']], [[], []])
+        self.assertEqual(alternative['transcript'], self.document['results']['channels'][0]['alternatives'][0]['transcript'])
+        self.assertLess(len(strip_word_arrays(self.raw)), len(self.raw) / 2)
+
+    def test_parse_extracts_transcript_and_utterances(self):
+        parsed = parse_listen_response(self.raw)
+
+        self.assertEqual(parsed['transcript'], 'What brings you? Chest pain [inaudible] say "ouch"]')
+        self.assertEqual(parsed['utterances'][1], {"speaker": 1, "text": 'Chest pain [inaudible] say "ouch"]',
+                                                   "start": 1.5, "end": 2.4, "confidence": 0.91})
+
+    def test_include_words_keeps_utterance_words(self):
+        parsed = parse_listen_response(self.raw, include_words=True)
+
+        self.assertEqual([w['punctuated_word'] for w in parsed['utterances'][1]['words']],
+                         ['Chest', 'pain [inaudible]', 'say "ouch"]'])
+
+    def test_escaped_backslash_falls_back_to_full_parse(self):
+        document = listen_response()
+        document['results']['utterances'][0]['words'][0]['punctuated_word'] = 'C:\\'
+        raw = json.dumps(document).encode('utf-8')
+
+        self.assertEqual(parse_listen_response(raw)['utterances'][0]['text'], 'What brings you?')
+
+    def test_missing_results(self):
+        self.assertEqual(parse_listen_response(b'{"metadata": {}}'), {"transcript": "", "utterances": []})
+
+    def test_matches_sdk_typed_response(self):
+        typed = parse_obj_as(type_=ListenV1Response, object_=json.loads(self.raw))
+
+        self.assertEqual(listen_response_fields(typed), parse_listen_response(self.raw))
+        self.assertEqual(listen_response_fields(typed, include_words=True)['utterances'][0]['words'][2]['punctuated_word'],
+                         'you?')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+import sys
+import os
+
+# Add project root to path to import backend modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services.upload_budget import UploadBudget
+
+class TestUploadBudget(unittest.TestCase):
+    def setUp(self):
+        self.budget = UploadBudget(max_bytes=100)
+
+    def test_rejects_when_budget_exceeded(self):
+        self.assertTrue(self.budget.try_acquire(60))
+        self.assertFalse(self.budget.try_acquire(50))
+        self.assertEqual(self.budget.in_use, 60)
+
+    def test_release_frees_capacity(self):
+        self.assertTrue(self.budget.try_acquire(60))
+        self.budget.release(60)
+        self.assertTrue(self.budget.try_acquire(90))
+
+    def test_single_oversized_upload_is_admitted_when_idle(self):
+        self.assertTrue(self.budget.try_acquire(150))
+        self.assertFalse(self.budget.try_acquire(1))
+
+if __name__ == '__main__':
+    unittest.main()